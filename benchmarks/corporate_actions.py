@@ -0,0 +1,73 @@
+# Applies book-wide corporate actions (a dividend, a split and a ticker
+# change) through the holders index, and compares finding the holders with
+# a scan of every account.
+#
+#   pdm run python benchmarks/corporate_actions.py [accounts]
+
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.asset import Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.corporate_actions import (
+    CashDividend,
+    CorporateActionProcessor,
+    Split,
+    SymbolChange,
+)
+
+
+TRADE_DATE = date(2022, 1, 3)
+ACTION_DATE = date(2022, 2, 1)
+SYMBOLS = ['VTI', 'VEA', 'VWO', 'VIG', 'VTEB']
+
+
+def make_portfolio(accounts: int) -> Portfolio:
+    portfolio = Portfolio()
+
+    for i in range(accounts):
+        account = portfolio.open_account(f'account-{i}', create_date=TRADE_DATE)
+        account.deposit(1000, transfer_date=TRADE_DATE)
+        account.buy(SYMBOLS[i % len(SYMBOLS)], shares=Decimal(2), amount=400, trade_date=TRADE_DATE)
+
+        # Every third account also holds VTI in a lot
+        if i % 3 == 0:
+            account.buy('VTI', shares=Decimal(1), amount=200, lot=f'lot-{i}', trade_date=TRADE_DATE)
+
+    return portfolio
+
+
+def scan_holders(portfolio: Portfolio, symbol: str) -> int:
+    holders = 0
+
+    for account in portfolio.ledger.accounts.values():
+        for subaccount in account.subaccounts.values():
+            for asset_type, quantity in subaccount.assets.items():
+                if quantity and isinstance(asset_type, Security) and asset_type.symbol == symbol:
+                    holders += 1
+
+    return holders
+
+
+def timed(name: str, run) -> None:
+    start = time.perf_counter()
+    result = run()
+    print(f'{name:<24} {time.perf_counter() - start:8.3f}s  ({result})')
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    portfolio = make_portfolio(accounts)
+    processor = CorporateActionProcessor(portfolio.ledger)
+    print(f'{accounts} accounts, {len(portfolio.ledger.entries)} entries')
+
+    timed('scan for holders', lambda: f'{scan_holders(portfolio, "VTI")} holdings')
+    timed('index for holders', lambda: f'{len(processor.index.get_holders("VTI"))} holdings')
+    timed('dividend', lambda: f'{len(processor.apply(CashDividend("VTI", Decimal("0.75"), ACTION_DATE)))} transactions')
+    timed('split', lambda: f'{len(processor.apply(Split("VTI", 2, ACTION_DATE)))} transactions')
+    timed('symbol change', lambda: f'{len(processor.apply(SymbolChange("VTI", "VTI2", ACTION_DATE)))} transactions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# Measures Ledger.record throughput for the Account trade helpers, and the
+# templated helpers that write straight into the ledger.
+#
+#   pdm run python benchmarks/ledger_record.py [trades]
+
+import sys
+import timeit
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.entry import OpenAccount
+from openroboadvisor.portfolio.account import Account, EXTERNAL_BANK_ID
+
+
+TRADE_DATE = date(2022, 1, 3)
+
+
+def make_entries(ledger: Ledger, trades: int) -> list:
+    account = Account('test', ledger)
+    entries = []
+
+    for i in range(trades):
+        entries.extend(account.deposit_entries(1000, transfer_date=TRADE_DATE))
+        entries.extend(account.buy_entries(
+            symbol='VTI',
+            shares=Decimal('4.5177'),
+            amount=1000,
+            fees=Decimal('9.95'),
+            trade_date=TRADE_DATE,
+        ))
+
+    return entries
+
+
+def make_ledger(trust_balanced: bool) -> Ledger:
+    ledger = Ledger(trust_balanced=trust_balanced)
+    ledger.record(
+        OpenAccount(account_id=EXTERNAL_BANK_ID, account_type=AccountType.CHECKING, entry_date=TRADE_DATE),
+        OpenAccount(account_id='test', account_type=AccountType.BROKERAGE, entry_date=TRADE_DATE),
+    )
+    return ledger
+
+
+def bench(trades: int, trust_balanced: bool) -> float:
+    entries = make_entries(make_ledger(trust_balanced), trades)
+
+    def run() -> None:
+        make_ledger(trust_balanced).record(*entries)
+
+    return min(timeit.repeat(run, number=1, repeat=5))
+
+
+def bench_templates(trades: int) -> float:
+    def run() -> None:
+        account = Account('test', make_ledger(False))
+
+        for i in range(trades):
+            account.deposit(1000, transfer_date=TRADE_DATE)
+            account.buy(
+                symbol='VTI',
+                shares=Decimal('4.5177'),
+                amount=1000,
+                fees=Decimal('9.95'),
+                trade_date=TRADE_DATE,
+            )
+
+    return min(timeit.repeat(run, number=1, repeat=5))
+
+
+def bench_entries(trades: int) -> float:
+    def run() -> None:
+        ledger = make_ledger(False)
+        account = Account('test', ledger)
+
+        for i in range(trades):
+            ledger.record(*account.deposit_entries(1000, transfer_date=TRADE_DATE))
+            ledger.record(*account.buy_entries(
+                symbol='VTI',
+                shares=Decimal('4.5177'),
+                amount=1000,
+                fees=Decimal('9.95'),
+                trade_date=TRADE_DATE,
+            ))
+
+    return min(timeit.repeat(run, number=1, repeat=5))
+
+
+def main() -> None:
+    trades = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    entries = trades * 4
+
+    for trust_balanced in (False, True):
+        seconds = bench(trades, trust_balanced)
+        print(
+            f'trust_balanced={trust_balanced!s:<5} '
+            f'{entries} entries in {seconds:.3f}s '
+            f'({entries / seconds:,.0f} entries/s)'
+        )
+
+    for name, bench_helpers in [('entries', bench_entries), ('templates', bench_templates)]:
+        seconds = bench_helpers(trades)
+        print(
+            f'{name:<20} {trades * 2} helper calls in {seconds:.3f}s '
+            f'({trades * 2 / seconds:,.0f} calls/s)'
+        )
+
+
+if __name__ == '__main__':
+    main()
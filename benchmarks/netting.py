@@ -0,0 +1,63 @@
+# Measures netting and allocating per-account suggestions into block orders,
+# and recording the allocated fills, for a book of many small accounts.
+#
+#   pdm run python benchmarks/netting.py [accounts]
+
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.netting import OrderBatcher, apply_fills
+from openroboadvisor.advisor.suggestion import Buy, Sell
+from openroboadvisor.ledger.asset import Security
+from openroboadvisor.portfolio import Portfolio
+
+
+TRADE_DATE = date(2022, 1, 3)
+SYMBOLS = ['VTI', 'VEA', 'VWO', 'VIG', 'VTEB', 'ITOT', 'BND', 'VNQ']
+QUOTES = {Security(symbol): Decimal(50 + 10 * i) for i, symbol in enumerate(SYMBOLS)}
+
+
+def make_suggestions(accounts: int) -> dict:
+    suggestions = {}
+
+    for i in range(accounts):
+        buy = Security(SYMBOLS[i % len(SYMBOLS)])
+        sell = Security(SYMBOLS[(i + 3) % len(SYMBOLS)])
+        suggestions[f'account-{i}'] = [
+            Buy(buy, Decimal(100 + i % 50)),
+            Sell(sell, Decimal(40 + i % 30)),
+        ]
+
+    return suggestions
+
+
+def make_portfolio(accounts: int) -> Portfolio:
+    portfolio = Portfolio()
+
+    for i in range(accounts):
+        account = portfolio.open_account(f'account-{i}', create_date=TRADE_DATE)
+        account.deposit(1000, transfer_date=TRADE_DATE)
+        sell = SYMBOLS[(i + 3) % len(SYMBOLS)]
+        account.buy(sell, shares=2, amount=2 * QUOTES[Security(sell)], trade_date=TRADE_DATE)
+
+    return portfolio
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    suggestions = make_suggestions(accounts)
+    portfolio = make_portfolio(accounts)
+
+    start = time.perf_counter()
+    orders, fills = OrderBatcher(QUOTES, min_trade_amount=100, fees=Decimal('9.95')).batch(suggestions)
+    batched = time.perf_counter()
+    apply_fills(portfolio, fills, trade_date=TRADE_DATE)
+    applied = time.perf_counter()
+
+    print(f'{accounts} accounts netted into {len(orders)} block orders in {batched - start:.3f}s')
+    print(f'{len(fills)} fills recorded in {applied - batched:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
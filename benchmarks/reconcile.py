@@ -0,0 +1,85 @@
+# Reconciles a synthetic book against a custodian file with a few breaks,
+# and compares it with checking every account position by position.
+#
+#   pdm run python benchmarks/reconcile.py [accounts] [breaks]
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.reconcile import PositionDigests, read_positions, reconcile
+
+
+TRADE_DATE = date(2022, 1, 3)
+SYMBOLS = ['VTI', 'VEA', 'VWO', 'VIG', 'VTEB']
+
+
+def make_portfolio(accounts: int) -> Portfolio:
+    portfolio = Portfolio()
+
+    for i in range(accounts):
+        account = portfolio.open_account(f'account-{i}', create_date=TRADE_DATE)
+        account.deposit(1000, transfer_date=TRADE_DATE)
+
+        for j in range(3):
+            account.buy(SYMBOLS[(i + j) % len(SYMBOLS)], shares=Decimal(j + 1), amount=100, trade_date=TRADE_DATE)
+
+    return portfolio
+
+
+def write_custodian_file(path: str, digests: PositionDigests, breaks: int) -> None:
+    step = max(1, len(digests.positions) // breaks) if breaks else 0
+
+    with open(path, 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.writer(stream)
+        writer.writerow(['account_id', 'symbol', 'quantity'])
+
+        for i, (account_id, positions) in enumerate(digests.positions.items()):
+            for symbol, quantity in positions.items():
+                if step and i % step == 0 and symbol == 'USD':
+                    quantity += 1
+
+                writer.writerow([account_id, symbol, quantity])
+
+
+def compare_everything(digests: PositionDigests, path: str) -> int:
+    custodian: dict[str, dict[str, Decimal]] = {}
+
+    for account_id, symbol, quantity in read_positions(path, ('account_id', 'symbol', 'quantity')):
+        custodian.setdefault(account_id, {})[symbol] = quantity
+
+    return sum(
+        1
+        for account_id in custodian.keys() | digests.positions.keys()
+        for symbol, quantity in custodian.get(account_id, {}).items()
+        if digests.positions.get(account_id, {}).get(symbol, 0) != quantity
+    )
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    breaks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    digests = PositionDigests(make_portfolio(accounts).ledger)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'positions.csv')
+        write_custodian_file(path, digests, breaks)
+
+        start = time.perf_counter()
+        report = reconcile(digests, path)
+        print(
+            f'reconcile            {time.perf_counter() - start:.3f}s '
+            f'({len(report.breaks)} breaks in {len(report.mismatched_account_ids)} of {report.account_count} accounts)'
+        )
+
+        start = time.perf_counter()
+        found = compare_everything(digests, path)
+        print(f'compare everything   {time.perf_counter() - start:.3f}s ({found} breaks)')
+
+
+if __name__ == '__main__':
+    main()
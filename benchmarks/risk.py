@@ -0,0 +1,96 @@
+# Computes volatility, tracking error and value at risk for a book of
+# accounts, and compares the sparse quadratic form used by RiskModel with a
+# dense one over every security in the history.
+#
+#   pdm run python benchmarks/risk.py [accounts]
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from math import sqrt
+from openroboadvisor.advisor.model_portfolio import ModelPortfolio
+from openroboadvisor.backtest import PriceHistory, RiskModel
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.portfolio import Portfolio
+
+
+TRADE_DATE = date(2022, 1, 3)
+SYMBOLS = [f'S{i:03}' for i in range(100)]
+DAYS = 1000
+HOLDINGS = 5
+
+
+def write_prices(path: str) -> None:
+    rng = random.Random(1)
+    prices = [100.0] * len(SYMBOLS)
+
+    with open(path, 'w') as price_file:
+        price_file.write('date,' + ','.join(SYMBOLS) + '\n')
+
+        for day in range(DAYS):
+            prices = [price * (1 + rng.gauss(0, 0.01)) for price in prices]
+            row = [(TRADE_DATE + timedelta(days=day)).isoformat()] + [f'{price:.4f}' for price in prices]
+            price_file.write(','.join(row) + '\n')
+
+
+def make_portfolio(accounts: int) -> Portfolio:
+    portfolio = Portfolio()
+
+    for i in range(accounts):
+        account = portfolio.open_account(f'account-{i}', create_date=TRADE_DATE)
+        account.deposit(10000, transfer_date=TRADE_DATE)
+
+        for j in range(HOLDINGS):
+            symbol = SYMBOLS[(i + j * 7) % len(SYMBOLS)]
+            account.buy(symbol, shares=Decimal(10), amount=1000, trade_date=TRADE_DATE)
+
+    return portfolio
+
+
+def dense_volatility(risk_model: RiskModel, portfolio: Portfolio, quotes) -> None:
+    matrix = risk_model.covariance
+    n = len(matrix)
+
+    for account in portfolio.accounts.values():
+        amounts = account.get_balances().get_amounts(quotes, None, 'USD')
+        total = float(sum(amounts.values()))
+        weights = [0.0] * n
+
+        for asset, amount in amounts.items():
+            if isinstance(asset, Security):
+                weights[risk_model.security_ids[asset.symbol]] += float(amount) / total
+
+        sqrt(sum(weights[i] * sum(weights[j] * matrix[i][j] for j in range(n)) for i in range(n)))
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'prices.csv')
+        write_prices(path)
+        portfolio = make_portfolio(accounts)
+        quotes = {Security(symbol): (Decimal(100), Currency('USD')) for symbol in SYMBOLS}
+        model = ModelPortfolio('model', {Security(symbol): Decimal('0.2') for symbol in SYMBOLS[:HOLDINGS]})
+        account_models = {account_id: model for account_id in portfolio.accounts}
+        risk_model = RiskModel(PriceHistory(path))
+
+        start = time.perf_counter()
+        risk_model.covariance
+        print(f'covariance ({len(SYMBOLS)} symbols, {DAYS} days): {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        risk_model.run(portfolio, quotes, account_models=account_models)
+        print(f'risk, {accounts} accounts: {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        dense_volatility(risk_model, portfolio, quotes)
+        print(f'dense volatility, {accounts} accounts: {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# Compares the binary format against pickle and JSON for size and speed.
+#
+#   pdm run python benchmarks/serialization.py [accounts] [trades]
+
+import io
+import json
+import pickle
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.entry import OpenAccount, Transaction
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.serialization import Decoder, dump_portfolio, load_portfolio
+
+
+TRADE_DATE = date(2022, 1, 3)
+SYMBOLS = ['VTI', 'VEA', 'VWO', 'VIG', 'VTEB', 'BND']
+
+
+def make_portfolio(accounts: int, trades: int) -> Portfolio:
+    portfolio = Portfolio()
+
+    for i in range(accounts):
+        account = portfolio.open_account(f'account-{i}', create_date=TRADE_DATE)
+        account.deposit(100000, transfer_date=TRADE_DATE)
+
+        for j in range(trades):
+            account.buy(
+                symbol=SYMBOLS[j % len(SYMBOLS)],
+                shares=Decimal('1.2345'),
+                amount=Decimal('250.17'),
+                fees=Decimal('0.35'),
+                trade_date=TRADE_DATE,
+            )
+
+    return portfolio
+
+
+def to_json(portfolio: Portfolio) -> str:
+    def encode_entry(entry):
+        if isinstance(entry, OpenAccount):
+            return ['open', entry.entry_date.isoformat(), entry.account_id, entry.account_type.value]
+
+        assert isinstance(entry, Transaction)
+        return ['tx', entry.entry_date.isoformat(), [
+            [
+                leg.account_id,
+                leg.subaccount_id,
+                type(leg.asset_type).__name__,
+                leg.asset_type.symbol,
+                getattr(leg.asset_type, 'lot', None),
+                str(leg.quantity),
+                [str(leg.cost[0]), leg.cost[1].symbol] if leg.cost else None,
+            ]
+            for leg in entry.legs
+        ]]
+
+    return json.dumps([encode_entry(entry) for entry in portfolio.ledger.entries])
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    trades = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    portfolio = make_portfolio(accounts, trades)
+    print(f'{len(portfolio.ledger.entries)} entries')
+
+    binary = io.BytesIO()
+    binary_encode = timed(lambda: dump_portfolio(portfolio, binary))
+    binary_decode = timed(lambda: list(Decoder(io.BytesIO(binary.getvalue()))))
+    binary_load = timed(lambda: load_portfolio(io.BytesIO(binary.getvalue())))
+
+    pickled = b''
+
+    def pickle_encode() -> None:
+        nonlocal pickled
+        pickled = pickle.dumps(portfolio.ledger.entries, protocol=pickle.HIGHEST_PROTOCOL)
+
+    pickle_encode_time = timed(pickle_encode)
+    pickle_decode_time = timed(lambda: pickle.loads(pickled))
+
+    encoded_json = ''
+
+    def json_encode() -> None:
+        nonlocal encoded_json
+        encoded_json = to_json(portfolio)
+
+    json_encode_time = timed(json_encode)
+    json_decode_time = timed(lambda: json.loads(encoded_json))
+
+    print(f'{"format":<8} {"bytes":>12} {"encode":>9} {"decode":>9}')
+    print(f'{"binary":<8} {len(binary.getvalue()):>12,} {binary_encode:>8.3f}s {binary_decode:>8.3f}s')
+    print(f'{"pickle":<8} {len(pickled):>12,} {pickle_encode_time:>8.3f}s {pickle_decode_time:>8.3f}s')
+    print(f'{"json":<8} {len(encoded_json):>12,} {json_encode_time:>8.3f}s {json_decode_time:>8.3f}s')
+    print(f'Rebuilding the portfolio from the binary format takes {binary_load:.3f}s.')
+
+
+if __name__ == '__main__':
+    main()
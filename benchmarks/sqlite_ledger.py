@@ -0,0 +1,97 @@
+# Compares the in-memory Ledger with SqliteLedger: recording, current and
+# point-in-time balances, and an account's activity for a month.
+#
+#   pdm run python benchmarks/sqlite_ledger.py [entries] [accounts]
+#
+# The defaults write 1M entries; pass 10000000 for the 10M run. The SQLite
+# database is written to a temporary directory.
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from datetime import date, timedelta
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger, SqliteLedger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.portfolio.account import Account, EXTERNAL_BANK_ID
+from openroboadvisor.ledger.entry import OpenAccount
+
+
+START_DATE = date(2022, 1, 3)
+SYMBOLS = ['VTI', 'VEA', 'VWO', 'VIG', 'VTEB']
+
+
+def populate(ledger: Ledger, entries: int, account_count: int) -> None:
+    ledger.record(
+        OpenAccount(account_id=EXTERNAL_BANK_ID, account_type=AccountType.CHECKING, entry_date=START_DATE),
+        *[
+            OpenAccount(account_id=f'account-{i}', account_type=AccountType.BROKERAGE, entry_date=START_DATE)
+            for i in range(account_count)
+        ],
+    )
+    accounts = [Account(f'account-{i}', ledger) for i in range(account_count)]
+    day = 0
+    # Templated writes to SQLite are committed one by one unless batched
+    batch = ledger.batch() if isinstance(ledger, SqliteLedger) else nullcontext()
+
+    # A deposit writes two entries and a buy three
+    with batch:
+        while len(ledger.entries) < entries:
+            trade_date = START_DATE + timedelta(days=day)
+
+            for i, account in enumerate(accounts):
+                account.deposit(1000, transfer_date=trade_date)
+                account.buy(
+                    SYMBOLS[(i + day) % len(SYMBOLS)],
+                    shares=Decimal('4.5177'),
+                    amount=1000,
+                    fees=Decimal('0.95'),
+                    trade_date=trade_date,
+                )
+
+            day += 1
+
+
+def timed(name: str, run) -> None:
+    start = time.perf_counter()
+    result = run()
+    print(f'  {name:<24} {time.perf_counter() - start:8.3f}s', end='')
+    print(f'  ({result})' if result is not None else '')
+
+
+def bench(ledger: Ledger, entries: int, account_count: int) -> None:
+    as_of = START_DATE + timedelta(days=7)
+    sample = [f'account-{i}' for i in range(0, account_count, max(1, account_count // 100))]
+
+    timed('record', lambda: populate(ledger, entries, account_count) or f'{len(ledger.entries):,} entries')
+
+    if isinstance(ledger, SqliteLedger):
+        # Start from a cold account cache, as a freshly opened ledger would
+        ledger.accounts.cache.clear()
+        ledger.generation += 1
+
+    timed('balances (100 accounts)', lambda: [ledger.get_account(account_id) for account_id in sample] and None)
+    timed('as of (100 accounts)', lambda: [ledger.get_account_at(account_id, as_of) for account_id in sample] and None)
+    timed('month of activity', lambda: f"{len(ledger.query(account_id=sample[-1], start_date=START_DATE, end_date=START_DATE + timedelta(days=30))):,} entries")
+
+
+def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    account_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    print('Ledger')
+    bench(Ledger(trust_balanced=True), entries, account_count)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ledger.db')
+        ledger = SqliteLedger(path, trust_balanced=True)
+        print('SqliteLedger')
+        bench(ledger, entries, account_count)
+        ledger.close()
+        print(f'  {"database size":<24} {os.path.getsize(path) / 1024 / 1024:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,136 +1,209 @@
+from .asset_class_model import AssetClassModel, UNCLASSIFIED
 from .base_advisor import BaseAdvisor
+from .model_portfolio import ModelPortfolio
+from .rounding import round_suggestions
 from .suggestion import Buy, Sell, Suggestion
+from .wash_sale import WashSaleGuard
 from decimal import Decimal
-from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.asset import AssetType
 from openroboadvisor.portfolio import Portfolio
-from openroboadvisor.portfolio.account import Account, Balances
-from typing import List
+from openroboadvisor.portfolio.account import Balances
+from openroboadvisor.portfolio.fx import FxRates, Quote
+from typing import List, Tuple, cast
+
+
+# (asset, quantity, amount) for a single holding
+Holding = Tuple[AssetType, Decimal, Decimal]
+
 
 class AssetClassAdvisor(BaseAdvisor):
     def __init__(
         self,
         portfolio: Portfolio,
-        preferred_assets: List[AssetType],
+        preferred_assets: List[AssetType] | None = None,
         # TODO should we have a AssetClassProvider instead of a dict?
-        asset_classes: dict[AssetType, str],
-        account_targets: dict[str, dict[str, Decimal]],
+        asset_classes: dict[AssetType, str] | None = None,
+        account_targets: dict[str, dict[str, Decimal]] | None = None,
         # TODO should we have a QuoteProvider instead of a dict?
-        quotes: dict[AssetType, Decimal],
+        quotes: dict[AssetType, Quote] | None = None,
+        model: AssetClassModel | None = None,
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+        # Round suggestions to multiples of this many shares
+        share_increment: Decimal | int | None = None,
+        models: List[ModelPortfolio[str]] | None = None,
+        # account id -> model id
+        account_models: dict[str, str] | None = None,
+        wash_sale_guard: WashSaleGuard | None = None,
     ) -> None:
+        assert quotes is not None, "AssetClassAdvisor requires quotes"
+        assert model or (
+            preferred_assets is not None and
+            asset_classes is not None and
+            (account_targets is not None or account_models is not None)
+        ), "AssetClassAdvisor requires either a model or its asset classes, preferred assets and targets"
+
         self.portfolio = portfolio
         self.asset_classes = asset_classes
         self.account_targets = account_targets
         self.quotes = quotes
         self.preferred_assets = preferred_assets
-        # TODO assert self.account_targets = 100%
+        self.fx = fx
+        self.currency = currency
+        self.share_increment = share_increment
+        self.wash_sale_guard = wash_sale_guard
+        # Cash left over after rounding, by account id
+        self.leftover_cash: dict[str, Decimal] = {}
+        self.model = model or AssetClassModel(
+            preferred_assets=preferred_assets or [],
+            asset_classes=asset_classes or {},
+            account_targets=account_targets,
+            models=models,
+            account_models=account_models,
+        )
 
     def get_account_suggestions(self, account_id: str) -> List[Suggestion]:
         account = self.portfolio.accounts.get(account_id)
         assert account, f"Unable to find account (account_id={account_id})"
 
-        targets = self.account_targets.get(account_id)
+        targets = self.model.account_targets.get(account_id)
         assert targets, f"Unable to find targets (account_id={account_id})"
 
         balances = account.get_balances()
+        holdings = self._group_holdings(balances, balances.get_amounts(self.quotes, self.fx, self.currency))
         asset_class_imbalances = self._calculate_asset_class_imbalances(
-            balances,
+            balances.total(self.quotes, self.fx, self.currency),
+            holdings,
             targets
         )
 
-        return self._calculate_suggestions(
-            balances,
+        suggestions = self._calculate_suggestions(
+            account_id,
+            holdings,
             asset_class_imbalances
         )
 
-    def _calculate_asset_class_imbalances(
+        if self.wash_sale_guard is not None:
+            suggestions = self.wash_sale_guard.filter(account_id, suggestions, self.quotes, self.currency)
+
+        if self.share_increment is not None:
+            suggestions, self.leftover_cash[account_id] = round_suggestions(
+                suggestions,
+                self.quotes,
+                share_increment=self.share_increment,
+                positions=balances.securities,
+                fx=self.fx,
+                currency=self.currency,
+            )
+
+        return suggestions
+
+    def _calculate_drift(
+        self,
+        account_id: str,
+        balances: Balances,
+        amounts: dict[AssetType, Decimal],
+        total_balance: Decimal,
+    ) -> Decimal:
+        targets = self.model.account_targets.get(account_id)
+        assert targets, f"Unable to find targets (account_id={account_id})"
+
+        holdings = self._group_holdings(balances, amounts)
+        imbalances = self._calculate_asset_class_imbalances(total_balance, holdings, targets)
+        # Unclassified holdings are always sold in full
+        to_trade = sum((abs(imbalance) for _, imbalance in imbalances), Decimal(0)) + \
+            sum((amount for _, _, amount in holdings[UNCLASSIFIED]), Decimal(0))
+
+        return to_trade / 2 / total_balance
+
+    def _group_holdings(
         self,
         balances: Balances,
-        targets: dict[str, Decimal],
-    ) -> dict[str, Decimal]:
-        total_account_balance = balances.total(self.quotes)
-        assets = balances.cash | balances.securities
-        asset_class_values: dict[str, Decimal] = {}
-        asset_class_imbalances: dict[str, Decimal] = {}
-
-        for asset, quantity in assets.items():
-            quote = self.quotes.get(asset)
-            # TODO assert quote
-            asset_class = self.asset_classes.get(asset)
-
-            if asset_class:
-                additional_value = quote * quantity
-                current_value = asset_class_values.get(asset_class, Decimal(0))
-                asset_class_values[asset_class] = current_value + additional_value
-
-        for asset_class, target_percent in targets.items():
-            asset_class_imbalances[asset_class] = (
-                (target_percent * total_account_balance) - asset_class_values.get(asset_class, 0)
+        amounts: dict[AssetType, Decimal],
+    ) -> List[List[Holding]]:
+        # Holdings grouped by class id; unclassified holdings go in the last slot
+        model = self.model
+        holdings: List[List[Holding]] = [[] for _ in range(len(model.class_names) + 1)]
+
+        quantities = balances.cash | balances.securities
+
+        for asset, quantity in quantities.items():
+            holdings[model.class_id(asset)].append(
+                (asset, quantity, amounts[asset])
             )
 
+        return holdings
+
+    def _calculate_asset_class_imbalances(
+        self,
+        total_account_balance: Decimal,
+        holdings: List[List[Holding]],
+        targets: List[Tuple[int, Decimal]],
+    ) -> List[Tuple[int, Decimal]]:
+        asset_class_imbalances = []
+
+        for class_id, target_percent in targets:
+            current_value = Decimal(0)
+
+            for _, _, amount in holdings[class_id]:
+                current_value += amount
+
+            asset_class_imbalances.append((
+                class_id,
+                (target_percent * total_account_balance) - current_value,
+            ))
+
         return asset_class_imbalances
 
     def _calculate_suggestions(
         self,
-        balances: Balances,
-        asset_class_imbalances: dict[str, Decimal]
+        account_id: str,
+        holdings: List[List[Holding]],
+        asset_class_imbalances: List[Tuple[int, Decimal]],
     ) -> List[Suggestion]:
-        classes_for_preferred_assets = {self.asset_classes.get(a): a for a in self.preferred_assets}
-        assets = balances.cash | balances.securities
-        suggestions = []
+        suggestions: List[Suggestion] = []
 
-        for asset_class, imbalance_amount in asset_class_imbalances.items():
-            preferred_asset = classes_for_preferred_assets.get(asset_class)
-            # TODO assert preferred_asset
+        for class_id, imbalance_amount in asset_class_imbalances:
+            # Checked when the model was compiled for classes it buys into
+            preferred_asset = cast(AssetType, self.model.preferred_assets[class_id])
 
             if imbalance_amount > 0:
                 suggestions.append(Buy(preferred_asset, imbalance_amount))
             else:
-                #remaining_imbalance = imbalance_amount
                 suggestions.extend(
                     self._calculate_assets_to_sell(
-                        balances,
+                        account_id,
+                        holdings[class_id],
                         preferred_asset,
-                        asset_class,
                         imbalance_amount
                     )
                 )
 
-                #suggestions.append(Sell(preferred_asset, -imbalance_amount))
-
-        for asset, quantity in assets.items():
-            asset_without_lot = asset.without_lot() if isinstance(asset, Security) else asset
-            if asset_without_lot not in self.asset_classes:
-                quote = self.quotes.get(asset_without_lot)
-                # TODO assert quote
-                suggestions.append(Sell(asset, quote * quantity))
+        for asset, _, amount in holdings[UNCLASSIFIED]:
+            suggestions.append(Sell(asset, amount))
 
         return suggestions
 
     def _calculate_assets_to_sell(
         self,
-        balances: Balances,
+        account_id: str,
+        class_holdings: List[Holding],
         preferred_asset: AssetType,
-        preferred_asset_class: str,
         imbalance_amount: Decimal,
     ) -> List[Sell]:
         suggestions = []
+        guard = self.wash_sale_guard
         remaining_imbalance = abs(imbalance_amount)
-        asset_amounts = (
-            balances.get_asset_amounts(Currency, self.quotes) |
-            balances.get_asset_amounts(Security, self.quotes)
-        )
+        preferred_amount = None
 
-        # Remove assets that aren't in the class we are looking at
-        def asset_filter(asset_and_amount: (AssetType, Decimal)) -> bool:
-            asset = asset_and_amount[0]
-            asset_class = self.asset_classes.get(asset)
-            # Exclude preferred asset so we can force it to the end after sorting
-            return asset != preferred_asset and asset_class == preferred_asset_class
+        # Exclude preferred asset so we can force it to the end after sorting
+        assets_with_same_class = []
 
-        assets_with_same_class = list(filter(
-            asset_filter,
-            asset_amounts.items())
-        )
+        for asset, _, amount in class_holdings:
+            if asset == preferred_asset:
+                preferred_amount = amount
+            else:
+                assets_with_same_class.append((asset, amount))
 
         # Sort by amount (low to high) to sell off smallest holdings first
         sorted_assets = sorted(
@@ -139,12 +212,20 @@ class AssetClassAdvisor(BaseAdvisor):
         )
 
         # Force preferred asset to be the last asset sold
-        sorted_assets.append((preferred_asset, asset_amounts.get(preferred_asset)))
+        if preferred_amount is not None:
+            sorted_assets.append((preferred_asset, preferred_amount))
 
         for asset, amount in sorted_assets:
             sell_amount = min(amount, remaining_imbalance)
+            sell = Sell(asset, sell_amount)
+
+            # Sell the next holding in the class instead of making a wash sale
+            if guard is not None and guard.is_wash_sale(account_id, sell, self.quotes, self.currency):
+                guard.blocked.append((account_id, sell))
+                continue
+
             remaining_imbalance -= sell_amount
-            suggestions.append(Sell(asset, sell_amount))
+            suggestions.append(sell)
 
             if remaining_imbalance <= 0:
                 break
@@ -0,0 +1,121 @@
+from .model_portfolio import ModelPortfolio, get_account_models
+from decimal import Decimal
+from openroboadvisor.ledger.asset import AssetType, Security
+from typing import Iterable, List, Tuple
+
+
+UNCLASSIFIED = -1
+
+
+# Compiled asset classes, preferred assets and targets. Only plain containers
+# are used so a model can be pickled and reused across runs and processes.
+# Targets are compiled once per model portfolio, and accounts on the same
+# model share the compiled list. Lookups never change the model, so it can be
+# shared between advisors and threads; assets it wasn't built with are
+# unclassified.
+class AssetClassModel:
+    def __init__(
+        self,
+        preferred_assets: List[AssetType],
+        asset_classes: dict[AssetType, str],
+        account_targets: dict[str, dict[str, Decimal]] | None = None,
+        models: List[ModelPortfolio[str]] | None = None,
+        # account id -> model id
+        account_models: dict[str, str] | None = None,
+    ) -> None:
+        self.class_names: List[str] = []
+        self.class_ids: dict[str, int] = {}
+        self.assets: List[AssetType] = []
+        self.asset_ids: dict[AssetType, int] = {}
+        # asset id -> class id
+        self.asset_class_ids: List[int] = []
+        # class id -> preferred asset
+        self.preferred_assets: List[AssetType | None] = []
+        # model id -> [(class id, target percent)], in target order
+        self.model_targets: dict[str, List[Tuple[int, Decimal]]] = {}
+        # account id -> its model's targets
+        self.account_targets: dict[str, List[Tuple[int, Decimal]]] = {}
+        # Holding (possibly with a lot) -> asset id, for the assets above and
+        # the holdings registered with add_holdings
+        self.holding_ids: dict[AssetType, int] = {}
+
+        for asset, asset_class in asset_classes.items():
+            self._add_asset(asset, self._add_class(asset_class))
+
+        for asset in preferred_assets:
+            asset_id = self._add_asset(asset, UNCLASSIFIED)
+            class_id = self.asset_class_ids[asset_id]
+
+            if class_id != UNCLASSIFIED:
+                self.preferred_assets[class_id] = asset
+
+        # id(model) -> compiled targets; ids are only unique among live models
+        compiled: dict[int, List[Tuple[int, Decimal]]] = {}
+
+        for account_id, model in get_account_models(account_targets, models, account_models).items():
+            targets = compiled.get(id(model))
+
+            if targets is None:
+                targets = compiled[id(model)] = self.model_targets[model.model_id] = self._compile_targets(model)
+
+            self.account_targets[account_id] = targets
+
+    # Registers lots of the model's securities up front, so looking them up
+    # doesn't have to strip the lot first.
+    def add_holdings(self, holdings: Iterable[AssetType]) -> None:
+        for asset in holdings:
+            if asset not in self.holding_ids and isinstance(asset, Security) and asset.lot is not None:
+                asset_id = self.asset_ids.get(asset.without_lot())
+
+                if asset_id is not None:
+                    self.holding_ids[asset] = asset_id
+
+    # None for assets the model wasn't built with.
+    def asset_id(self, asset: AssetType) -> int | None:
+        asset_id = self.holding_ids.get(asset)
+
+        if asset_id is None and isinstance(asset, Security) and asset.lot is not None:
+            asset_id = self.asset_ids.get(asset.without_lot())
+
+        return asset_id
+
+    def class_id(self, asset: AssetType) -> int:
+        asset_id = self.asset_id(asset)
+        return UNCLASSIFIED if asset_id is None else self.asset_class_ids[asset_id]
+
+    # Every class the model buys into needs a preferred asset to buy.
+    def _compile_targets(self, model: ModelPortfolio[str]) -> List[Tuple[int, Decimal]]:
+        targets = []
+
+        for asset_class, target_percent in zip(model.keys, model.weights):
+            class_id = self._add_class(asset_class)
+            assert not target_percent or self.preferred_assets[class_id] is not None, (
+                "Unable to find preferred asset "
+                f"(model_id={model.model_id}, asset_class={asset_class})"
+            )
+            targets.append((class_id, target_percent))
+
+        return targets
+
+    def _add_class(self, asset_class: str) -> int:
+        class_id = self.class_ids.get(asset_class)
+
+        if class_id is None:
+            class_id = len(self.class_names)
+            self.class_ids[asset_class] = class_id
+            self.class_names.append(asset_class)
+            self.preferred_assets.append(None)
+
+        return class_id
+
+    def _add_asset(self, asset: AssetType, class_id: int) -> int:
+        asset_id = self.asset_ids.get(asset)
+
+        if asset_id is None:
+            asset_id = len(self.assets)
+            self.asset_ids[asset] = asset_id
+            self.holding_ids[asset] = asset_id
+            self.assets.append(asset)
+            self.asset_class_ids.append(class_id)
+
+        return asset_id
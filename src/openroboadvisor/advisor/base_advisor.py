@@ -1,10 +1,25 @@
 from .suggestion import Suggestion
 from abc import ABC, abstractmethod
+from decimal import Decimal
+from openroboadvisor.ledger.asset import AssetType
 from openroboadvisor.portfolio import Portfolio
-from typing import List
+from openroboadvisor.portfolio.account import Balances
+from openroboadvisor.portfolio.fx import FxRates, Quote
+from typing import List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .wash_sale import WashSaleGuard
 
 
 class BaseAdvisor(ABC):
+    # Set by advisors that keep their suggestions clear of wash sales
+    wash_sale_guard: 'WashSaleGuard | None' = None
+    # What balances are valued with. Quotes are held by reference, so whoever
+    # owns them (a backtest, say) can update them in place between runs.
+    quotes: dict[AssetType, Quote]
+    fx: FxRates | None = None
+    currency: str = 'USD'
+
     def __init__(
         self,
         portfolio: Portfolio,
@@ -12,7 +27,10 @@ class BaseAdvisor(ABC):
         self.portfolio = portfolio
 
     def get_suggestions(self) -> dict[str, List[Suggestion]]:
-        suggestions = {}
+        suggestions: dict[str, List[Suggestion]] = {}
+
+        if self.wash_sale_guard is not None:
+            self.wash_sale_guard.start_batch()
 
         for account_id in self.portfolio.accounts.keys():
             suggestions.setdefault(account_id, []).extend(
@@ -24,3 +42,38 @@ class BaseAdvisor(ABC):
     @abstractmethod
     def get_account_suggestions(self, account_id: str) -> List[Suggestion]:
         raise NotImplementedError
+
+    # The share of the account's value that has to be traded to bring it back
+    # to its targets: half the sum of every buy and sell it would take.
+    def get_account_drift(self, account_id: str) -> Decimal:
+        return self.get_account_score(account_id)[0]
+
+    # The account's drift and the share of its value that is cash, both taken
+    # from a single valuation of its balances
+    def get_account_score(self, account_id: str) -> Tuple[Decimal, Decimal]:
+        account = self.portfolio.accounts.get(account_id)
+        assert account, f"Unable to find account (account_id={account_id})"
+
+        balances = account.get_balances()
+        amounts = balances.get_amounts(self.quotes, self.fx, self.currency)
+        total_balance = sum(amounts.values(), Decimal(0))
+
+        if total_balance <= 0:
+            return Decimal(0), Decimal(0)
+
+        cash = sum((amounts[asset] for asset in balances.cash), Decimal(0))
+        drift = self._calculate_drift(account_id, balances, amounts, total_balance)
+
+        return drift, cash / total_balance
+
+    # By default drift is read off the account's suggestions; advisors that
+    # can tell from the valuation without building them should override this.
+    def _calculate_drift(
+        self,
+        account_id: str,
+        balances: Balances,
+        amounts: dict[AssetType, Decimal],
+        total_balance: Decimal,
+    ) -> Decimal:
+        suggestions = self.get_account_suggestions(account_id)
+        return sum((abs(suggestion.amount) for suggestion in suggestions), Decimal(0)) / 2 / total_balance
@@ -0,0 +1,65 @@
+from .suggestion import Buy, Suggestion
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.asset import AssetType, Security
+from openroboadvisor.ledger.entry import Entry
+from openroboadvisor.portfolio.account import Account
+from typing import List
+
+
+def suggestion_entries(
+    account: Account,
+    suggestions: List[Suggestion],
+    quotes: dict[AssetType, Decimal],
+    fees: Decimal | int = 0,
+    currency: str = 'USD',
+    trade_date: date | None = None,
+) -> List[Entry]:
+    entries: List[Entry] = []
+
+    # Sell first so the proceeds are available to the buys.
+    for suggestion in sorted(suggestions, key=lambda s: isinstance(s, Buy)):
+        asset = suggestion.asset_type
+
+        # Cash is whatever is left over once the trades are made.
+        if not isinstance(asset, Security) or not suggestion.amount:
+            continue
+
+        shares = suggestion.shares
+
+        if shares is None:
+            quote = quotes.get(asset.without_lot())
+            assert quote, f"Unable to find quote (asset={asset})"
+            shares = suggestion.amount / quote
+
+        trade_entries = account.buy_entries if isinstance(suggestion, Buy) else account.sell_entries
+
+        entries.extend(trade_entries(
+            symbol=asset.symbol,
+            shares=shares,
+            amount=suggestion.amount,
+            fees=fees,
+            currency=currency,
+            trade_date=trade_date,
+            lot=asset.lot,
+        ))
+
+    return entries
+
+
+def apply_suggestions(
+    account: Account,
+    suggestions: List[Suggestion],
+    quotes: dict[AssetType, Decimal],
+    fees: Decimal | int = 0,
+    currency: str = 'USD',
+    trade_date: date | None = None,
+) -> None:
+    account.ledger.record(*suggestion_entries(
+        account=account,
+        suggestions=suggestions,
+        quotes=quotes,
+        fees=fees,
+        currency=currency,
+        trade_date=trade_date,
+    ))
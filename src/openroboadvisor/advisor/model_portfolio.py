@@ -0,0 +1,85 @@
+from decimal import Decimal
+from typing import Generic, Hashable, List, TypeVar
+
+
+# How far a model's targets may be from adding up to 100%, so weights like
+# thirds can be written out to a reasonable number of places.
+TARGET_TOLERANCE = Decimal('0.000001')
+
+# Models made from an account's own targets are named after the account, in
+# a namespace of their own so they can't collide with named models.
+ACCOUNT_MODEL_PREFIX = '__account:'
+
+# An asset for SimpleAdvisor, or an asset class name for AssetClassAdvisor
+Target = TypeVar('Target', bound=Hashable)
+
+
+# A named set of target weights followed by any number of accounts. Targets
+# are validated once, when the model is created, and compiled into parallel
+# lists of targets and weights (in the order they were given) that every
+# account on the model shares.
+class ModelPortfolio(Generic[Target]):
+    def __init__(
+        self,
+        model_id: str,
+        targets: dict[Target, Decimal],
+    ) -> None:
+        total = Decimal(0)
+
+        for target, weight in targets.items():
+            assert weight >= 0, (
+                "Model targets can't be negative "
+                f"(model_id='{model_id}', target={target}, weight={weight})"
+            )
+            total += weight
+
+        assert abs(total - 1) <= TARGET_TOLERANCE, (
+            f"Model targets must add up to 100% (model_id='{model_id}', total={total})"
+        )
+
+        self.model_id = model_id
+        self.targets: dict[Target, Decimal] = dict(targets)
+        self.keys: List[Target] = list(targets)
+        self.weights: List[Decimal] = list(targets.values())
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(model_id={repr(self.model_id)}, targets={repr(self.targets)})'
+
+
+# The model each account follows. Accounts can reference a model by id
+# (account_models), or be given their own targets (account_targets); every
+# account given the same targets dict shares one model, named after the first
+# of those accounts, so the targets are only validated and compiled once.
+# Model ids are unique across both.
+def get_account_models(
+    account_targets: dict[str, dict[Target, Decimal]] | None = None,
+    models: List[ModelPortfolio[Target]] | None = None,
+    account_models: dict[str, str] | None = None,
+) -> dict[str, ModelPortfolio[Target]]:
+    resolved: dict[str, ModelPortfolio[Target]] = {}
+    models_by_id: dict[str, ModelPortfolio[Target]] = {}
+
+    for model in models or []:
+        assert model.model_id not in models_by_id, f"Duplicate model id (model_id={model.model_id})"
+        models_by_id[model.model_id] = model
+
+    # id(targets) -> model
+    shared: dict[int, ModelPortfolio[Target]] = {}
+
+    for account_id, targets in (account_targets or {}).items():
+        account_model = shared.get(id(targets))
+
+        if account_model is None:
+            assert targets, f"Unable to find targets (account_id={account_id})"
+            model_id = ACCOUNT_MODEL_PREFIX + account_id
+            assert model_id not in models_by_id, f"Duplicate model id (model_id={model_id})"
+            account_model = shared[id(targets)] = ModelPortfolio(model_id, targets)
+
+        resolved[account_id] = account_model
+
+    for account_id, model_id in (account_models or {}).items():
+        named_model = models_by_id.get(model_id)
+        assert named_model, f"Unable to find model (account_id={account_id}, model_id={model_id})"
+        resolved[account_id] = named_model
+
+    return resolved
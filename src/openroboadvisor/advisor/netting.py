@@ -0,0 +1,276 @@
+from .suggestion import Buy, Sell, Suggestion
+from datetime import date
+from decimal import Decimal, ROUND_DOWN
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import Entry
+from openroboadvisor.portfolio import Portfolio
+from typing import Any, List, Tuple
+
+
+# (account id, suggested asset, suggested amount)
+Request = Tuple[str, AssetType, Decimal]
+
+
+# The net order for a security across the book. Buys and sells in the same
+# security are crossed against each other internally and only the remainder
+# is sent to the market; both are rounded to whole share increments.
+class BlockOrder:
+    __slots__ = ('asset_type', 'quote', 'buy_amount', 'sell_amount', 'crossed_shares', 'shares', 'amount')
+
+    def __init__(
+        self,
+        asset_type: AssetType,
+        quote: Decimal,
+        buy_amount: Decimal,
+        sell_amount: Decimal,
+        crossed_shares: Decimal,
+        shares: Decimal,
+        amount: Decimal,
+    ) -> None:
+        self.asset_type = asset_type
+        self.quote = quote
+        self.buy_amount = buy_amount
+        self.sell_amount = sell_amount
+        self.crossed_shares = crossed_shares
+        # Signed: positive to buy, negative to sell
+        self.shares = shares
+        self.amount = amount
+
+    @property
+    def crossed_amount(self) -> Decimal:
+        return self.crossed_shares * self.quote
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(asset_type={repr(self.asset_type)}, '
+            f'shares={self.shares}, amount={self.amount}, crossed_amount={self.crossed_amount})'
+        )
+
+
+# The part of a block order allocated back to a single account.
+class Fill:
+    __slots__ = ('account_id', 'suggestion', 'shares', 'fees')
+
+    def __init__(
+        self,
+        account_id: str,
+        suggestion: Suggestion,
+        shares: Decimal,
+        fees: Decimal,
+    ) -> None:
+        self.account_id = account_id
+        self.suggestion = suggestion
+        self.shares = shares
+        self.fees = fees
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(account_id={repr(self.account_id)}, '
+            f'suggestion={repr(self.suggestion)}, shares={self.shares}, fees={self.fees})'
+        )
+
+
+class OrderBatcher:
+    def __init__(
+        self,
+        quotes: dict[AssetType, Decimal],
+        share_increment: Decimal | int = 1,
+        min_trade_amount: Decimal | int = 0,
+        fees: Decimal | int = 0,
+    ) -> None:
+        assert share_increment > 0, f"Share increment must be positive (share_increment={share_increment})"
+
+        self.quotes = quotes
+        self.share_increment = Decimal(share_increment)
+        self.min_trade_amount = Decimal(min_trade_amount)
+        # Charged once per block order sent to the market
+        self.fees = Decimal(fees)
+
+    def batch(
+        self,
+        suggestions: dict[str, List[Suggestion]],
+    ) -> Tuple[List[BlockOrder], List[Fill]]:
+        groups = self._group(suggestions)
+        orders = []
+        fills: List[Fill] = []
+
+        for security, (buys, sells, buy_amount, sell_amount) in groups.items():
+            quote = self.quotes.get(security)
+            assert quote, f"Unable to find quote (asset={security})"
+
+            order = self._make_order(security, quote, buy_amount, sell_amount)
+            orders.append(order)
+
+            # The side the market order is on shares the crossed shares and
+            # the market fill; the other side is filled entirely by crossing.
+            crossed_shares = order.crossed_shares
+            fees = self.fees if order.amount else Decimal(0)
+
+            if order.shares >= 0:
+                self._allocate(fills, Buy, buys, buy_amount, crossed_shares + order.shares, quote, fees)
+                self._allocate(fills, Sell, sells, sell_amount, crossed_shares, quote, Decimal(0))
+            else:
+                self._allocate(fills, Buy, buys, buy_amount, crossed_shares, quote, Decimal(0))
+                self._allocate(fills, Sell, sells, sell_amount, crossed_shares - order.shares, quote, fees)
+
+        return orders, fills
+
+    def _group(
+        self,
+        suggestions: dict[str, List[Suggestion]],
+    ) -> dict[AssetType, Tuple[List[Request], List[Request], Decimal, Decimal]]:
+        # Keyed by symbol, which is cheaper to hash than the asset and nets
+        # sells of individual lots with the whole security.
+        groups: dict[str, List[Any]] = {}
+
+        for account_id, account_suggestions in suggestions.items():
+            for suggestion in account_suggestions:
+                asset = suggestion.asset_type
+                amount = suggestion.amount
+
+                # Cash is whatever is left over once the trades are made.
+                if isinstance(asset, Currency) or not amount:
+                    continue
+
+                group = groups.get(asset.symbol)
+
+                if group is None:
+                    security = asset.without_lot() if isinstance(asset, Security) else asset
+                    group = groups[asset.symbol] = [security, [], [], Decimal(0), Decimal(0)]
+
+                if isinstance(suggestion, Buy):
+                    group[1].append((account_id, asset, amount))
+                    group[3] += amount
+                else:
+                    group[2].append((account_id, asset, amount))
+                    group[4] += amount
+
+        return {group[0]: tuple(group[1:]) for group in groups.values()}
+
+    def _make_order(
+        self,
+        security: AssetType,
+        quote: Decimal,
+        buy_amount: Decimal,
+        sell_amount: Decimal,
+    ) -> BlockOrder:
+        increment = self.share_increment
+        net_amount = buy_amount - sell_amount
+        # Round toward zero so neither the crossing nor the market order
+        # exceeds the requests
+        crossed_shares = (min(buy_amount, sell_amount) / quote / increment).to_integral_value(ROUND_DOWN) * increment
+        shares = (net_amount / quote / increment).to_integral_value(ROUND_DOWN) * increment
+        amount = shares * quote
+
+        if abs(amount) < self.min_trade_amount:
+            shares = amount = Decimal(0)
+
+        return BlockOrder(security, quote, buy_amount, sell_amount, crossed_shares, shares, amount)
+
+    # Splits the shares filled on one side of a block order between the
+    # accounts that asked for them, in whole share increments. Each account
+    # gets its pro rata share rounded down, and the increments left over go
+    # to the largest requests, one each. Fees follow the shares.
+    def _allocate(
+        self,
+        fills: List[Fill],
+        suggestion_type: type,
+        requests: List[Request],
+        requested_amount: Decimal,
+        filled_shares: Decimal,
+        quote: Decimal,
+        fees: Decimal,
+    ) -> None:
+        if not filled_shares:
+            return
+
+        increment = self.share_increment
+        filled_increments = int(filled_shares / increment)
+        ratio = filled_increments / requested_amount
+        allocated = [int(requested * ratio) for _, _, requested in requests]
+        residue = filled_increments - sum(allocated)
+
+        if residue:
+            largest = sorted(range(len(requests)), key=lambda i: requests[i][2], reverse=True)
+
+            for i in largest[:residue]:
+                allocated[i] += 1
+
+        remaining_fees = fees
+        last = max(i for i, increments in enumerate(allocated) if increments)
+
+        for i, (account_id, asset, _) in enumerate(requests):
+            increments = allocated[i]
+
+            if not increments:
+                continue
+
+            shares = increments * increment
+
+            if i == last:
+                account_fees = remaining_fees
+            else:
+                account_fees = fees * increments / filled_increments
+                remaining_fees -= account_fees
+
+            fills.append(Fill(account_id, suggestion_type(asset, shares * quote), shares, account_fees))
+
+
+def fill_entries(
+    portfolio: Portfolio,
+    fills: List[Fill],
+    currency: str = 'USD',
+    trade_date: date | None = None,
+) -> List[Entry]:
+    entries: List[Entry] = []
+    accounts = portfolio.accounts
+
+    # Sell first so the proceeds are available to the buys.
+    for fill in sorted(fills, key=lambda f: isinstance(f.suggestion, Buy)):
+        account = accounts.get(fill.account_id)
+        assert account, f"Unable to find account (account_id={fill.account_id})"
+
+        asset = fill.suggestion.asset_type
+        trade_entries = account.buy_entries if isinstance(fill.suggestion, Buy) else account.sell_entries
+
+        entries.extend(trade_entries(
+            symbol=asset.symbol,
+            shares=fill.shares,
+            amount=fill.suggestion.amount,
+            fees=fill.fees,
+            currency=currency,
+            trade_date=trade_date,
+            lot=getattr(asset, 'lot', None),
+        ))
+
+    return entries
+
+
+# Writes the fills straight into the ledger with the templated trade helpers,
+# which skip building and validating intermediate entries.
+def apply_fills(
+    portfolio: Portfolio,
+    fills: List[Fill],
+    currency: str = 'USD',
+    trade_date: date | None = None,
+) -> None:
+    accounts = portfolio.accounts
+    resolved_trade_date = trade_date or date.today()
+
+    # Sell first so the proceeds are available to the buys.
+    for fill in sorted(fills, key=lambda f: isinstance(f.suggestion, Buy)):
+        account = accounts.get(fill.account_id)
+        assert account, f"Unable to find account (account_id={fill.account_id})"
+
+        asset = fill.suggestion.asset_type
+        trade = account.buy if isinstance(fill.suggestion, Buy) else account.sell
+
+        trade(
+            symbol=asset.symbol,
+            shares=fill.shares,
+            amount=fill.suggestion.amount,
+            fees=fill.fees,
+            currency=currency,
+            trade_date=resolved_trade_date,
+            lot=getattr(asset, 'lot', None),
+        )
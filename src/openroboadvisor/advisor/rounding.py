@@ -0,0 +1,116 @@
+from .suggestion import Buy, Sell, Suggestion
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_EVEN
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio.fx import FxRates, Quote, get_price
+from typing import List, Tuple
+
+
+# Rounds an account's suggestions to multiples of share_increment, so pass
+# Decimal('0.001') for a broker that trades fractional shares.
+#
+# Sells are rounded to the nearest increment, and never to more than the
+# whole increments held when positions are given (so nothing is sold of a
+# security that isn't held); a sell of a security without a lot counts every
+# lot of it as held. Buys are rounded down, and the cash that frees up is
+# spent one increment at a time on the buys that are furthest below their
+# target. Any increment bought while it is below target lowers the total
+# drift, since the cash it uses was itself over target, so the pass stops
+# once nothing else is affordable.
+#
+# Returns the rounded suggestions, with shares set and amounts repriced, and
+# the cash left over compared to the original suggestions. Cash suggestions
+# are dropped: cash is whatever is left over once the trades are made.
+def round_suggestions(
+    suggestions: List[Suggestion],
+    quotes: dict[AssetType, Quote],
+    share_increment: Decimal | int = 1,
+    positions: dict[Security, Decimal] | None = None,
+    fx: FxRates | None = None,
+    currency: str = 'USD',
+) -> Tuple[List[Suggestion], Decimal]:
+    assert share_increment > 0, f"Share increment must be positive (share_increment={share_increment})"
+
+    increment = Decimal(share_increment)
+    reporting_currency = Currency(currency)
+    rates = fx.get_rates(reporting_currency) if fx else {reporting_currency: 1}
+    rounded: List[Suggestion] = []
+    # (asset, price, target amount) for every buy
+    buys: List[Tuple[AssetType, Decimal | int, Decimal]] = []
+    # Cash the rounded trades may use on top of what the suggestions planned
+    leftover_cash = Decimal(0)
+    held_positions: dict[AssetType, Decimal] = {}
+
+    for position, quantity in (positions or {}).items():
+        held_positions[position] = held_positions.get(position, Decimal(0)) + quantity
+
+        if position.lot is not None:
+            security = position.without_lot()
+            held_positions[security] = held_positions.get(security, Decimal(0)) + quantity
+
+    for suggestion in suggestions:
+        asset = suggestion.asset_type
+
+        if isinstance(asset, Currency) or not suggestion.amount:
+            continue
+
+        price, quote_currency = get_price(asset, quotes, reporting_currency)
+
+        if quote_currency != reporting_currency:
+            rate = rates.get(quote_currency)
+            assert rate, f"No FX conversion path (from_currency={quote_currency}, to_currency={reporting_currency})"
+            price = price * rate
+
+        if isinstance(suggestion, Buy):
+            leftover_cash += suggestion.amount
+            buys.append((asset, price, suggestion.amount))
+            continue
+
+        leftover_cash -= suggestion.amount
+        shares = (suggestion.amount / price / increment).to_integral_value(ROUND_HALF_EVEN) * increment
+        held = held_positions.get(asset, Decimal(0)) if positions is not None else None
+
+        if held is not None and shares > held:
+            shares = (held / increment).to_integral_value(ROUND_DOWN) * increment
+
+        if shares:
+            amount = shares * price
+            leftover_cash += amount
+            rounded.append(Sell(asset, amount, shares))
+
+    buy_shares = []
+
+    for asset, price, target in buys:
+        shares = (target / price / increment).to_integral_value(ROUND_DOWN) * increment
+        leftover_cash -= shares * price
+        buy_shares.append(shares)
+
+    # Remaining shortfall of every buy, largest first
+    shortfalls = sorted(
+        ((target - shares * price, i) for i, ((_, price, target), shares) in enumerate(zip(buys, buy_shares))),
+        reverse=True,
+    )
+
+    for shortfall, i in shortfalls:
+        cost = buys[i][1] * increment
+
+        if shortfall > 0 and cost <= leftover_cash:
+            buy_shares[i] += increment
+            leftover_cash -= cost
+
+    # Sells rounded down can leave too little cash for the buys; give back
+    # the increments that are closest to their targets first.
+    for shortfall, i in reversed(shortfalls):
+        if leftover_cash >= 0:
+            break
+
+        cost = buys[i][1] * increment
+
+        while buy_shares[i] and leftover_cash < 0:
+            buy_shares[i] -= increment
+            leftover_cash += cost
+
+    for (asset, price, _), shares in zip(buys, buy_shares):
+        if shares:
+            rounded.append(Buy(asset, shares * price, shares))
+
+    return rounded, leftover_cash
@@ -0,0 +1,167 @@
+import heapq
+import time
+from .base_advisor import BaseAdvisor
+from .suggestion import Suggestion
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from openroboadvisor.ledger.account import Subaccount
+from openroboadvisor.ledger.asset import AssetType
+from typing import Callable, List, Tuple
+
+
+# Rebalances accounts in order of urgency instead of in the order they were
+# opened. Accounts are kept in a priority queue scored by how far they have
+# drifted from their targets, how much of them is uninvested cash and how long
+# it's been since they were last rebalanced. Each run works from the top of
+# the queue until its time budget is spent; whatever is left is carried over
+# to the next run, where the wait counts toward its priority, so every account
+# that needs rebalancing is eventually reached even when a full pass doesn't
+# fit in a run.
+#
+# Accounts are only scored again when the ledger posts to them (or after a
+# call to refresh, e.g. when quotes move), so a run doesn't start with a pass
+# over the whole book. Scoring comes out of the same budget: accounts are
+# scored in chunks, in the order they changed, and those not reached are
+# scored on a later run. Accounts within the drift threshold leave the queue
+# until they change.
+class RebalanceScheduler:
+    def __init__(
+        self,
+        advisor: BaseAdvisor,
+        # Seconds per run, as measured by clock; None to drain the queue
+        budget: float | None = None,
+        # time.process_time to budget CPU time instead of wall time
+        clock: Callable[[], float] = time.perf_counter,
+        drift_threshold: Decimal | float = 0,
+        # Priority added per unit of the account that is cash
+        cash_weight: float = 1.0,
+        # Priority added per day since the account was last rebalanced
+        age_weight: float = 0.001,
+        # Accounts that have never been rebalanced count from this date
+        as_of: date | None = None,
+        # Accounts scored between reads of the clock
+        chunk_size: int = 64,
+    ) -> None:
+        assert budget is None or budget > 0, f"Budget must be positive (budget={budget})"
+        assert chunk_size > 0, f"Chunk size must be positive (chunk_size={chunk_size})"
+
+        self.advisor = advisor
+        self.budget = budget
+        self.clock = clock
+        self.drift_threshold = Decimal(drift_threshold)
+        self.cash_weight = cash_weight
+        self.age_weight = age_weight
+        self.chunk_size = chunk_size
+        self.start_ordinal = (as_of or date.today()).toordinal()
+        # account id -> ordinal of the date it was last rebalanced
+        self.last_rebalanced: dict[str, int] = {}
+        # (-priority, sequence, account id); entries whose sequence no longer
+        # matches the account's are stale and skipped
+        self.queue: List[Tuple[float, int, str]] = []
+        self.queued: dict[str, int] = {}
+        self.sequence = 0
+        # Accounts to score again, in the order they changed
+        self.dirty: dict[str, None] = dict.fromkeys(advisor.portfolio.accounts)
+
+        advisor.portfolio.ledger.add_post_listener(self.on_post)
+
+    def close(self) -> None:
+        self.advisor.portfolio.ledger.remove_post_listener(self.on_post)
+
+    # Accounts carried over to the next run
+    @property
+    def pending(self) -> int:
+        return len(self.queued)
+
+    def on_post(
+        self,
+        account_id: str,
+        subaccount: Subaccount,
+        asset_type: AssetType,
+        quantity: Decimal | int,
+        old_quantity: Decimal | int,
+    ) -> None:
+        self.dirty[account_id] = None
+
+    # Scores every account again on the next run
+    def refresh(self) -> None:
+        self.dirty.update(dict.fromkeys(self.advisor.portfolio.accounts))
+
+    # Time since the last rebalance is kept in the score as the negated date
+    # of that rebalance: every score grows by the same amount as days pass,
+    # so the order of the queue never has to be recomputed.
+    def get_priority(self, account_id: str, drift: Decimal, cash_share: Decimal) -> float:
+        last_rebalanced = self.last_rebalanced.get(account_id, self.start_ordinal)
+
+        return float(drift) + self.cash_weight * float(cash_share) - self.age_weight * last_rebalanced
+
+    # Scores dirty accounts until they run out or the budget is spent, and
+    # returns whether it was
+    def score(self, start: float) -> bool:
+        advisor = self.advisor
+        accounts = advisor.portfolio.accounts
+        dirty = self.dirty
+        queued = self.queued
+
+        while dirty:
+            chunk = list(islice(dirty, self.chunk_size))
+
+            for account_id in chunk:
+                del dirty[account_id]
+
+                # The ledger posts to accounts outside the portfolio, like the external bank
+                if account_id not in accounts:
+                    continue
+
+                drift, cash_share = advisor.get_account_score(account_id)
+
+                if drift <= self.drift_threshold:
+                    queued.pop(account_id, None)
+                    continue
+
+                self.sequence += 1
+                queued[account_id] = self.sequence
+                heapq.heappush(
+                    self.queue,
+                    (-self.get_priority(account_id, drift, cash_share), self.sequence, account_id),
+                )
+
+            if self.budget is not None and self.clock() - start >= self.budget:
+                return True
+
+        return False
+
+    def run(self, as_of: date | None = None) -> dict[str, List[Suggestion]]:
+        start = self.clock()
+        ordinal = (as_of or date.today()).toordinal()
+        advisor = self.advisor
+        queued = self.queued
+        spent = self.score(start)
+        queue = self.queue
+
+        if advisor.wash_sale_guard is not None:
+            advisor.wash_sale_guard.start_batch()
+
+        suggestions = {}
+
+        while queue:
+            _, sequence, account_id = heapq.heappop(queue)
+
+            if queued.get(account_id) != sequence:
+                continue
+
+            del queued[account_id]
+            suggestions[account_id] = advisor.get_account_suggestions(account_id)
+            self.last_rebalanced[account_id] = ordinal
+
+            # At least one account is rebalanced per run, however small the budget
+            if spent or self.budget is not None and self.clock() - start >= self.budget:
+                break
+
+        # Drop stale entries so the queue doesn't grow with every rescore
+        if len(queue) > 2 * len(queued) + 64:
+            self.queue = [entry for entry in queue if queued.get(entry[2]) == entry[1]]
+            heapq.heapify(self.queue)
+
+        return suggestions
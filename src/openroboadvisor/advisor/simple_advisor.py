@@ -1,53 +1,111 @@
 from .base_advisor import BaseAdvisor
+from .model_portfolio import ModelPortfolio, get_account_models
+from .rounding import round_suggestions
 from .suggestion import Buy, Sell, Suggestion
+from .wash_sale import WashSaleGuard
 from decimal import Decimal
-from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.asset import AssetType
 from openroboadvisor.portfolio import Portfolio
-from typing import List
+from openroboadvisor.portfolio.account import Balances
+from openroboadvisor.portfolio.fx import FxRates, Quote
+from typing import List, Tuple
 
 
 class SimpleAdvisor(BaseAdvisor):
     def __init__(
         self,
         portfolio: Portfolio,
-        account_targets: dict[str, dict[AssetType, Decimal]],
-        quotes: dict[AssetType, Decimal],
+        account_targets: dict[str, dict[AssetType, Decimal]] | None = None,
+        quotes: dict[AssetType, Quote] | None = None,
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+        # Round suggestions to multiples of this many shares
+        share_increment: Decimal | int | None = None,
+        models: List[ModelPortfolio[AssetType]] | None = None,
+        # account id -> model id
+        account_models: dict[str, str] | None = None,
+        wash_sale_guard: WashSaleGuard | None = None,
     ) -> None:
+        assert quotes is not None, "SimpleAdvisor requires quotes"
+
         super().__init__(
             portfolio=portfolio
         )
         self.portfolio = portfolio
-        self.account_targets = account_targets
+        self.account_models = get_account_models(account_targets, models, account_models)
         self.quotes = quotes
+        self.fx = fx
+        self.currency = currency
+        self.share_increment = share_increment
+        self.wash_sale_guard = wash_sale_guard
+        # Cash left over after rounding, by account id
+        self.leftover_cash: dict[str, Decimal] = {}
 
     def get_account_suggestions(self, account_id: str) -> List[Suggestion]:
-        suggestions = []
+        suggestions: List[Suggestion] = []
+        balances = self._get_balances(account_id)
+        imbalances = self._calculate_imbalances(
+            account_id,
+            balances.get_amounts(self.quotes, self.fx, self.currency),
+            balances.total(self.quotes, self.fx, self.currency),
+        )
+
+        for asset_type, imbalance in imbalances:
+            if imbalance > 0:
+                suggestions.append(Buy(asset_type, imbalance))
+            elif imbalance < 0:
+                suggestions.append(Sell(asset_type, -imbalance))
+
+        if self.wash_sale_guard is not None:
+            suggestions = self.wash_sale_guard.filter(account_id, suggestions, self.quotes, self.currency)
+
+        if self.share_increment is not None:
+            suggestions, self.leftover_cash[account_id] = round_suggestions(
+                suggestions,
+                self.quotes,
+                share_increment=self.share_increment,
+                positions=balances.securities,
+                fx=self.fx,
+                currency=self.currency,
+            )
+
+        return suggestions
+
+    def _calculate_drift(
+        self,
+        account_id: str,
+        balances: Balances,
+        amounts: dict[AssetType, Decimal],
+        total_balance: Decimal,
+    ) -> Decimal:
+        imbalances = self._calculate_imbalances(account_id, amounts, total_balance)
+        return sum((abs(imbalance) for _, imbalance in imbalances), Decimal(0)) / 2 / total_balance
+
+    def _get_balances(self, account_id: str) -> Balances:
         account = self.portfolio.accounts.get(account_id)
         assert account, f"Unable to find account (account_id={account_id})"
+        return account.get_balances()
 
-        targets = self.account_targets.get(account_id)
-        assert targets, f"Unable to find targets (account_id={account_id})"
+    # The amount to buy (positive) or sell (negative) of every asset the
+    # account holds or targets
+    def _calculate_imbalances(
+        self,
+        account_id: str,
+        asset_amounts: dict[AssetType, Decimal],
+        total_balance: Decimal,
+    ) -> List[Tuple[AssetType, Decimal]]:
+        model = self.account_models.get(account_id)
+        assert model, f"Unable to find targets (account_id={account_id})"
+        targets = model.targets
 
-        balances = account.get_balances()
-        total_balance = balances.total(self.quotes)
-        asset_amounts = (
-            balances.get_asset_amounts(Currency, self.quotes) |
-            balances.get_asset_amounts(Security, self.quotes)
-        )
+        imbalances = []
 
         for asset_type, current_amount in asset_amounts.items():
             target_percent = targets.get(asset_type, Decimal(0))
-            target_amount = total_balance * target_percent
-            imbalance = target_amount - current_amount
+            imbalances.append((asset_type, total_balance * target_percent - current_amount))
 
-            if imbalance > 0:
-                suggestions.append(Buy(asset_type, imbalance))
-            elif imbalance < 0:
-                suggestions.append(Sell(asset_type, -imbalance))
-
-        for asset_type, target_percent in targets.items():
+        for asset_type, target_percent in zip(model.keys, model.weights):
             if asset_type not in asset_amounts:
-                target_amount = total_balance * target_percent
-                suggestions.append(Buy(asset_type, target_amount))
+                imbalances.append((asset_type, total_balance * target_percent))
 
-        return suggestions
+        return imbalances
@@ -6,22 +6,32 @@ class Suggestion:
     def __init__(
         self,
         asset_type: AssetType,
-        amount: Decimal
+        amount: Decimal,
+        shares: Decimal | None = None,
     ) -> None:
         self.asset_type = asset_type
         self.amount = amount
+        # Set when the suggestion has been rounded to tradable shares
+        self.shares = shares
 
     def __eq__(self, another) -> None:
         return \
             isinstance(another, type(self)) and \
             self.asset_type == another.asset_type and \
-            self.amount == another.amount
+            self.amount == another.amount and \
+            self.shares == another.shares
 
     def __hash__(self) -> None:
-        return hash((self.asset_type, self.amount))
+        return hash((self.asset_type, self.amount, self.shares))
 
     def __repr__(self) -> str:
-        return f'{type(self).__name__}(asset_type={repr(self.asset_type)}, amount={repr(self.amount)})'
+        if self.shares is not None:
+            return (
+                f'{type(self).__name__}(asset_type={repr(self.asset_type)}, '
+                f'amount={repr(self.amount)}, shares={repr(self.shares)})'
+            )
+        else:
+            return f'{type(self).__name__}(asset_type={repr(self.asset_type)}, amount={repr(self.amount)})'
 
 
 class Buy(Suggestion):
@@ -0,0 +1,304 @@
+from .suggestion import Buy, Suggestion
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.asset import AssetType, Currency, Price, Security
+from openroboadvisor.ledger.entry import Entry, Transaction
+from openroboadvisor.portfolio.fx import Quote, get_price
+from typing import List, Tuple
+
+
+WASH_SALE_DAYS = 30
+
+# Kinds of trade kept in the window
+BUY = 0
+LOSS_SALE = 1
+
+# (household id, security group, kind of trade)
+WindowKey = Tuple[str, str, int]
+
+
+# Shares held and what they cost, in the currency they were bought in
+class Basis:
+    __slots__ = ('shares', 'cost', 'currency')
+
+    def __init__(self) -> None:
+        self.shares = Decimal(0)
+        self.cost = Decimal(0)
+        self.currency: str | None = None
+
+
+# Dates (as ordinals) of one kind of trade by a household in a group of
+# substantially identical securities, kept sorted so a date range is
+# checked by bisection.
+class TradeWindow:
+    __slots__ = ('dates',)
+
+    def __init__(self) -> None:
+        self.dates: List[int] = []
+
+    def add(self, ordinal: int) -> None:
+        dates = self.dates
+
+        if not dates or dates[-1] <= ordinal:
+            dates.append(ordinal)
+        else:
+            insort(dates, ordinal)
+
+    def any_between(self, start: int, end: int) -> bool:
+        dates = self.dates
+        i = bisect_left(dates, start)
+        return i < len(dates) and dates[i] <= end
+
+    def evict(self, cutoff: int) -> None:
+        i = bisect_left(self.dates, cutoff)
+
+        if i:
+            del self.dates[:i]
+
+
+# Keeps suggestions from triggering wash sales across a household's accounts:
+# selling a security at a loss within 30 days of buying a substantially
+# identical one, before or after. The check is conservative: buying shares
+# and selling those same shares at a loss within the window is blocked too.
+# Trades are followed from the ledger into a rolling window per household
+# and security group, so each check is a bisection, and trades that fall out
+# of the window are evicted as the date advances. Cost basis (average cost,
+# or the lot's cost for lots) is kept for every account and holding to tell
+# whether a sale is at a loss.
+#
+# Suggestions made on the same date count against each other too: once one
+# account in a household is allowed to sell at a loss, the others can't buy
+# the same security that day, and the other way around.
+class WashSaleGuard:
+    def __init__(
+        self,
+        ledger: Ledger,
+        as_of: date | None = None,
+        # account id -> household id; accounts not listed are their own household
+        households: dict[str, str] | None = None,
+        # symbol -> group of substantially identical securities; defaults to the symbol
+        identical: dict[str, str] | None = None,
+        # Security to buy instead when a buy is blocked
+        replacements: dict[AssetType, AssetType] | None = None,
+        window_days: int = WASH_SALE_DAYS,
+    ) -> None:
+        self.ledger = ledger
+        self.households = households or {}
+        self.identical = identical or {}
+        self.replacements = replacements or {}
+        self.window_days = window_days
+        self.as_of = as_of or date.today()
+        self.windows: dict[WindowKey, TradeWindow] = {}
+        # (ordinal, key) per trade in the order it was added, for eviction
+        self.recent: deque[Tuple[int, WindowKey]] = deque()
+        # (account id, holding) -> basis
+        self.basis: dict[Tuple[str, AssetType], Basis] = {}
+        self.batch_buys: set[Tuple[str, str]] = set()
+        self.batch_loss_sales: set[Tuple[str, str]] = set()
+        # (account id, suggestion) for every suggestion that was dropped or replaced
+        self.blocked: List[Tuple[str, Suggestion]] = []
+
+        for position, entry in enumerate(ledger.entries):
+            self.on_entry(position, entry)
+
+        ledger.add_entry_listener(self.on_entry)
+        self.advance(self.as_of)
+
+    def close(self) -> None:
+        self.ledger.remove_entry_listener(self.on_entry)
+
+    # Moves the window to as_of, evicting trades that have fallen out of it,
+    # and starts a new batch of suggestions.
+    def advance(self, as_of: date) -> None:
+        self.as_of = as_of
+        cutoff = as_of.toordinal() - self.window_days
+        recent = self.recent
+        windows = self.windows
+
+        while recent and recent[0][0] < cutoff:
+            _, key = recent.popleft()
+            window = windows.get(key)
+
+            if window is not None:
+                window.evict(cutoff)
+
+                if not window.dates:
+                    del windows[key]
+
+        self.start_batch()
+
+    def start_batch(self) -> None:
+        self.batch_buys.clear()
+        self.batch_loss_sales.clear()
+
+    def on_entry(self, position: int, entry: Entry) -> None:
+        if type(entry) is not Transaction:
+            return
+
+        ordinal = entry.entry_date.toordinal()
+        in_window = ordinal >= self.as_of.toordinal() - self.window_days
+
+        for leg in entry.legs:
+            asset = leg.asset_type
+
+            # Only the trade date legs of a trade carry a cost
+            if leg.cost is None or not isinstance(asset, Security) or not leg.quantity:
+                continue
+
+            if leg.quantity > 0:
+                self._add_basis(leg.account_id, asset, leg.quantity, leg.cost)
+                kind = BUY
+            else:
+                shares = -leg.quantity
+                loss = -leg.cost[0] < self._get_basis(leg.account_id, asset, shares)
+                self._add_basis(leg.account_id, asset, leg.quantity, None)
+
+                if not loss:
+                    continue
+
+                kind = LOSS_SALE
+
+            if in_window:
+                key = (self._household(leg.account_id), self._group(asset), kind)
+                window = self.windows.get(key)
+
+                if window is None:
+                    window = self.windows[key] = TradeWindow()
+
+                window.add(ordinal)
+                self.recent.append((ordinal, key))
+
+    def is_wash_sale(
+        self,
+        account_id: str,
+        suggestion: Suggestion,
+        quotes: dict[AssetType, Quote],
+        currency: str = 'USD',
+    ) -> bool:
+        asset = suggestion.asset_type
+
+        if not isinstance(asset, Security) or not suggestion.amount:
+            return False
+
+        household_group = (self._household(account_id), self._group(asset))
+
+        if isinstance(suggestion, Buy):
+            return household_group in self.batch_loss_sales or self._in_window(*household_group, LOSS_SALE)
+
+        if not self._is_loss(account_id, suggestion, quotes, currency):
+            return False
+
+        return household_group in self.batch_buys or self._in_window(*household_group, BUY)
+
+    # The account's suggestions without those that would be wash sales.
+    # Blocked buys are replaced by the asset's replacement, if it has one
+    # that isn't blocked too; blocked sells are dropped.
+    def filter(
+        self,
+        account_id: str,
+        suggestions: List[Suggestion],
+        quotes: dict[AssetType, Quote],
+        currency: str = 'USD',
+    ) -> List[Suggestion]:
+        filtered = []
+
+        for suggestion in suggestions:
+            if self.is_wash_sale(account_id, suggestion, quotes, currency):
+                self.blocked.append((account_id, suggestion))
+                blocked_asset = suggestion.asset_type
+                replacement = self.replacements.get(blocked_asset.without_lot()) \
+                    if isinstance(suggestion, Buy) and isinstance(blocked_asset, Security) else None
+
+                if replacement is None:
+                    continue
+
+                suggestion = Buy(replacement, suggestion.amount)
+
+                if self.is_wash_sale(account_id, suggestion, quotes, currency):
+                    continue
+
+            asset = suggestion.asset_type
+
+            if isinstance(asset, Security) and suggestion.amount:
+                household_group = (self._household(account_id), self._group(asset))
+
+                if isinstance(suggestion, Buy):
+                    self.batch_buys.add(household_group)
+                elif self._is_loss(account_id, suggestion, quotes, currency):
+                    self.batch_loss_sales.add(household_group)
+
+            filtered.append(suggestion)
+
+        return filtered
+
+    def _in_window(self, household_id: str, group: str, kind: int) -> bool:
+        window = self.windows.get((household_id, group, kind))
+
+        if window is None:
+            return False
+
+        ordinal = self.as_of.toordinal()
+        return window.any_between(ordinal - self.window_days, ordinal + self.window_days)
+
+    # Sales are at a loss when the quote is below the holding's cost per
+    # share. Holdings quoted in a different currency than they were bought
+    # in are treated as losses, to be safe.
+    def _is_loss(
+        self,
+        account_id: str,
+        suggestion: Suggestion,
+        quotes: dict[AssetType, Quote],
+        currency: str,
+    ) -> bool:
+        asset = suggestion.asset_type
+        basis = self.basis.get((account_id, asset))
+
+        if basis is None or basis.shares <= 0:
+            return False
+
+        price, quote_currency = get_price(asset, quotes, Currency(currency))
+
+        if quote_currency.symbol != basis.currency:
+            return True
+
+        return price * basis.shares < basis.cost
+
+    # Cost of selling shares of the holding at its current cost per share
+    def _get_basis(self, account_id: str, asset: Security, shares: Decimal | int) -> Decimal:
+        basis = self.basis.get((account_id, asset))
+
+        if basis is None or basis.shares <= 0:
+            return Decimal(0)
+
+        return basis.cost * shares / basis.shares
+
+    # Lots are also counted in their security, so sales without a lot
+    # compare against the security's average cost.
+    def _add_basis(self, account_id: str, asset: Security, shares: Decimal | int, cost: Price | None) -> None:
+        keys = [(account_id, asset)]
+
+        if asset.lot is not None:
+            keys.append((account_id, asset.without_lot()))
+
+        for key in keys:
+            basis = self.basis.get(key)
+
+            if basis is None:
+                basis = self.basis[key] = Basis()
+
+            if cost is not None:
+                basis.cost += cost[0]
+                basis.currency = cost[1].symbol
+            elif basis.shares > 0:
+                basis.cost += basis.cost * shares / basis.shares
+
+            basis.shares += shares
+
+    def _household(self, account_id: str) -> str:
+        return self.households.get(account_id, account_id)
+
+    def _group(self, asset: AssetType) -> str:
+        return self.identical.get(asset.symbol, asset.symbol)
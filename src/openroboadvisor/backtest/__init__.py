@@ -0,0 +1,19 @@
+from openroboadvisor.lazy import lazy_exports
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .engine import Backtest, BacktestResult
+    from .prices import PriceHistory
+    from .returns import Returns, ReturnsResult
+    from .risk import AccountRisk, RiskModel
+
+__all__ = ['AccountRisk', 'Backtest', 'BacktestResult', 'PriceHistory', 'Returns', 'ReturnsResult', 'RiskModel']
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'AccountRisk': '.risk',
+    'Backtest': '.engine',
+    'BacktestResult': '.engine',
+    'PriceHistory': '.prices',
+    'Returns': '.returns',
+    'ReturnsResult': '.returns',
+    'RiskModel': '.risk',
+})
@@ -0,0 +1,241 @@
+from .prices import PriceHistory
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.base_advisor import BaseAdvisor
+from openroboadvisor.advisor.execution import suggestion_entries
+from openroboadvisor.advisor.suggestion import Buy
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import Entry
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.account import Account
+from typing import List
+
+
+class AccountResult:
+    def __init__(self, account_id: str) -> None:
+        self.account_id = account_id
+        self.start_value = 0.0
+        self.end_value = 0.0
+        self.traded_amount = 0.0
+        self.fees = 0.0
+        self.trades = 0
+        self.rebalances = 0
+        self.value_sum = 0.0
+        self.drift_sum = 0.0
+        self.drift_samples = 0
+        self.max_drift = 0.0
+
+    @property
+    def total_return(self) -> float:
+        return self.end_value / self.start_value - 1 if self.start_value else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(account_id={repr(self.account_id)}, '
+            f'total_return={self.total_return:.6f}, trades={self.trades})'
+        )
+
+
+class BacktestResult:
+    def __init__(self, accounts: List[AccountResult]) -> None:
+        self.accounts = accounts
+        self.dates: List[date] = []
+        # Total value of all accounts at the close of each day
+        self.values: List[float] = []
+
+    @property
+    def days(self) -> int:
+        return len(self.dates)
+
+    @property
+    def years(self) -> float:
+        return (self.dates[-1] - self.dates[0]).days / 365.25 if self.dates else 0.0
+
+    def get_account(self, account_id: str) -> AccountResult | None:
+        return next((a for a in self.accounts if a.account_id == account_id), None)
+
+    def annualized_return(self, account: AccountResult) -> float:
+        years = self.years
+        if not years or account.end_value <= 0 or not account.start_value:
+            return 0.0
+        return float((account.end_value / account.start_value) ** (1 / years)) - 1
+
+    def turnover(self, account: AccountResult) -> float:
+        # Traded amount relative to the average value of the account
+        average_value = account.value_sum / self.days if self.days else 0.0
+        return account.traded_amount / average_value if average_value else 0.0
+
+    def mean_drift(self, account: AccountResult) -> float:
+        return account.drift_sum / account.drift_samples if account.drift_samples else 0.0
+
+
+# Replays a price history through an advisor. Every account in the portfolio
+# is kept as a sparse vector of share quantities (plus cash) that is valued
+# against each day's prices; the ledger is only touched on rebalance days,
+# with all of the day's trades recorded in a single batch.
+class Backtest:
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        advisor: BaseAdvisor,
+        prices: PriceHistory,
+        rebalance_every: int = 21,
+        drift_threshold: Decimal | float = 0,
+        fees: Decimal | int = 0,
+        # Prices and cash are in this currency; defaults to the advisor's
+        currency: str | None = None,
+    ) -> None:
+        assert rebalance_every > 0, f"Rebalance cadence must be positive (rebalance_every={rebalance_every})"
+        assert advisor.portfolio is portfolio, "Advisor must advise the backtested portfolio"
+        assert currency is None or currency == advisor.currency, \
+            f"Backtest currency must match the advisor's (currency={currency}, advisor_currency={advisor.currency})"
+        self.portfolio = portfolio
+        self.advisor = advisor
+        self.prices = prices
+        self.rebalance_every = rebalance_every
+        self.drift_threshold = float(drift_threshold)
+        self.fees = Decimal(fees)
+        self.currency = advisor.currency
+
+    def run(self) -> BacktestResult:
+        cash_asset = Currency(self.currency)
+        securities = [Security(symbol) for symbol in self.prices.symbols]
+        security_ids = {security: i for i, security in enumerate(securities)}
+        account_ids = list(self.portfolio.accounts.keys())
+        accounts = [self.portfolio.accounts[account_id] for account_id in account_ids]
+        cash: List[float] = []
+        holdings: List[dict[int, float]] = []
+
+        for account in accounts:
+            balances = account.get_balances()
+            cash.append(float(balances.cash.get(cash_asset, 0)))
+            account_holdings: dict[int, float] = {}
+
+            for security, quantity in balances.securities.items():
+                security_id = security_ids.get(security.without_lot())
+                assert security_id is not None, f"No price history for holding (security={security})"
+                account_holdings[security_id] = account_holdings.get(security_id, 0.0) + float(quantity)
+
+            holdings.append(account_holdings)
+
+        result = BacktestResult([AccountResult(account_id) for account_id in account_ids])
+        # The advisor holds a reference to its quotes, so update them in place.
+        quotes = self.advisor.quotes
+        quotes[cash_asset] = Decimal(1)
+        # The same prices, for sizing trades
+        trade_quotes: dict[AssetType, Decimal] = {}
+        prices: List[float] = [0.0] * len(securities)
+
+        for day_index, (day, day_prices) in enumerate(self.prices):
+            for security_id, price in enumerate(day_prices):
+                # Carry forward the last known price when a day has none
+                if price is not None:
+                    quotes[securities[security_id]] = price
+                    trade_quotes[securities[security_id]] = price
+                    prices[security_id] = float(price)
+
+            rebalance = day_index % self.rebalance_every == 0
+
+            if rebalance and self.advisor.wash_sale_guard is not None:
+                self.advisor.wash_sale_guard.advance(day)
+            entries: List[Entry] = []
+            book_value = 0.0
+
+            for k, account in enumerate(accounts):
+                account_result = result.accounts[k]
+                account_holdings = holdings[k]
+                value = cash[k]
+
+                for security_id, shares in account_holdings.items():
+                    value += shares * prices[security_id]
+
+                if day_index == 0:
+                    account_result.start_value = value
+
+                if rebalance and value > 0:
+                    entries.extend(self._rebalance(
+                        account,
+                        account_result,
+                        value,
+                        day,
+                        cash,
+                        k,
+                        account_holdings,
+                        security_ids,
+                        prices,
+                        trade_quotes,
+                    ))
+                    value = cash[k]
+
+                    for security_id, shares in account_holdings.items():
+                        value += shares * prices[security_id]
+
+                account_result.end_value = value
+                account_result.value_sum += value
+                book_value += value
+
+            if entries:
+                self.portfolio.ledger.record(*entries)
+
+            result.dates.append(day)
+            result.values.append(book_value)
+
+        return result
+
+    def _rebalance(
+        self,
+        account: Account,
+        account_result: AccountResult,
+        value: float,
+        day: date,
+        cash: List[float],
+        k: int,
+        account_holdings: dict[int, float],
+        security_ids: dict[Security, int],
+        prices: List[float],
+        quotes: dict[AssetType, Decimal],
+    ) -> List[Entry]:
+        suggestions = self.advisor.get_account_suggestions(account.account_id)
+        # Drift is the share of the account that has to move to reach its targets
+        drift = float(sum(abs(s.amount) for s in suggestions)) / 2 / value
+        account_result.drift_sum += drift
+        account_result.drift_samples += 1
+        account_result.max_drift = max(account_result.max_drift, drift)
+
+        if drift <= self.drift_threshold:
+            return []
+
+        trades = [
+            s for s in suggestions
+            if isinstance(s.asset_type, Security) and s.amount
+        ]
+        fees = float(self.fees)
+
+        for suggestion in trades:
+            security = suggestion.asset_type
+            assert isinstance(security, Security)
+            security_id = security_ids[security.without_lot()]
+            amount = float(suggestion.amount)
+            shares = amount / prices[security_id]
+
+            if isinstance(suggestion, Buy):
+                account_holdings[security_id] = account_holdings.get(security_id, 0.0) + shares
+                cash[k] -= amount + fees
+            else:
+                account_holdings[security_id] = account_holdings.get(security_id, 0.0) - shares
+                cash[k] += amount - fees
+
+            account_result.traded_amount += amount
+            account_result.fees += fees
+
+        account_result.trades += len(trades)
+        account_result.rebalances += 1
+
+        return suggestion_entries(
+            account=account,
+            suggestions=trades,
+            quotes=quotes,
+            fees=self.fees,
+            currency=self.currency,
+            trade_date=day,
+        )
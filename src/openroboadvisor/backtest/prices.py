@@ -0,0 +1,32 @@
+import csv
+from datetime import date
+from decimal import Decimal
+from typing import Iterator, List, Tuple
+
+
+# Daily closing prices stored as a CSV file with one row per day:
+#
+#   date,VTI,VEA,VWO
+#   2022-01-03,241.12,51.27,50.11
+#
+# Empty cells mean there is no price for that symbol on that day. Rows are
+# streamed from disk, so a history never has to be held in memory.
+class PriceHistory:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        with open(path, newline='') as price_file:
+            header = next(csv.reader(price_file))
+
+        self.symbols: List[str] = header[1:]
+
+    def __iter__(self) -> Iterator[Tuple[date, List[Decimal | None]]]:
+        with open(self.path, newline='') as price_file:
+            reader = csv.reader(price_file)
+            next(reader)
+
+            for row in reader:
+                yield (
+                    date.fromisoformat(row[0]),
+                    [Decimal(price) if price else None for price in row[1:]],
+                )
@@ -0,0 +1,241 @@
+from .prices import PriceHistory
+from datetime import date
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.asset import Currency
+from openroboadvisor.ledger.entry import Transaction
+from openroboadvisor.portfolio.templates import EXTERNAL_BANK_ID, FEES_SUBACCOUNT_ID
+from typing import List, Tuple, cast
+
+
+DAYS_PER_YEAR = 365.0
+
+# (date, amount) from the investor's point of view: money put into the
+# account is negative and money taken out is positive.
+CashFlow = Tuple[date, float]
+
+
+class AccountReturns:
+    def __init__(self, account_id: str) -> None:
+        self.account_id = account_id
+        self.start_value = 0.0
+        self.end_value = 0.0
+        # Deposits less withdrawals after the first day
+        self.net_flows = 0.0
+        # Chain-linked growth of one unit over the period
+        self.growth = 1.0
+        self.cash_flows: List[CashFlow] = []
+
+    # Time-weighted return over the whole period, not annualized
+    @property
+    def twr(self) -> float:
+        return self.growth - 1
+
+    # Money-weighted return as an annual rate (XIRR), or None if the account
+    # never had money in it.
+    @property
+    def mwr(self) -> float | None:
+        return xirr(self.cash_flows)
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(account_id={repr(self.account_id)}, '
+            f'twr={self.twr:.6f}, end_value={self.end_value:.2f})'
+        )
+
+
+class ReturnsResult:
+    def __init__(self, accounts: List[AccountReturns]) -> None:
+        self.accounts = accounts
+        self.account_index = {account.account_id: account for account in accounts}
+        self.start_date: date | None = None
+        self.end_date: date | None = None
+
+    def get_account(self, account_id: str) -> AccountReturns | None:
+        return self.account_index.get(account_id)
+
+
+# Time- and money-weighted returns for every account in a ledger, valued
+# against daily prices. Entries are applied in a single sweep in date order
+# (using the ledger's entry index) alongside the price days, so each day
+# only costs one valuation per account. Transactions with the external bank
+# are cash flows, and are treated as happening at the end of their day;
+# entries between price days are applied on the next price day.
+class Returns:
+    def __init__(
+        self,
+        ledger: Ledger,
+        prices: PriceHistory,
+        currency: str = 'USD',
+    ) -> None:
+        self.ledger = ledger
+        self.prices = prices
+        self.currency = currency
+
+    def run(self) -> ReturnsResult:
+        ledger = self.ledger
+        account_ids = [account_id for account_id in ledger.accounts if not account_id.startswith('__')]
+        account_index = {account_id: k for k, account_id in enumerate(account_ids)}
+        security_ids = {symbol: i for i, symbol in enumerate(self.prices.symbols)}
+        result = ReturnsResult([AccountReturns(account_id) for account_id in account_ids])
+        accounts = result.accounts
+        cash = [0.0] * len(account_ids)
+        holdings: List[dict[int, float]] = [{} for _ in account_ids]
+        values = [0.0] * len(account_ids)
+        prices = [0.0] * len(security_ids)
+        # In date order, through query() so ledgers without an in-memory
+        # index (SqliteLedger) are read with SQL
+        entries = cast(List[Transaction], ledger.query(entry_type=Transaction))
+        p = 0
+
+        for day_index, (day, day_prices) in enumerate(self.prices):
+            for security_id, price in enumerate(day_prices):
+                # Carry forward the last known price when a day has none
+                if price is not None:
+                    prices[security_id] = float(price)
+
+            flows: dict[int, float] = {}
+
+            while p < len(entries) and entries[p].entry_date <= day:
+                self._apply(entries[p], account_index, security_ids, cash, holdings, prices, flows)
+                p += 1
+
+            for k, account in enumerate(accounts):
+                value = cash[k]
+
+                for security_id, quantity in holdings[k].items():
+                    value += quantity * prices[security_id]
+
+                if day_index == 0:
+                    # Earlier flows are part of the starting value
+                    account.start_value = value
+
+                    if value:
+                        account.cash_flows.append((day, -value))
+                else:
+                    flow = flows.get(k, 0.0)
+
+                    if values[k] > 0:
+                        account.growth *= (value - flow) / values[k]
+
+                    if flow:
+                        account.net_flows += flow
+                        account.cash_flows.append((day, -flow))
+
+                values[k] = value
+
+            if day_index == 0:
+                result.start_date = day
+
+            result.end_date = day
+
+        for k, account in enumerate(accounts):
+            account.end_value = values[k]
+
+            if account.cash_flows and result.end_date:
+                account.cash_flows.append((result.end_date, values[k]))
+
+        return result
+
+    def _apply(
+        self,
+        transaction: Transaction,
+        account_index: dict[str, int],
+        security_ids: dict[str, int],
+        cash: List[float],
+        holdings: List[dict[int, float]],
+        prices: List[float],
+        flows: dict[int, float],
+    ) -> None:
+        external = any(leg.account_id == EXTERNAL_BANK_ID for leg in transaction.legs)
+
+        for leg in transaction.legs:
+            k = account_index.get(leg.account_id)
+
+            # Fees have already left the account's cash
+            if k is None or leg.subaccount_id == FEES_SUBACCOUNT_ID:
+                continue
+
+            asset = leg.asset_type
+            quantity = float(leg.quantity)
+
+            if isinstance(asset, Currency):
+                assert asset.symbol == self.currency, (
+                    "Returns are only computed in a single currency "
+                    f"(currency={self.currency}, asset={asset})"
+                )
+                cash[k] += quantity
+                amount = quantity
+            else:
+                security_id = security_ids.get(asset.symbol)
+                assert security_id is not None, f"No price history for holding (security={asset})"
+                account_holdings = holdings[k]
+                account_holdings[security_id] = account_holdings.get(security_id, 0.0) + quantity
+                amount = quantity * prices[security_id]
+
+            if external:
+                flows[k] = flows.get(k, 0.0) + amount
+
+
+# The annual rate at which the cash flows' net present value is zero. Newton's
+# method converges in a few steps for ordinary flows; bisection is the
+# fallback when it overshoots or stalls. Returns None when there is no root
+# (all flows have the same sign).
+def xirr(
+    cash_flows: List[CashFlow],
+    guess: float = 0.1,
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> float | None:
+    if not any(amount > 0 for _, amount in cash_flows) or not any(amount < 0 for _, amount in cash_flows):
+        return None
+
+    start = min(day for day, _ in cash_flows)
+    years = [(day - start).days / DAYS_PER_YEAR for day, _ in cash_flows]
+    amounts = [amount for _, amount in cash_flows]
+
+    def npv(rate: float) -> float:
+        value: float = sum(amount * (1 + rate) ** -t for amount, t in zip(amounts, years))
+        return value
+
+    rate = guess
+
+    for _ in range(max_iterations):
+        value = npv(rate)
+        derivative: float = sum(-t * amount * (1 + rate) ** (-t - 1) for amount, t in zip(amounts, years))
+
+        if not derivative:
+            break
+
+        next_rate = rate - value / derivative
+
+        if next_rate <= -1:
+            break
+
+        if abs(next_rate - rate) < tolerance:
+            return next_rate
+
+        rate = next_rate
+
+    low, high = -0.999999, 1.0
+    low_value = npv(low)
+
+    # Widen the bracket until the NPV changes sign
+    while (npv(high) > 0) == (low_value > 0):
+        high *= 2
+
+        if high > 1e9:
+            return None
+
+    for _ in range(200):
+        mid = (low + high) / 2
+        mid_value = npv(mid)
+
+        if abs(high - low) < tolerance:
+            break
+
+        if (mid_value > 0) == (low_value > 0):
+            low, low_value = mid, mid_value
+        else:
+            high = mid
+
+    return (low + high) / 2
@@ -0,0 +1,221 @@
+import os
+from .prices import PriceHistory
+from collections import deque
+from math import sqrt
+from openroboadvisor.advisor.model_portfolio import ModelPortfolio
+from openroboadvisor.ledger.asset import AssetType, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import FxRates, Quote
+from statistics import NormalDist
+from typing import List, Tuple
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Sparse portfolio weights: security id -> share of the account's value.
+# Cash isn't included; it's treated as riskless.
+Weights = dict[int, float]
+
+
+class AccountRisk:
+    __slots__ = ('account_id', 'value', 'volatility', 'tracking_error', 'value_at_risk')
+
+    def __init__(
+        self,
+        account_id: str,
+        value: float,
+        volatility: float,
+        tracking_error: float | None,
+        value_at_risk: float,
+    ) -> None:
+        self.account_id = account_id
+        self.value = value
+        # Annualized standard deviation of the account's returns
+        self.volatility = volatility
+        # Annualized volatility of the difference from the account's model,
+        # or None if it doesn't follow one
+        self.tracking_error = tracking_error
+        # Parametric value at risk over the model's horizon, in currency
+        self.value_at_risk = value_at_risk
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(account_id={repr(self.account_id)}, '
+            f'volatility={self.volatility:.6f}, value_at_risk={self.value_at_risk:.2f})'
+        )
+
+
+# Volatility, tracking error and value at risk for every account, from the
+# covariance of daily returns in a price history. The covariance matrix is
+# computed from the most recent window of days and cached until the price
+# file changes. Account weights are sparse, so risk for an account costs the
+# square of the number of securities it holds rather than of the number in
+# the history, and every account is computed in one pass over the book.
+class RiskModel:
+    def __init__(
+        self,
+        prices: PriceHistory,
+        window: int = TRADING_DAYS_PER_YEAR,
+        confidence: float = 0.95,
+        horizon_days: int = 1,
+    ) -> None:
+        assert window > 1, f"Covariance needs more than one day of returns (window={window})"
+        assert 0 < confidence < 1, f"Confidence must be between 0 and 1 (confidence={confidence})"
+
+        self.prices = prices
+        self.window = window
+        self.confidence = confidence
+        self.horizon_days = horizon_days
+        self.security_ids = {symbol: i for i, symbol in enumerate(prices.symbols)}
+        self.version: Tuple[int, int] | None = None
+        self.matrix: List[List[float]] = []
+        # Times the matrix has been computed
+        self.computations = 0
+
+    # Daily covariance of returns between every pair of securities.
+    @property
+    def covariance(self) -> List[List[float]]:
+        stat = os.stat(self.prices.path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        if version != self.version:
+            self.matrix = self._compute_covariance()
+            self.version = version
+            self.computations += 1
+
+        return self.matrix
+
+    def get_weights(
+        self,
+        asset_amounts: dict[AssetType, float],
+        total: float,
+    ) -> Weights:
+        weights: Weights = {}
+
+        if not total:
+            return weights
+
+        for asset, amount in asset_amounts.items():
+            if not isinstance(asset, Security) or not amount:
+                continue
+
+            security_id = self.security_ids.get(asset.symbol)
+            assert security_id is not None, f"No price history for holding (security={asset})"
+            weights[security_id] = weights.get(security_id, 0.0) + amount / total
+
+        return weights
+
+    def get_variance(self, weights: Weights) -> float:
+        return self._get_variance(self.covariance, weights)
+
+    def run(
+        self,
+        portfolio: Portfolio,
+        quotes: dict[AssetType, Quote],
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+        # account id -> model; SimpleAdvisor.account_models can be passed as is
+        account_models: dict[str, ModelPortfolio[AssetType]] | None = None,
+    ) -> dict[str, AccountRisk]:
+        # The history is checked for new data once for the whole book
+        matrix = self.covariance
+        annualize = sqrt(TRADING_DAYS_PER_YEAR)
+        horizon = sqrt(self.horizon_days)
+        z = NormalDist().inv_cdf(self.confidence)
+        account_models = account_models or {}
+        # Each model's weights are only resolved once
+        model_weights: dict[int, Weights] = {}
+        risks = {}
+
+        for account_id, account in portfolio.accounts.items():
+            amounts = account.get_balances().get_amounts(quotes, fx, currency)
+            value = float(sum(amounts.values()))
+            weights = self.get_weights({asset: float(amount) for asset, amount in amounts.items()}, value)
+            daily_volatility = sqrt(self._get_variance(matrix, weights))
+            tracking_error = None
+            model = account_models.get(account_id)
+
+            if model is not None:
+                targets = model_weights.get(id(model))
+
+                if targets is None:
+                    targets = model_weights[id(model)] = self.get_weights(
+                        {asset: float(weight) for asset, weight in model.targets.items()},
+                        1.0,
+                    )
+
+                active = dict(weights)
+
+                for security_id, weight in targets.items():
+                    active[security_id] = active.get(security_id, 0.0) - weight
+
+                tracking_error = sqrt(self._get_variance(matrix, active)) * annualize
+
+            risks[account_id] = AccountRisk(
+                account_id,
+                value,
+                daily_volatility * annualize,
+                tracking_error,
+                z * daily_volatility * horizon * value,
+            )
+
+        return risks
+
+    def _get_variance(self, matrix: List[List[float]], weights: Weights) -> float:
+        items = list(weights.items())
+        variance = 0.0
+
+        for i, weight in items:
+            row = matrix[i]
+            variance += weight * sum(other_weight * row[j] for j, other_weight in items)
+
+        # Rounding can leave a tiny negative variance for riskless weights
+        return max(variance, 0.0)
+
+    def _compute_covariance(self) -> List[List[float]]:
+        n = len(self.security_ids)
+        last_prices: List[float | None] = [None] * n
+        # Rows of daily returns, oldest first
+        rows: deque[List[float]] = deque(maxlen=self.window)
+        started = False
+
+        for _, day_prices in self.prices:
+            returns = []
+
+            for i, price in enumerate(day_prices):
+                last_price = last_prices[i]
+
+                # Days without a price carry the last one forward
+                if price is None or not last_price:
+                    returns.append(0.0)
+                else:
+                    returns.append(float(price) / last_price - 1)
+
+                if price is not None:
+                    last_prices[i] = float(price)
+
+            # The first day with prices has nothing to compare against
+            if started:
+                rows.append(returns)
+            else:
+                started = any(last_price is not None for last_price in last_prices)
+
+        days = len(rows)
+        matrix = [[0.0] * n for _ in range(n)]
+
+        if days < 2:
+            return matrix
+
+        columns = [list(column) for column in zip(*rows)]
+
+        for i, column in enumerate(columns):
+            mean = sum(column) / days
+            columns[i] = [value - mean for value in column]
+
+        for i in range(n):
+            for j in range(i, n):
+                matrix[i][j] = matrix[j][i] = sum(
+                    x * y for x, y in zip(columns[i], columns[j])
+                ) / (days - 1)
+
+        return matrix
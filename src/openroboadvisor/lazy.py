@@ -0,0 +1,27 @@
+import sys
+from importlib import import_module
+from typing import Any, Callable, List, Tuple
+
+
+# Builds a module-level __getattr__ and __dir__ (PEP 562) for a package whose
+# exports are imported from their submodules on first use, which keeps
+# importing the package itself cheap. Each name maps to the relative module
+# that defines it, and is cached on the package once it has been loaded.
+def lazy_exports(
+    package: str,
+    exports: dict[str, str],
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+
+        if module_name is None:
+            raise AttributeError(f"module '{package}' has no attribute '{name}'")
+
+        value = getattr(import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
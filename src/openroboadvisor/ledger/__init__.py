@@ -1,3 +1,14 @@
-from .ledger import Ledger
+from openroboadvisor.lazy import lazy_exports
+from typing import TYPE_CHECKING
 
-__all__ = [Ledger.__name__]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .ledger import Ledger
+    from .snapshot import LedgerSnapshot
+    from .sqlite import SqliteLedger
+
+__all__ = ['Ledger', 'LedgerSnapshot', 'SqliteLedger']
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Ledger': '.ledger',
+    'LedgerSnapshot': '.snapshot',
+    'SqliteLedger': '.sqlite',
+})
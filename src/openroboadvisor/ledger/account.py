@@ -30,7 +30,7 @@ class Subaccount:
         self.subaccount_id = subaccount_id
         self.assets: dict[AssetType, Decimal] = assets or {}
 
-    def inc(self, quantity: Decimal | int, asset_type: AssetType) -> None:
+    def inc(self, quantity: Decimal | int, asset_type: AssetType) -> Decimal | int:
         old_asset_quantity = self.assets.get(asset_type, 0)
         self.assets[asset_type] = old_asset_quantity + quantity
         return old_asset_quantity
@@ -64,7 +64,9 @@ class Account:
         self.subaccounts: dict[str, Subaccount] = {}
 
     def subaccount(self, subaccount_id: str) -> Subaccount:
-        return self.subaccounts.setdefault(
-            subaccount_id,
-            Subaccount(subaccount_id)
-        )
+        subaccount = self.subaccounts.get(subaccount_id)
+
+        if subaccount is None:
+            subaccount = self.subaccounts[subaccount_id] = Subaccount(subaccount_id)
+
+        return subaccount
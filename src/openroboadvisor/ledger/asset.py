@@ -14,7 +14,7 @@ class AssetType:
             isinstance(another, type(self)) and \
             self.symbol == another.symbol
 
-    def __hash__(self) -> None:
+    def __hash__(self) -> int:
         return hash(self.symbol)
 
     def __repr__(self) -> str:
@@ -0,0 +1,248 @@
+import json
+from collections import deque
+from decimal import Decimal
+from enum import Enum, auto
+from openroboadvisor.ledger.account import Subaccount
+from openroboadvisor.ledger.asset import AssetType
+from openroboadvisor.ledger.entry import Entry
+from openroboadvisor.ledger.ledger import Ledger
+from threading import Condition
+from typing import Callable, List
+
+
+class EntryRecorded:
+    __slots__ = ('position', 'entry')
+
+    def __init__(self, position: int, entry: Entry) -> None:
+        self.position = position
+        self.entry = entry
+
+    def to_record(self) -> List[object]:
+        return ['entry', self.position, type(self.entry).__name__, self.entry.entry_date.isoformat()]
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.position}, {type(self.entry).__name__})'
+
+
+class BalanceChanged:
+    __slots__ = ('position', 'account_id', 'subaccount_id', 'asset_type', 'old_quantity', 'new_quantity')
+
+    def __init__(
+        self,
+        position: int,
+        account_id: str,
+        subaccount_id: str,
+        asset_type: AssetType,
+        old_quantity: Decimal | int,
+        new_quantity: Decimal | int,
+    ) -> None:
+        self.position = position
+        self.account_id = account_id
+        self.subaccount_id = subaccount_id
+        self.asset_type = asset_type
+        self.old_quantity = old_quantity
+        self.new_quantity = new_quantity
+
+    def to_record(self) -> List[object]:
+        return [
+            'balance',
+            self.position,
+            self.account_id,
+            self.subaccount_id,
+            type(self.asset_type).__name__,
+            self.asset_type.symbol,
+            getattr(self.asset_type, 'lot', None),
+            str(self.old_quantity),
+            str(self.new_quantity),
+        ]
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}({self.position}, {repr(self.account_id)}, '
+            f'{repr(self.subaccount_id)}, {repr(self.asset_type)}, '
+            f'{self.old_quantity} -> {self.new_quantity})'
+        )
+
+
+ChangeEvent = EntryRecorded | BalanceChanged
+Sink = Callable[[ChangeEvent], None]
+
+
+class Overflow(Enum):
+    # Keep what's buffered and hand the events that don't fit to the
+    # subscription's spill sink, or drop them if it has none. Writers are
+    # never held up; the subscriber is told on its next poll.
+    SPILL = auto()
+    # Discard the oldest buffered events and count them as dropped
+    DROP_OLDEST = auto()
+
+
+# Raised by Subscription.poll when events didn't fit in the subscriber's
+# buffer and went to its spill sink instead, or were dropped. What was
+# buffered before is still there; poll again to read it.
+class BackpressureError(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(
+        self,
+        feed: 'ChangeFeed',
+        max_buffer: int,
+        overflow: Overflow,
+        spill: Sink | None,
+    ) -> None:
+        assert max_buffer > 0, f"Subscriptions need room for events (max_buffer={max_buffer})"
+        self.feed = feed
+        self.max_buffer = max_buffer
+        self.overflow = overflow
+        self.spill = spill
+        self.buffer: deque[ChangeEvent] = deque()
+        self.condition = Condition()
+        self.dropped = 0
+        # Set when events were spilled or dropped; cleared by poll
+        self.overflowed = False
+
+    # Called from inside Ledger.append with the ledger's write lock held, so
+    # this never waits and never raises: a slow subscriber would hold up
+    # every writer and snapshot, and an entry cut short here would leave the
+    # rest of the write (the other transactions of a deposit, say)
+    # unrecorded.
+    def publish(self, events: List[ChangeEvent]) -> None:
+        with self.condition:
+            if self.overflow == Overflow.DROP_OLDEST:
+                self.buffer.extend(events)
+
+                while len(self.buffer) > self.max_buffer:
+                    self.buffer.popleft()
+                    self.dropped += 1
+            # An entry's events are kept together, and once events have been
+            # spilled the rest follow them until the subscriber has been
+            # told, so the buffer never skips ahead of the spill.
+            elif self.overflowed or len(self.buffer) + len(events) > self.max_buffer:
+                self.overflowed = True
+
+                if self.spill is None:
+                    self.dropped += len(events)
+                else:
+                    for event in events:
+                        self.spill(event)
+            else:
+                self.buffer.extend(events)
+
+            self.condition.notify_all()
+
+    # Waits until the buffer has room, for writers that want to slow down
+    # for the subscriber rather than spill. Never call this while holding
+    # the ledger's write lock (from a listener, say). Returns whether there
+    # is room.
+    def wait_for_room(self, timeout: float | None = None) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.buffer) < self.max_buffer, timeout)
+
+    def poll(self, max_events: int | None = None, timeout: float | None = None) -> List[ChangeEvent]:
+        with self.condition:
+            if self.overflowed:
+                self.overflowed = False
+                raise BackpressureError(
+                    "Change feed subscriber is not keeping up "
+                    f"(max_buffer={self.max_buffer}, dropped={self.dropped})"
+                )
+
+            if timeout:
+                self.condition.wait_for(lambda: self.buffer, timeout)
+
+            count = len(self.buffer) if max_events is None else min(max_events, len(self.buffer))
+            events = [self.buffer.popleft() for _ in range(count)]
+            self.condition.notify_all()
+            return events
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def close(self) -> None:
+        self.feed.unsubscribe(self)
+
+
+# Publishes an EntryRecorded event for every entry the ledger records,
+# followed by a BalanceChanged event for each leg it posted. Events for an
+# entry are only published once the whole entry has been applied.
+class ChangeFeed:
+    def __init__(self, ledger: Ledger) -> None:
+        self.ledger = ledger
+        self.subscriptions: List[Subscription] = []
+        self.sinks: List[Sink] = []
+        self.pending: List[ChangeEvent] = []
+        ledger.add_post_listener(self.on_post)
+        ledger.add_entry_listener(self.on_entry)
+
+    def subscribe(
+        self,
+        max_buffer: int = 10000,
+        overflow: Overflow = Overflow.SPILL,
+        # Takes the events that don't fit in the buffer (a FileSink, say);
+        # without one they are dropped
+        spill: Sink | None = None,
+    ) -> Subscription:
+        subscription = Subscription(self, max_buffer, overflow, spill)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.remove(subscription)
+
+    def add_sink(self, sink: Sink) -> None:
+        self.sinks.append(sink)
+
+    def close(self) -> None:
+        self.ledger.remove_post_listener(self.on_post)
+        self.ledger.remove_entry_listener(self.on_entry)
+
+    def on_post(
+        self,
+        account_id: str,
+        subaccount: Subaccount,
+        asset_type: AssetType,
+        quantity: Decimal | int,
+        old_quantity: Decimal | int,
+    ) -> None:
+        if self.subscriptions or self.sinks:
+            self.pending.append(BalanceChanged(
+                len(self.ledger.entries),
+                account_id,
+                subaccount.subaccount_id,
+                asset_type,
+                old_quantity,
+                old_quantity + quantity,
+            ))
+
+    def on_entry(self, position: int, entry: Entry) -> None:
+        if not self.subscriptions and not self.sinks:
+            return
+
+        events: List[ChangeEvent] = [EntryRecorded(position, entry)]
+        events.extend(self.pending)
+        self.pending = []
+
+        for sink in self.sinks:
+            for event in events:
+                sink(event)
+
+        for subscription in self.subscriptions:
+            subscription.publish(events)
+
+
+# Appends every event to a local file as a line of JSON.
+class FileSink:
+    def __init__(self, path: str) -> None:
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, event: ChangeEvent) -> None:
+        self.file.write(json.dumps(event.to_record(), separators=(',', ':')))
+        self.file.write('\n')
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
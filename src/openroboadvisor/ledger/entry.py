@@ -2,6 +2,7 @@ from .account import Account, AccountType
 from .asset import AssetType, Price
 from datetime import date
 from decimal import Decimal
+from typing import List, Tuple
 
 
 class Entry:
@@ -40,15 +41,33 @@ class CloseAccount(Entry):
         self,
         account_id: str,
         entry_date: date,
+        # Subaccounts that may keep a balance, such as running fee totals
+        exempt_subaccount_ids: Tuple[str, ...] = (),
     ) -> None:
         super().__init__(
             entry_date=entry_date
         )
         self.account_id = account_id
+        self.exempt_subaccount_ids = exempt_subaccount_ids
 
     def validate(self, accounts: dict[str, Account]) -> None:
-        # TODO validate account is not already closed
-        raise NotImplementedError
+        account = accounts.get(self.account_id)
+
+        assert account, (
+            "Can't close an account that isn't open "
+            f"(account_id='{self.account_id}')"
+        )
+
+        for subaccount_id, subaccount in account.subaccounts.items():
+            if subaccount_id in self.exempt_subaccount_ids:
+                continue
+
+            for asset_type, quantity in subaccount.assets.items():
+                assert not quantity, (
+                    "Can't close an account with a balance "
+                    f"(account_id='{self.account_id}', subaccount_id='{subaccount_id}', "
+                    f"asset_type='{asset_type}', quantity={quantity})"
+                )
 
 
 class TransactionLeg:
@@ -72,11 +91,15 @@ class Transaction(Entry):
         self,
         *legs: TransactionLeg,
         entry_date: date,
+        balanced: bool = False,
     ) -> None:
         super().__init__(
             entry_date=entry_date
         )
-        self.legs: List[TransactionLeg] = legs
+        self.legs: Tuple[TransactionLeg, ...] = legs
+        # Set by builders that guarantee the legs balance. Ledgers that trust
+        # balanced transactions skip validate_quantities for them.
+        self.balanced = balanced
 
     def validate(self, accounts: dict[str, Account]) -> None:
         self.validate_accounts(accounts)
@@ -90,14 +113,29 @@ class Transaction(Entry):
             )
 
     def validate_quantities(self) -> None:
-        current_quantities: dict[AssetType, Decimal] = {}
+        # Transactions only involve a couple of assets, so totals are kept
+        # in parallel lists and matched by identity before equality.
+        asset_types: List[AssetType] = []
+        quantities: List[Decimal | int] = []
 
         for leg in self.legs:
-            quantity, asset_type = leg.cost if leg.cost else (leg.quantity, leg.asset_type)
-            current_quantity = current_quantities.get(asset_type, 0)
-            current_quantities[asset_type] = current_quantity + quantity
-
-        for asset_type, quantity in current_quantities.items():
+            cost = leg.cost
+
+            if cost is None:
+                quantity = leg.quantity
+                asset_type = leg.asset_type
+            else:
+                quantity, asset_type = cost
+
+            for i, current_asset_type in enumerate(asset_types):
+                if current_asset_type is asset_type or current_asset_type == asset_type:
+                    quantities[i] += quantity
+                    break
+            else:
+                asset_types.append(asset_type)
+                quantities.append(quantity)
+
+        for asset_type, quantity in zip(asset_types, quantities):
             assert quantity == 0, (
                 "Transaction has an imbalance "
                 f"(asset_type='{asset_type}', quantity={quantity})"
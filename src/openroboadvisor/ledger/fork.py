@@ -0,0 +1,110 @@
+from collections.abc import Mapping, MutableMapping
+from openroboadvisor.ledger.account import Account
+from openroboadvisor.ledger.index import EntryIndex
+from openroboadvisor.ledger.ledger import Ledger
+from openroboadvisor.ledger.snapshot import LedgerSnapshot
+from typing import Iterator
+
+
+# A fork's accounts: the accounts it has read, written to or opened, then the
+# parent's as of the fork, less the accounts closed in the fork. Parent
+# accounts are copied into the overlay the first time they're read, so
+# every account the fork hands out is its own.
+class ForkAccounts(MutableMapping[str, Account]):
+    def __init__(self, parent_accounts: Mapping[str, Account]) -> None:
+        self.parent_accounts = parent_accounts
+        self.overlay: dict[str, Account] = {}
+        self.closed: set[str] = set()
+
+    def __getitem__(self, account_id: str) -> Account:
+        account = self.overlay.get(account_id)
+
+        if account is not None:
+            return account
+
+        if account_id in self.closed:
+            raise KeyError(account_id)
+
+        account = self.overlay[account_id] = self.parent_accounts[account_id]
+        return account
+
+    def __setitem__(self, account_id: str, account: Account) -> None:
+        self.overlay[account_id] = account
+        self.closed.discard(account_id)
+
+    def __delitem__(self, account_id: str) -> None:
+        if account_id not in self:
+            raise KeyError(account_id)
+
+        self.overlay.pop(account_id, None)
+        self.closed.add(account_id)
+
+    def __contains__(self, account_id: object) -> bool:
+        return account_id in self.overlay or (
+            account_id not in self.closed and account_id in self.parent_accounts
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        for account_id in self.parent_accounts:
+            if account_id in self.overlay or account_id not in self.closed:
+                yield account_id
+
+        for account_id in self.overlay:
+            if account_id not in self.parent_accounts:
+                yield account_id
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+        self.overlay.clear()
+        self.closed.clear()
+
+
+# A copy-on-write overlay on top of a parent ledger. The fork reads the
+# parent through a snapshot taken when it's created, so entries recorded in
+# the parent afterwards don't show up in the fork, and nothing is copied up
+# front: an account is only copied into the fork the first time it's read.
+# Accounts closed in the fork are only hidden from it; they're closed (and
+# archived) in the parent when the fork is committed.
+#
+# The parent keeps the history the snapshot needs until the fork is closed,
+# discarded or committed (which takes a new snapshot), or garbage collected.
+class LedgerFork(Ledger):
+    accounts: ForkAccounts  # type: ignore[assignment]
+
+    def __init__(self, parent: Ledger) -> None:
+        super().__init__()
+        self.parent = parent
+        self.base: LedgerSnapshot = parent.snapshot()
+        self.accounts = ForkAccounts(self.base.accounts)
+
+    # All or nothing: the entries are replayed into a scratch fork of the
+    # parent first, so an entry the parent no longer accepts (it has changed
+    # since the fork was taken) fails the commit before anything is written.
+    # The parent is held for writes throughout.
+    def commit(self) -> None:
+        parent = self.parent
+
+        with parent.write_lock:
+            scratch = LedgerFork(parent)
+            scratch.record(*self.entries)
+            scratch.close()
+            parent.record(*self.entries)
+
+        self.discard()
+
+    # Drops the fork's entries and starts over from the parent as it is now.
+    def discard(self) -> None:
+        self.close()
+        self.entries = []
+        self.index = EntryIndex()
+        self.accounts.clear()
+        self.generation += 1
+        self.base = self.parent.snapshot()
+        self.accounts.parent_accounts = self.base.accounts
+
+    # Releases the parent's history kept for the fork; the fork can't be
+    # read from its parent afterwards.
+    def close(self) -> None:
+        self.base.close()
@@ -0,0 +1,130 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from openroboadvisor.ledger.entry import Entry, Transaction
+from typing import Any, Hashable, Iterator, List, Tuple, TypeVar
+
+
+Key = TypeVar('Key', bound=Hashable)
+
+
+def get_account_ids(entry: Entry) -> List[str]:
+    if isinstance(entry, Transaction):
+        return list(dict.fromkeys(leg.account_id for leg in entry.legs))
+
+    account_id = getattr(entry, 'account_id', None)
+    return [account_id] if account_id is not None else []
+
+
+def get_symbols(entry: Entry) -> List[str]:
+    if isinstance(entry, Transaction):
+        return list(dict.fromkeys(leg.asset_type.symbol for leg in entry.legs))
+
+    return []
+
+
+# Entry positions kept sorted by (entry date, position), so date ranges are
+# found by bisection.
+class PostingList:
+    def __init__(self) -> None:
+        self.dates: List[int] = []
+        self.positions: List[int] = []
+
+    def add(self, entry_date: date, position: int) -> None:
+        ordinal = entry_date.toordinal()
+
+        if not self.dates or self.dates[-1] <= ordinal:
+            self.dates.append(ordinal)
+            self.positions.append(position)
+        else:
+            i = bisect_right(self.dates, ordinal)
+            self.dates.insert(i, ordinal)
+            self.positions.insert(i, position)
+
+    def range(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[int]:
+        start = bisect_left(self.dates, start_date.toordinal()) if start_date else 0
+        end = bisect_right(self.dates, end_date.toordinal()) if end_date else len(self.dates)
+        return (self.positions[i] for i in range(start, end))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+class EntryIndex:
+    def __init__(self) -> None:
+        self.all = PostingList()
+        self.by_account: dict[str, PostingList] = {}
+        self.by_symbol: dict[str, PostingList] = {}
+        self.by_type: dict[type, PostingList] = {}
+
+    def add(self, position: int, entry: Entry) -> None:
+        entry_date = entry.entry_date
+        self.all.add(entry_date, position)
+        self._posting_list(self.by_type, type(entry)).add(entry_date, position)
+
+        for account_id in get_account_ids(entry):
+            self._posting_list(self.by_account, account_id).add(entry_date, position)
+
+        for symbol in get_symbols(entry):
+            self._posting_list(self.by_symbol, symbol).add(entry_date, position)
+
+    def query(
+        self,
+        entries: List[Entry],
+        account_id: str | None = None,
+        symbol: str | None = None,
+        entry_type: type | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Entry]:
+        candidates = [self.all]
+        filters: List[Tuple[object, dict[Any, PostingList]]] = [
+            (account_id, self.by_account),
+            (symbol, self.by_symbol),
+            (entry_type, self.by_type),
+        ]
+
+        for key, posting_lists in filters:
+            if key is not None:
+                posting_list = posting_lists.get(key)
+
+                if posting_list is None:
+                    return []
+
+                candidates.append(posting_list)
+
+        # Walk the most selective posting list and check the other filters
+        # against each entry directly.
+        posting_list = min(candidates, key=len)
+        results: List[Entry] = []
+
+        for position in posting_list.range(start_date, end_date):
+            if limit is not None and len(results) >= limit:
+                break
+
+            entry = entries[position]
+
+            if (
+                (entry_type is None or type(entry) is entry_type) and
+                (account_id is None or account_id in get_account_ids(entry)) and
+                (symbol is None or symbol in get_symbols(entry))
+            ):
+                if offset:
+                    offset -= 1
+                else:
+                    results.append(entry)
+
+        return results
+
+    def _posting_list(self, posting_lists: dict[Key, PostingList], key: Key) -> PostingList:
+        posting_list = posting_lists.get(key)
+
+        if posting_list is None:
+            posting_list = posting_lists[key] = PostingList()
+
+        return posting_list
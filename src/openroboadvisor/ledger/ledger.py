@@ -1,15 +1,65 @@
-from openroboadvisor.ledger.account import Account
+from bisect import bisect_right
+from collections import deque
+from datetime import date
+from decimal import Decimal
+from operator import itemgetter
+from openroboadvisor.ledger.account import Account, AccountType, Subaccount
+from openroboadvisor.ledger.asset import AssetType
 from openroboadvisor.ledger.entry import CloseAccount, Entry, OpenAccount, Transaction
-from typing import List, Callable, cast
+from openroboadvisor.ledger.index import EntryIndex, get_account_ids
+from threading import RLock
+from typing import Iterable, List, Callable, Hashable, Tuple, TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from .fork import LedgerFork
+    from .snapshot import LedgerSnapshot
+    from openroboadvisor.serialization.archive import AccountArchive
 
 
 EntryHandler = Callable[Entry, None]
+# Called after every posted leg with the account id, subaccount, asset type,
+# posted quantity and the asset's quantity before the leg was posted.
+PostListener = Callable[[str, Subaccount, AssetType, Decimal | int, Decimal | int], None]
+# Called after every appended entry with its position and the entry.
+EntryListener = Callable[[int, Entry], None]
+# Values before each change made while snapshots were open, as (version of
+# the change, old value), oldest first. Values that didn't exist yet are None.
+UndoRecords = List[Tuple[int, object]]
 
 
 class Ledger:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        trust_balanced: bool = False,
+        archive: 'AccountArchive | None' = None,
+    ) -> None:
+        # Skip the balance check for transactions that are balanced by
+        # construction (see Transaction.balanced).
+        self.trust_balanced = trust_balanced
+        # Bumped whenever previously resolved subaccounts may have been
+        # replaced, so cached handles (see AccountTemplates) are re-resolved.
+        self.generation = 0
+        # Closed accounts' state and entries are written here, if set.
+        self.archive = archive
         self.accounts: dict[str, Account] = {}
-        self.entries: List[LedgerEntry] = []
+        self.closed_account_ids: set[str] = set()
+        self.entries: List[Entry] = []
+        self.index = EntryIndex()
+        self.post_listeners: List[PostListener] = []
+        self.entry_listeners: List[EntryListener] = []
+        # Held while an entry is written, and while snapshots are opened and
+        # released, so a snapshot never sees part of an entry. Reentrant so
+        # listeners can record entries of their own.
+        self.write_lock = RLock()
+        # Bumped by every appended entry; snapshots read the ledger as of a version
+        self.version = 0
+        # Open snapshots: version -> number of snapshots of it
+        self.snapshots: dict[int, int] = {}
+        # (account id, subaccount id, asset type) or account id -> undo records,
+        # kept only while snapshots are open
+        self.history: dict[Hashable, UndoRecords] = {}
+        # (version, key) for every undo record, oldest first, for collection
+        self.undo_log: deque[Tuple[int, Hashable]] = deque()
         self.entry_handlers: dict[type, EntryHandler] = {
             OpenAccount: self.handle_open_account,
             CloseAccount: self.handle_close_account,
@@ -20,41 +70,263 @@ class Ledger:
         for entry in entries:
             entry_type = type(entry)
             entry_handler = self.entry_handlers.get(entry_type)
-            entry.validate(self.accounts)
-            self.entries.append(entry)
 
-            if entry_handler:
-                entry_handler(entry)
-            else:
+            if not entry_handler:
                 raise Exception(
                     "Unable to process entry for unknown "
                     f"entry type (type='{entry_type.__name__}')"
                 )
 
+            # Handlers validate entries before applying them.
+            with self.write_lock:
+                entry_handler(entry)
+                self.append(entry)
+
+    # Adds an entry that has already been validated and applied. Writers
+    # that post legs themselves hold write_lock from the first post until
+    # the entry is appended.
+    def append(self, entry: Entry) -> None:
+        position = len(self.entries)
+        self.index.add(position, entry)
+        self.entries.append(entry)
+        self.version += 1
+
+        for listener in self.entry_listeners:
+            listener(position, entry)
+
+    # Applies a single leg to an already resolved subaccount.
+    def post(
+        self,
+        account_id: str,
+        subaccount: Subaccount,
+        quantity: Decimal | int,
+        asset_type: AssetType,
+    ) -> None:
+        # The old quantity is kept before it's changed, so a snapshot read in
+        # between still finds it.
+        if self.snapshots:
+            self.add_undo_record(
+                (account_id, subaccount.subaccount_id, asset_type),
+                subaccount.assets.get(asset_type),
+            )
+
+        old_quantity = subaccount.inc(quantity, asset_type)
+
+        for listener in self.post_listeners:
+            listener(account_id, subaccount, asset_type, quantity, old_quantity)
+
+    # A consistent, read-only view of the ledger as it is now, which doesn't
+    # change as more entries are recorded. Close it when done (or use it as a
+    # context manager) so the history kept for it can be collected. Safe to
+    # call while another thread is recording: it waits for the entry being
+    # written, if any.
+    def snapshot(self) -> 'LedgerSnapshot':
+        from .snapshot import LedgerSnapshot
+
+        with self.write_lock:
+            version = self.version
+            self.snapshots[version] = self.snapshots.get(version, 0) + 1
+
+        return LedgerSnapshot(self, version)
+
+    def release_snapshot(self, snapshot: 'LedgerSnapshot') -> None:
+        with self.write_lock:
+            self._release_snapshot(snapshot.version)
+
+    def _release_snapshot(self, version: int) -> None:
+        count = self.snapshots.get(version)
+        assert count, f"Snapshot already released (version={version})"
+
+        if count > 1:
+            self.snapshots[version] = count - 1
+            return
+
+        del self.snapshots[version]
+
+        if not self.snapshots:
+            self.history = {}
+            self.undo_log.clear()
+            return
+
+        # Records at or before the oldest open snapshot are no longer needed
+        oldest = min(self.snapshots)
+        history = self.history
+        undo_log = self.undo_log
+
+        while undo_log and undo_log[0][0] <= oldest:
+            _, key = undo_log.popleft()
+            records = history.get(key)
+
+            if records is not None:
+                i = bisect_right(records, oldest, key=itemgetter(0))
+
+                if i == len(records):
+                    del history[key]
+                elif i:
+                    del records[:i]
+
+    # Keeps the value of key before the entry being recorded changes it. Only
+    # the first change to a key in an entry is kept.
+    def add_undo_record(self, key: Hashable, old_value: object) -> None:
+        version = self.version + 1
+        records = self.history.get(key)
+
+        if records is None:
+            records = self.history[key] = []
+        elif records[-1][0] == version:
+            return
+
+        records.append((version, old_value))
+        self.undo_log.append((version, key))
+
+    def add_post_listener(self, listener: PostListener) -> None:
+        self.post_listeners.append(listener)
+
+    def remove_post_listener(self, listener: PostListener) -> None:
+        self.post_listeners.remove(listener)
+
+    def add_entry_listener(self, listener: EntryListener) -> None:
+        self.entry_listeners.append(listener)
+
+    def remove_entry_listener(self, listener: EntryListener) -> None:
+        self.entry_listeners.remove(listener)
+
     def get_account(self, account_id: str) -> Account | None:
         return self.accounts.get(account_id)
 
+    # The account's balances at the end of as_of, summed from the legs of its
+    # entries up to that date. Closed accounts can still be looked up as
+    # long as their entries haven't been compacted away.
+    def get_account_at(self, account_id: str, as_of: date) -> Account | None:
+        account = None
+        current_account = self.accounts.get(account_id)
+
+        if current_account is not None:
+            account = Account(account_id, current_account.account_type)
+
+        for entry in self.query(account_id=account_id, end_date=as_of):
+            if isinstance(entry, OpenAccount):
+                account = account or Account(account_id, entry.account_type)
+            elif isinstance(entry, Transaction):
+                account = account or Account(account_id, AccountType.UNKNOWN)
+
+                for leg in entry.legs:
+                    if leg.account_id == account_id:
+                        account.subaccount(leg.subaccount_id).inc(leg.quantity, leg.asset_type)
+
+        return account
+
+    # Entries matching every given filter, ordered by entry date and then by
+    # the order they were recorded. The cost is proportional to the entries
+    # in the smallest matching index, not the size of the ledger.
+    def query(
+        self,
+        account_id: str | None = None,
+        symbol: str | None = None,
+        entry_type: type | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Entry]:
+        return self.index.query(
+            self.entries,
+            account_id=account_id,
+            symbol=symbol,
+            entry_type=entry_type,
+            start_date=start_date,
+            end_date=end_date,
+            offset=offset,
+            limit=limit,
+        )
+
+    def get_subaccount_for_write(self, account: Account, subaccount_id: str) -> Subaccount:
+        return account.subaccount(subaccount_id)
+
+    def fork(self) -> 'LedgerFork':
+        from .fork import LedgerFork
+        return LedgerFork(self)
+
+    # Drops entries that only involve closed accounts (and the given shared
+    # accounts, such as an external bank every account trades with), so
+    # closed accounts stop costing memory and index space. Their history is
+    # in the archive, if the ledger has one. Returns the number dropped.
+    def compact(self, shared_account_ids: Iterable[str] = ()) -> int:
+        closed_account_ids = self.closed_account_ids
+        shared = set(shared_account_ids)
+        entries = []
+
+        for entry in self.entries:
+            account_ids = get_account_ids(entry)
+
+            if not (
+                any(account_id in closed_account_ids for account_id in account_ids) and
+                all(account_id in closed_account_ids or account_id in shared for account_id in account_ids)
+            ):
+                entries.append(entry)
+
+        dropped = len(self.entries) - len(entries)
+        self.entries = entries
+        self.index = EntryIndex()
+
+        for position, entry in enumerate(entries):
+            self.index.add(position, entry)
+
+        return dropped
+
     def handle_open_account(self, entry: Entry) -> None:
         open_account_entry = cast(OpenAccount, entry)
+        open_account_entry.validate(self.accounts)
+
+        if self.snapshots:
+            self.add_undo_record(open_account_entry.account_id, None)
 
         self.accounts[open_account_entry.account_id] = Account(
             account_id=open_account_entry.account_id,
             account_type=open_account_entry.account_type,
         )
+        self.closed_account_ids.discard(open_account_entry.account_id)
 
     def handle_close_account(self, entry: Entry) -> None:
-        raise NotImplementedError
+        close_account_entry = cast(CloseAccount, entry)
+        close_account_entry.validate(self.accounts)
+        account_id = close_account_entry.account_id
+
+        if self.archive is not None:
+            self.archive.add(
+                self.accounts[account_id],
+                self.query(account_id=account_id) + [close_account_entry],
+            )
+
+        if self.snapshots:
+            self.add_undo_record(account_id, self.accounts[account_id])
+
+        del self.accounts[account_id]
+        self.closed_account_ids.add(account_id)
+        # Cached handles for the account's subaccounts are no longer valid
+        self.generation += 1
 
     def handle_transaction(self, entry: Entry) -> None:
         transaction = cast(Transaction, entry)
+        legs = transaction.legs
+        accounts = self.accounts
+        # Resolve every leg's account once; the same objects are used to
+        # validate and to apply the transaction.
+        leg_accounts = []
 
-        for leg in transaction.legs:
-            account = self.accounts.get(leg.account_id)
+        for leg in legs:
+            account = accounts.get(leg.account_id)
 
             assert account, (
-                "Leg references an account that doesn't exist "
+                "Transaction references missing account "
                 f"(account_id='{leg.account_id}')"
             )
 
-            subaccount = account.subaccount(leg.subaccount_id)
-            subaccount.inc(leg.quantity, leg.asset_type)
+            leg_accounts.append(account)
+
+        if not (self.trust_balanced and transaction.balanced):
+            transaction.validate_quantities()
+
+        for leg, account in zip(legs, leg_accounts):
+            subaccount = self.get_subaccount_for_write(account, leg.subaccount_id)
+            self.post(leg.account_id, subaccount, leg.quantity, leg.asset_type)
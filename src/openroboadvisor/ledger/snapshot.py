@@ -0,0 +1,147 @@
+from bisect import bisect_right
+from collections.abc import Mapping
+from decimal import Decimal
+from math import inf
+from openroboadvisor.ledger.account import Account, Subaccount
+from openroboadvisor.ledger.asset import AssetType
+from openroboadvisor.ledger.ledger import Ledger, UndoRecords
+from operator import itemgetter
+from typing import Iterator, Tuple, cast
+
+
+# The accounts open as of a snapshot, copied out of the ledger on access.
+class SnapshotAccounts(Mapping[str, Account]):
+    def __init__(self, snapshot: 'LedgerSnapshot') -> None:
+        self.snapshot = snapshot
+
+    def __getitem__(self, account_id: str) -> Account:
+        account = self.snapshot.get_account(account_id)
+
+        if account is None:
+            raise KeyError(account_id)
+
+        return account
+
+    def __contains__(self, account_id: object) -> bool:
+        return isinstance(account_id, str) and self.snapshot._resolve_account(account_id)[0] is not None
+
+    def __iter__(self) -> Iterator[str]:
+        snapshot = self.snapshot
+        accounts = snapshot.ledger.accounts
+
+        for account_id in list(accounts):
+            if snapshot._resolve_account(account_id)[0] is not None:
+                yield account_id
+
+        # Accounts closed since the snapshot was taken
+        for key in list(snapshot.ledger.history):
+            if type(key) is str and key not in accounts and snapshot._resolve_account(key)[0] is not None:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+# A read-only view of a ledger as of a version, for readers that need a
+# consistent view of balances (an advisor run, say) while entries keep being
+# recorded. Nothing is copied when the snapshot is taken: while any snapshot
+# is open, the ledger keeps the old value of every subaccount quantity and
+# account it changes, and reads roll the current state back through those
+# values. Writers only wait for snapshots to be opened and closed, never for
+# reads, and the history is collected as snapshots are closed.
+#
+# Snapshots can stand in for a ledger wherever balances are only read, e.g.
+# Portfolio(ledger.snapshot()) to run an advisor, and can be taken from any
+# thread while another one records. They're closed when used as a context
+# manager, or at the latest when they're garbage collected.
+class LedgerSnapshot:
+    def __init__(self, ledger: Ledger, version: int) -> None:
+        self.ledger = ledger
+        self.version = version
+        self.closed = False
+        # Account templates are built against a ledger, but never write to a snapshot
+        self.generation = 0
+
+    def __enter__(self) -> 'LedgerSnapshot':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+    # Not kept on the snapshot, so dropping the last reference to a snapshot
+    # collects it right away.
+    @property
+    def accounts(self) -> Mapping[str, Account]:
+        return SnapshotAccounts(self)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.ledger.release_snapshot(self)
+
+    # A copy of the account as of the snapshot. Current quantities are read
+    # before their undo records, so a change made in between is still
+    # rolled back.
+    def get_account(self, account_id: str) -> Account | None:
+        assert not self.closed, f"Snapshot is closed (version={self.version})"
+
+        account, limit = self._resolve_account(account_id)
+
+        if account is None:
+            return None
+
+        history = self.ledger.history
+        copy = Account(account_id, account.account_type)
+
+        for subaccount_id, subaccount in list(account.subaccounts.items()):
+            current_assets = list(subaccount.assets.items())
+            assets: dict[AssetType, Decimal] = {}
+
+            for asset_type, quantity in current_assets:
+                records = history.get((account_id, subaccount_id, asset_type))
+
+                if records is not None:
+                    old_quantity = cast(Decimal | None, self._get_value(records, quantity, limit))
+
+                    # Not yet held as of the snapshot
+                    if old_quantity is None:
+                        continue
+
+                    quantity = old_quantity
+
+                assets[asset_type] = quantity
+
+            # Subaccounts first written to after the snapshot are left out
+            if assets or not current_assets:
+                copy.subaccounts[subaccount_id] = Subaccount(subaccount_id, assets)
+
+        return copy
+
+    # The account object as of the snapshot, and the version before which
+    # its quantities' undo records apply. An account closed since the
+    # snapshot is the object that was closed, and changes made to an account
+    # reopened under the same id don't apply to it.
+    def _resolve_account(self, account_id: str) -> Tuple[Account | None, float]:
+        ledger = self.ledger
+        account = ledger.accounts.get(account_id)
+        records = ledger.history.get(account_id)
+
+        if records is not None:
+            i = bisect_right(records, self.version, key=itemgetter(0))
+
+            if i < len(records):
+                version, old_account = records[i]
+                return cast(Account | None, old_account), version
+
+        return account, inf
+
+    def _get_value(self, records: UndoRecords, current: object, limit: float) -> object:
+        i = bisect_right(records, self.version, key=itemgetter(0))
+
+        if i < len(records) and records[i][0] < limit:
+            return records[i][1]
+
+        return current
@@ -0,0 +1,561 @@
+import sqlite3
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping, Sequence
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.account import Account, AccountType, Subaccount
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import CloseAccount, Entry, OpenAccount, Transaction, TransactionLeg
+from openroboadvisor.ledger.ledger import Ledger
+from openroboadvisor.ledger.snapshot import LedgerSnapshot
+from typing import Iterable, Iterator, List, Tuple, cast, overload
+
+
+OPEN_ACCOUNT = 1
+CLOSE_ACCOUNT = 2
+TRANSACTION = 3
+ENTRY_TYPES: dict[type, int] = {
+    OpenAccount: OPEN_ACCOUNT,
+    CloseAccount: CLOSE_ACCOUNT,
+    Transaction: TRANSACTION,
+}
+
+CURRENCY = 0
+SECURITY = 1
+
+# Buffered rows are written once there are this many legs
+FLUSH_SIZE = 10000
+# SQLite's default limit on host parameters in a statement
+MAX_PARAMETERS = 999
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id TEXT PRIMARY KEY,
+    account_type INTEGER NOT NULL,
+    is_open INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    entry_id INTEGER PRIMARY KEY,
+    entry_type INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL,
+    account_id TEXT,
+    account_type INTEGER,
+    balanced INTEGER NOT NULL DEFAULT 0,
+    exempt_subaccount_ids TEXT
+);
+CREATE TABLE IF NOT EXISTS legs (
+    entry_id INTEGER NOT NULL,
+    leg_index INTEGER NOT NULL,
+    account_id TEXT NOT NULL,
+    subaccount_id TEXT NOT NULL,
+    asset_kind INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    lot TEXT,
+    quantity TEXT NOT NULL,
+    cost_quantity TEXT,
+    cost_symbol TEXT,
+    PRIMARY KEY (entry_id, leg_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS legs_by_asset ON legs (account_id, subaccount_id, asset_kind, symbol, lot);
+CREATE INDEX IF NOT EXISTS entries_by_date ON entries (entry_date);
+CREATE INDEX IF NOT EXISTS entries_by_account ON entries (account_id) WHERE account_id IS NOT NULL;
+'''
+
+EntryRow = Tuple[int, int, int, str | None, int | None, int, str | None]
+LegRow = Tuple[int, int, str, str, int, str, str | None, str, str | None, str | None]
+
+
+# Sums decimal strings exactly; SQLite's own SUM works in floating point.
+class DecimalSum:
+    def __init__(self) -> None:
+        self.total = Decimal(0)
+
+    def step(self, value: str) -> None:
+        self.total += Decimal(value)
+
+    def finalize(self) -> str:
+        return str(self.total)
+
+
+def get_asset(kind: int, symbol: str, lot: str | None) -> AssetType:
+    return Security(symbol, lot) if kind == SECURITY else Currency(symbol)
+
+
+# Adds up the account's legs matching clause into its subaccounts.
+def load_balances(
+    connection: sqlite3.Connection,
+    account: Account,
+    clause: str,
+    parameters: List[object],
+) -> None:
+    rows = connection.execute(
+        'SELECT subaccount_id, asset_kind, symbol, lot, decimal_sum(quantity) '
+        f"FROM legs {clause or 'WHERE'} legs.account_id = ? "
+        'GROUP BY subaccount_id, asset_kind, symbol, lot',
+        parameters,
+    )
+
+    for subaccount_id, kind, symbol, lot, quantity in rows:
+        subaccount = account.subaccounts.get(subaccount_id)
+
+        if subaccount is None:
+            subaccount = account.subaccounts[subaccount_id] = Subaccount(subaccount_id)
+
+        subaccount.assets[get_asset(kind, symbol, lot)] = Decimal(quantity)
+
+
+def load_open_account(connection: sqlite3.Connection, account_id: str) -> Account | None:
+    row = connection.execute(
+        'SELECT account_type FROM accounts WHERE account_id = ? AND is_open = 1',
+        [account_id],
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    # Only legs since the account was last opened, so an account reopened
+    # under the same id starts fresh, as it does in memory
+    account = Account(account_id, AccountType(row[0]))
+    load_balances(
+        connection,
+        account,
+        'WHERE entry_id > (SELECT MAX(entry_id) FROM entries WHERE entry_type = ? AND account_id = ?) AND',
+        [OPEN_ACCOUNT, account_id, account_id],
+    )
+    return account
+
+
+# Open accounts, loaded on first use and kept in a bounded LRU cache. Account
+# objects are rebuilt from their legs with SQL aggregation when they are not
+# cached, so only recently used accounts are held in memory.
+class SqliteAccounts(MutableMapping[str, Account]):
+    def __init__(self, ledger: 'SqliteLedger', max_cached_accounts: int) -> None:
+        self.ledger = ledger
+        self.max_cached_accounts = max_cached_accounts
+        self.cache: OrderedDict[str, Account] = OrderedDict()
+
+    def __getitem__(self, account_id: str) -> Account:
+        account = self.cache.get(account_id)
+
+        if account is not None:
+            self.cache.move_to_end(account_id)
+            return account
+
+        account = self.ledger.load_account(account_id)
+
+        if account is None:
+            raise KeyError(account_id)
+
+        self._cache(account)
+        return account
+
+    def __setitem__(self, account_id: str, account: Account) -> None:
+        self.ledger.pending_accounts[account_id] = (account_id, account.account_type.value, 1)
+        self._cache(account)
+
+    def __delitem__(self, account_id: str) -> None:
+        account = self[account_id]
+        self.ledger.pending_accounts[account_id] = (account_id, account.account_type.value, 0)
+        del self.cache[account_id]
+
+    # Answered from the accounts table alone, so checking an account that
+    # is being opened doesn't have to flush the buffered writes.
+    def __contains__(self, account_id: object) -> bool:
+        if not isinstance(account_id, str):
+            return False
+
+        if account_id in self.cache:
+            return True
+
+        pending = self.ledger.pending_accounts.get(account_id)
+
+        if pending is not None:
+            return bool(pending[2])
+
+        return self.ledger.connection.execute(
+            'SELECT 1 FROM accounts WHERE account_id = ? AND is_open = 1',
+            [account_id],
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        self.ledger.flush()
+        rows = self.ledger.connection.execute(
+            'SELECT account_id FROM accounts WHERE is_open = 1 ORDER BY rowid'
+        ).fetchall()
+        return (account_id for account_id, in rows)
+
+    def __len__(self) -> int:
+        self.ledger.flush()
+        return int(self.ledger.connection.execute('SELECT COUNT(*) FROM accounts WHERE is_open = 1').fetchone()[0])
+
+    def _cache(self, account: Account) -> None:
+        self.cache[account.account_id] = account
+
+        if len(self.cache) > self.max_cached_accounts:
+            self.cache.popitem(last=False)
+            # Handles to the evicted account's subaccounts must be re-resolved
+            self.ledger.generation += 1
+
+
+# Every entry, in the order it was recorded, read from the database on demand.
+class SqliteEntries(Sequence[Entry]):
+    def __init__(self, ledger: 'SqliteLedger') -> None:
+        self.ledger = ledger
+
+    def __len__(self) -> int:
+        return self.ledger.entry_count
+
+    @overload
+    def __getitem__(self, position: int) -> Entry: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> List[Entry]: ...
+
+    def __getitem__(self, position: int | slice) -> Entry | List[Entry]:
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+
+        if position < 0:
+            position += len(self)
+
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+
+        return self.ledger.load_entries('WHERE entry_id = ?', [position + 1])[0]
+
+    def __iter__(self) -> Iterator[Entry]:
+        page_size = 10000
+
+        for start in range(0, len(self), page_size):
+            yield from self.ledger.load_entries(
+                'WHERE entry_id > ? AND entry_id <= ? ORDER BY entry_id',
+                [start, start + page_size],
+            )
+
+
+# The accounts open as of a SqliteSnapshot, loaded on access.
+class SqliteSnapshotAccounts(Mapping[str, Account]):
+    def __init__(self, snapshot: 'SqliteSnapshot') -> None:
+        self.snapshot = snapshot
+
+    def __getitem__(self, account_id: str) -> Account:
+        account = self.snapshot.get_account(account_id)
+
+        if account is None:
+            raise KeyError(account_id)
+
+        return account
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self.snapshot.connection.execute(
+            'SELECT account_id FROM accounts WHERE is_open = 1 ORDER BY rowid'
+        ).fetchall()
+        return (account_id for account_id, in rows)
+
+    def __len__(self) -> int:
+        return int(self.snapshot.connection.execute('SELECT COUNT(*) FROM accounts WHERE is_open = 1').fetchone()[0])
+
+
+# A SqliteLedger as of the last commit before the snapshot was taken. It
+# reads through a connection of its own, held in a read transaction, and
+# SQLite's write-ahead log keeps that transaction's view of the database
+# unchanged while the ledger writes, so the ledger keeps no history for it.
+class SqliteSnapshot(LedgerSnapshot):
+    def __init__(self, ledger: 'SqliteLedger', version: int) -> None:
+        # Closed from whichever thread collects it
+        self.connection = sqlite3.connect(ledger.path, check_same_thread=False)
+        super().__init__(ledger, version)
+        self.connection.create_aggregate('decimal_sum', 1, DecimalSum)  # type: ignore[arg-type]
+        # The view is fixed by the transaction's first read
+        self.connection.execute('BEGIN')
+        self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()
+
+    @property
+    def accounts(self) -> Mapping[str, Account]:
+        return SqliteSnapshotAccounts(self)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.connection.close()
+
+    def get_account(self, account_id: str) -> Account | None:
+        assert not self.closed, f"Snapshot is closed (version={self.version})"
+
+        return load_open_account(self.connection, account_id)
+
+
+# A ledger stored in a SQLite database. Entries and their legs are written
+# to normalized tables in batches, and balances, point-in-time balances and
+# entry queries are answered with SQL, so the ledger never has to be loaded
+# into memory. Writes are buffered until the end of each record() call or
+# batch(), the buffer fills, the database is read, or the ledger is flushed
+# or closed; entries appended outside of those are committed right away.
+# There is no in-memory EntryIndex, so code that walks ledger.index directly
+# should use query() instead.
+class SqliteLedger(Ledger):
+    accounts: SqliteAccounts  # type: ignore[assignment]
+    entries: SqliteEntries  # type: ignore[assignment]
+
+    def __init__(
+        self,
+        path: str,
+        trust_balanced: bool = False,
+        max_cached_accounts: int = 100000,
+    ) -> None:
+        assert max_cached_accounts >= 16, (
+            f"Too few cached accounts to record transactions (max_cached_accounts={max_cached_accounts})"
+        )
+
+        super().__init__(trust_balanced=trust_balanced)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.connection.create_aggregate('decimal_sum', 1, DecimalSum)  # type: ignore[arg-type]
+        self.pending_accounts: dict[str, Tuple[str, int, int]] = {}
+        self.pending_entries: List[EntryRow] = []
+        self.pending_legs: List[LegRow] = []
+        self.accounts = SqliteAccounts(self, max_cached_accounts)
+        self.entries = SqliteEntries(self)
+        # Nesting depth of record() calls and batches; writes outside them are
+        # committed as soon as they are appended
+        self.batch_depth = 0
+        self.entry_count: int = self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        # The version of the last commit, which snapshots read as of
+        self.committed_version = 0
+        self.closed_account_ids = {
+            account_id for account_id, in self.connection.execute(
+                'SELECT account_id FROM accounts WHERE is_open = 0'
+            )
+        }
+
+    def record(self, *entries: Entry) -> None:
+        with self.batch():
+            super().record(*entries)
+
+    # Buffers every write made inside it, including those appended directly
+    # (see AccountTemplates), and commits them together when it exits.
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        self.batch_depth += 1
+
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+
+            if not self.batch_depth:
+                self.flush()
+
+    def append(self, entry: Entry) -> None:
+        position = self.entry_count
+        entry_id = position + 1
+        entry_type = type(entry)
+
+        if entry_type is Transaction:
+            transaction = cast(Transaction, entry)
+            self.pending_entries.append((
+                entry_id, TRANSACTION, entry.entry_date.toordinal(), None, None, int(transaction.balanced), None,
+            ))
+
+            for i, leg in enumerate(transaction.legs):
+                asset_type = leg.asset_type
+                cost = leg.cost
+                self.pending_legs.append((
+                    entry_id,
+                    i,
+                    leg.account_id,
+                    leg.subaccount_id,
+                    SECURITY if isinstance(asset_type, Security) else CURRENCY,
+                    asset_type.symbol,
+                    getattr(asset_type, 'lot', None),
+                    str(leg.quantity),
+                    str(cost[0]) if cost else None,
+                    cost[1].symbol if cost else None,
+                ))
+        elif entry_type is OpenAccount:
+            open_account = cast(OpenAccount, entry)
+            self.pending_entries.append((
+                entry_id, OPEN_ACCOUNT, entry.entry_date.toordinal(), open_account.account_id,
+                open_account.account_type.value, 0, None,
+            ))
+        elif entry_type is CloseAccount:
+            close_account = cast(CloseAccount, entry)
+            self.pending_entries.append((
+                entry_id, CLOSE_ACCOUNT, entry.entry_date.toordinal(), close_account.account_id,
+                None, 0, '\x1f'.join(close_account.exempt_subaccount_ids),
+            ))
+        else:
+            raise Exception(
+                "Unable to store entry for unknown "
+                f"entry type (type='{entry_type.__name__}')"
+            )
+
+        self.entry_count += 1
+        self.version += 1
+
+        for listener in self.entry_listeners:
+            listener(position, entry)
+
+        if not self.batch_depth or len(self.pending_legs) >= FLUSH_SIZE:
+            self.flush()
+
+    # Entries still buffered in a record() call or batch aren't in the
+    # snapshot until they are committed. Snapshots can be taken from any
+    # thread, since they don't touch the writer's connection.
+    def snapshot(self) -> LedgerSnapshot:
+        assert self.path != ':memory:', "Unable to snapshot an in-memory SQLite ledger"
+
+        with self.write_lock:
+            return SqliteSnapshot(self, self.committed_version)
+
+    def flush(self) -> None:
+        if not (self.pending_accounts or self.pending_entries or self.pending_legs):
+            return
+
+        # Snapshots are opened between commits, never during one
+        with self.write_lock:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)',
+                    self.pending_accounts.values(),
+                )
+                self.connection.executemany(
+                    'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    self.pending_entries,
+                )
+                self.connection.executemany(
+                    'INSERT INTO legs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    self.pending_legs,
+                )
+
+            self.pending_accounts = {}
+            self.pending_entries = []
+            self.pending_legs = []
+            self.committed_version = self.version
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
+
+    def load_account(self, account_id: str) -> Account | None:
+        self.flush()
+        return load_open_account(self.connection, account_id)
+
+    def get_account_at(self, account_id: str, as_of: date) -> Account | None:
+        self.flush()
+        row = self.connection.execute(
+            'SELECT account_type FROM accounts WHERE account_id = ?',
+            [account_id],
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        account = Account(account_id, AccountType(row[0]))
+        load_balances(
+            self.connection,
+            account,
+            'JOIN entries USING (entry_id) WHERE entry_date <= ? AND',
+            [as_of.toordinal(), account_id],
+        )
+        return account
+
+    def query(
+        self,
+        account_id: str | None = None,
+        symbol: str | None = None,
+        entry_type: type | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Entry]:
+        conditions = []
+        parameters: List[object] = []
+
+        if account_id is not None:
+            conditions.append(
+                'entry_id IN (SELECT entry_id FROM legs WHERE account_id = ? '
+                'UNION SELECT entry_id FROM entries WHERE account_id = ?)'
+            )
+            parameters += [account_id, account_id]
+
+        if symbol is not None:
+            conditions.append('entry_id IN (SELECT entry_id FROM legs WHERE symbol = ?)')
+            parameters.append(symbol)
+
+        if entry_type is not None:
+            conditions.append('entry_type = ?')
+            parameters.append(ENTRY_TYPES.get(entry_type, 0))
+
+        if start_date is not None:
+            conditions.append('entry_date >= ?')
+            parameters.append(start_date.toordinal())
+
+        if end_date is not None:
+            conditions.append('entry_date <= ?')
+            parameters.append(end_date.toordinal())
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self.load_entries(
+            f'{where} ORDER BY entry_date, entry_id LIMIT ? OFFSET ?',
+            parameters + [-1 if limit is None else limit, offset],
+        )
+
+    # Entries are on disk rather than in memory, so there is nothing to gain
+    # from dropping closed accounts' history; nothing is dropped.
+    def compact(self, shared_account_ids: Iterable[str] = ()) -> int:
+        return 0
+
+    def load_entries(self, clause: str, parameters: List[object]) -> List[Entry]:
+        self.flush()
+        rows = self.connection.execute(
+            'SELECT entry_id, entry_type, entry_date, account_id, account_type, balanced, exempt_subaccount_ids '
+            f'FROM entries {clause}',
+            parameters,
+        ).fetchall()
+        legs = self._load_legs([row[0] for row in rows if row[1] == TRANSACTION])
+        entries: List[Entry] = []
+
+        for entry_id, entry_type, ordinal, account_id, account_type, balanced, exempt in rows:
+            entry_date = date.fromordinal(ordinal)
+
+            if entry_type == TRANSACTION:
+                entries.append(Transaction(*legs.get(entry_id, []), entry_date=entry_date, balanced=bool(balanced)))
+            elif entry_type == OPEN_ACCOUNT:
+                entries.append(OpenAccount(account_id, AccountType(account_type), entry_date))
+            else:
+                entries.append(CloseAccount(
+                    account_id,
+                    entry_date,
+                    tuple(exempt.split('\x1f')) if exempt else (),
+                ))
+
+        return entries
+
+    def _load_legs(self, entry_ids: List[int]) -> dict[int, List[TransactionLeg]]:
+        legs: dict[int, List[TransactionLeg]] = {}
+
+        for start in range(0, len(entry_ids), MAX_PARAMETERS):
+            chunk = entry_ids[start:start + MAX_PARAMETERS]
+            rows = self.connection.execute(
+                'SELECT entry_id, account_id, subaccount_id, asset_kind, symbol, lot, '
+                'quantity, cost_quantity, cost_symbol '
+                f"FROM legs WHERE entry_id IN ({','.join('?' * len(chunk))}) ORDER BY entry_id, leg_index",
+                chunk,
+            )
+
+            for entry_id, account_id, subaccount_id, kind, symbol, lot, quantity, cost_quantity, cost_symbol in rows:
+                legs.setdefault(entry_id, []).append(TransactionLeg(
+                    account_id,
+                    subaccount_id,
+                    get_asset(kind, symbol, lot),
+                    Decimal(quantity),
+                    (Decimal(cost_quantity), Currency(cost_symbol)) if cost_quantity is not None else None,
+                ))
+
+        return legs
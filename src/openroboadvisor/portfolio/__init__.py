@@ -1,3 +1,10 @@
-from .portfolio import Portfolio
+from openroboadvisor.lazy import lazy_exports
+from typing import TYPE_CHECKING
 
-__all__ = [Portfolio.__name__]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .portfolio import Portfolio
+
+__all__ = ['Portfolio']
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Portfolio': '.portfolio',
+})
@@ -1,15 +1,23 @@
+from .fx import FxRates, Quote, get_price
+from .templates import (
+    AccountTemplates,
+    BUY,
+    DEPOSIT,
+    # Re-exported: these used to be defined here
+    EXTERNAL_BANK_ID as EXTERNAL_BANK_ID,
+    FEES_SUBACCOUNT_ID as FEES_SUBACCOUNT_ID,
+    PENDING_SUBACCOUNT_ID,
+    SELL,
+    SETTLED_SUBACCOUNT_ID,
+    WITHDRAW,
+)
 from datetime import date
 from decimal import Decimal
 from openroboadvisor.ledger import Ledger
 from openroboadvisor.ledger.account import Subaccount
 from openroboadvisor.ledger.asset import AssetType, Currency, Security
-from openroboadvisor.ledger.entry import Transaction, TransactionLeg
-
-
-EXTERNAL_BANK_ID = '__external_bank'
-PENDING_SUBACCOUNT_ID = 'pending'
-SETTLED_SUBACCOUNT_ID = 'settled'
-FEES_SUBACCOUNT_ID = 'fees'
+from openroboadvisor.ledger.entry import Transaction
+from typing import Tuple, cast
 
 
 class Balances:
@@ -46,27 +54,79 @@ class Balances:
 
         return settled
 
-    def get_asset_amounts(self, asset_type: AssetType, quotes: dict[AssetType, Decimal]) -> dict[AssetType, Decimal]:
-        asset_quantities = self.get_asset_quantities(asset_type)
-        asset_amounts: dict[AssetType, Decmal] = {}
-
-        for asset_type, quantity in asset_quantities.items():
-            quote = quotes.get(asset_type)
-            # TODO assert quote
-            asset_amounts[asset_type] = quote * quantity
+    def get_asset_amounts(
+        self,
+        asset_type: AssetType,
+        quotes: dict[AssetType, Quote],
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+    ) -> dict[AssetType, Decimal]:
+        return self._get_amounts(
+            self.get_asset_quantities(asset_type),
+            quotes,
+            fx,
+            currency,
+        )
 
-        return asset_amounts
+    def get_amounts(
+        self,
+        quotes: dict[AssetType, Quote],
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+    ) -> dict[AssetType, Decimal]:
+        quantities = cast(dict[AssetType, Decimal], self.cash) | cast(dict[AssetType, Decimal], self.securities)
+        return self._get_amounts(quantities, quotes, fx, currency)
 
-    def total(self, quotes: dict[AssetType, Decimal]) -> Decimal:
+    def total(
+        self,
+        quotes: dict[AssetType, Quote],
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+    ) -> Decimal:
+        reporting_currency = Currency(currency)
         total_balance = Decimal(0)
+        # Sum each quote currency separately and convert every subtotal once.
+        foreign_totals: dict[Currency, Decimal] = {}
 
         for asset, quantity in (self.cash | self.securities).items():
-            quote = quotes.get(asset.without_lot()) if isinstance(asset, Security) else quotes.get(asset)
-            assert quote, f"Unable to find quote (asset={asset})"
-            total_balance += quote * quantity
+            price, quote_currency = get_price(asset, quotes, reporting_currency)
+
+            if quote_currency == reporting_currency:
+                total_balance += price * quantity
+            else:
+                foreign_totals[quote_currency] = foreign_totals.get(quote_currency, 0) + price * quantity
+
+        if foreign_totals:
+            assert fx, f"Unable to convert balances without FX rates (currencies={list(foreign_totals)})"
+
+            for quote_currency, amount in foreign_totals.items():
+                total_balance += fx.convert(amount, quote_currency, reporting_currency)
 
         return total_balance
 
+    def _get_amounts(
+        self,
+        asset_quantities: dict[AssetType, Decimal],
+        quotes: dict[AssetType, Quote],
+        fx: FxRates | None,
+        currency: str,
+    ) -> dict[AssetType, Decimal]:
+        reporting_currency = Currency(currency)
+        rates = fx.get_rates(reporting_currency) if fx else {reporting_currency: 1}
+        asset_amounts: dict[AssetType, Decimal] = {}
+
+        for asset, quantity in asset_quantities.items():
+            price, quote_currency = get_price(asset, quotes, reporting_currency)
+
+            if quote_currency == reporting_currency:
+                asset_amounts[asset] = price * quantity
+            else:
+                rate = rates.get(quote_currency)
+                assert rate, f"No FX conversion path (from_currency={quote_currency}, to_currency={reporting_currency})"
+                asset_amounts[asset] = price * quantity * rate
+
+        return asset_amounts
+
 
 class Account:
     def __init__(
@@ -76,13 +136,19 @@ class Account:
     ) -> None:
         self.account_id = account_id
         self.ledger = ledger
+        self.templates = AccountTemplates(ledger, account_id)
 
     def get_balances(
         self,
         include_pending: bool = True,
         include_lots: bool = False,
+        as_of: date | None = None,
     ) -> Balances:
-        ledger_account = self.ledger.get_account(self.account_id)
+        if as_of is None:
+            ledger_account = self.ledger.get_account(self.account_id)
+        else:
+            ledger_account = self.ledger.get_account_at(self.account_id, as_of)
+
         assert ledger_account, \
             f"No ledger account found (account_id='{self.account_id}')"
         return Balances(
@@ -103,42 +169,27 @@ class Account:
         transfer_date: date | None = None,
         settlement_date: date | None = None,
     ) -> None:
-        resolved_amount = Decimal(amount)
-        resolved_currency = Currency(currency)
-        resolved_transfer_date = transfer_date or date.today()
-        resolved_settlement_date = settlement_date or resolved_transfer_date
+        self.templates.fill(
+            DEPOSIT,
+            currency=currency,
+            amount=Decimal(amount),
+            trade_date=transfer_date,
+            settlement_date=settlement_date,
+        )
 
-        self.ledger.record(
-            Transaction(
-                TransactionLeg(
-                    account_id=EXTERNAL_BANK_ID,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-resolved_amount,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount
-                ),
-                entry_date=resolved_transfer_date,
-            ),
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-resolved_amount,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=SETTLED_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount,
-                ),
-                entry_date=resolved_settlement_date,
-            ),
+    def deposit_entries(
+        self,
+        amount: Decimal | int,
+        currency: str = 'USD',
+        transfer_date: date | None = None,
+        settlement_date: date | None = None,
+    ) -> Tuple[Transaction, ...]:
+        return self.templates.materialize(
+            DEPOSIT,
+            currency=currency,
+            amount=Decimal(amount),
+            trade_date=transfer_date,
+            settlement_date=settlement_date,
         )
 
     def withdraw(
@@ -148,42 +199,27 @@ class Account:
         transfer_date: date | None = None,
         settlement_date: date | None = None,
     ) -> None:
-        resolved_amount = Decimal(amount)
-        resolved_currency = Currency(currency)
-        resolved_transfer_date = transfer_date or date.today()
-        resolved_settlement_date = settlement_date or resolved_transfer_date
+        self.templates.fill(
+            WITHDRAW,
+            currency=currency,
+            amount=Decimal(amount),
+            trade_date=transfer_date,
+            settlement_date=settlement_date,
+        )
 
-        self.ledger.record(
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-resolved_amount
-                ),
-                TransactionLeg(
-                    account_id=EXTERNAL_BANK_ID,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount,
-                ),
-                entry_date=resolved_transfer_date,
-            ),
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=SETTLED_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-resolved_amount,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount,
-                ),
-                entry_date=resolved_settlement_date,
-            ),
+    def withdraw_entries(
+        self,
+        amount: Decimal | int,
+        currency: str = 'USD',
+        transfer_date: date | None = None,
+        settlement_date: date | None = None,
+    ) -> Tuple[Transaction, ...]:
+        return self.templates.materialize(
+            WITHDRAW,
+            currency=currency,
+            amount=Decimal(amount),
+            trade_date=transfer_date,
+            settlement_date=settlement_date,
         )
 
     def buy(
@@ -197,64 +233,37 @@ class Account:
         settlement_date: date | None = None,
         lot: str | None = None,
     ) -> None:
-        resolved_security = Security(symbol, lot)
-        resolved_shares = Decimal(shares)
-        resolved_amount = Decimal(amount)
-        resolved_fees = Decimal(fees)
-        resolved_currency = Currency(currency)
-        resolved_trade_date = trade_date or date.today()
-        resolved_settlement_date = settlement_date or resolved_trade_date
+        self.templates.fill(
+            BUY,
+            currency=currency,
+            amount=Decimal(amount),
+            shares=Decimal(shares),
+            fees=Decimal(fees),
+            security=self.templates.security(symbol, lot),
+            trade_date=trade_date,
+            settlement_date=settlement_date,
+        )
 
-        self.ledger.record(
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-(resolved_amount + resolved_fees),
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=FEES_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_fees,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_security,
-                    quantity=resolved_shares,
-                    cost=(resolved_amount, resolved_currency)
-                ),
-                entry_date=resolved_trade_date,
-            ),
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=SETTLED_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-(resolved_amount + resolved_fees),
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount + resolved_fees,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_security,
-                    quantity=-resolved_shares,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=SETTLED_SUBACCOUNT_ID,
-                    asset_type=resolved_security,
-                    quantity=resolved_shares,
-                ),
-                entry_date=resolved_settlement_date,
-            ),
+    def buy_entries(
+        self,
+        symbol: str,
+        shares: Decimal | int,
+        amount: Decimal | int,
+        fees: Decimal | int = 0,
+        currency: str = 'USD',
+        trade_date: date | None = None,
+        settlement_date: date | None = None,
+        lot: str | None = None,
+    ) -> Tuple[Transaction, ...]:
+        return self.templates.materialize(
+            BUY,
+            currency=currency,
+            amount=Decimal(amount),
+            shares=Decimal(shares),
+            fees=Decimal(fees),
+            security=self.templates.security(symbol, lot),
+            trade_date=trade_date,
+            settlement_date=settlement_date,
         )
 
     def sell(
@@ -268,62 +277,35 @@ class Account:
         settlement_date: date | None = None,
         lot: str | None = None,
     ) -> None:
-        resolved_security = Security(symbol, lot)
-        resolved_shares = Decimal(shares)
-        resolved_amount = Decimal(amount)
-        resolved_fees = Decimal(fees)
-        resolved_currency = Currency(currency)
-        resolved_trade_date = trade_date or date.today()
-        resolved_settlement_date = settlement_date or resolved_trade_date
+        self.templates.fill(
+            SELL,
+            currency=currency,
+            amount=Decimal(amount),
+            shares=Decimal(shares),
+            fees=Decimal(fees),
+            security=self.templates.security(symbol, lot),
+            trade_date=trade_date,
+            settlement_date=settlement_date,
+        )
 
-        self.ledger.record(
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount - resolved_fees,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=FEES_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_fees,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_security,
-                    quantity=-resolved_shares,
-                    cost=(-amount, resolved_currency)
-                ),
-                entry_date=resolved_trade_date,
-            ),
-            Transaction(
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=-(resolved_amount - resolved_fees),
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=SETTLED_SUBACCOUNT_ID,
-                    asset_type=resolved_currency,
-                    quantity=resolved_amount - resolved_fees,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=SETTLED_SUBACCOUNT_ID,
-                    asset_type=resolved_security,
-                    quantity=-resolved_shares,
-                ),
-                TransactionLeg(
-                    account_id=self.account_id,
-                    subaccount_id=PENDING_SUBACCOUNT_ID,
-                    asset_type=resolved_security,
-                    quantity=resolved_shares,
-                ),
-                entry_date=resolved_settlement_date,
-            ),
+    def sell_entries(
+        self,
+        symbol: str,
+        shares: Decimal | int,
+        amount: Decimal | int,
+        fees: Decimal | int = 0,
+        currency: str = 'USD',
+        trade_date: date | None = None,
+        settlement_date: date | None = None,
+        lot: str | None = None,
+    ) -> Tuple[Transaction, ...]:
+        return self.templates.materialize(
+            SELL,
+            currency=currency,
+            amount=Decimal(amount),
+            shares=Decimal(shares),
+            fees=Decimal(fees),
+            security=self.templates.security(symbol, lot),
+            trade_date=trade_date,
+            settlement_date=settlement_date,
         )
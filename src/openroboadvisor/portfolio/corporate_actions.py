@@ -0,0 +1,197 @@
+from .templates import EXTERNAL_BANK_ID, PENDING_SUBACCOUNT_ID, SETTLED_SUBACCOUNT_ID
+from abc import ABC, abstractmethod
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import Subaccount
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import Transaction, TransactionLeg
+from typing import List, Tuple
+
+
+# (account id, subaccount id, security with or without a lot)
+Holding = Tuple[str, str, Security]
+
+
+# Every account, subaccount and lot holding a nonzero quantity of each
+# symbol, kept up to date from every leg the ledger posts.
+class HoldersIndex:
+    def __init__(self, ledger: Ledger) -> None:
+        self.ledger = ledger
+        self.holders: dict[str, set[Holding]] = {}
+
+        for account_id, account in ledger.accounts.items():
+            for subaccount in account.subaccounts.values():
+                for asset_type, quantity in subaccount.assets.items():
+                    self.on_post(account_id, subaccount, asset_type, quantity, 0)
+
+        ledger.add_post_listener(self.on_post)
+
+    def on_post(
+        self,
+        account_id: str,
+        subaccount: Subaccount,
+        asset_type: AssetType,
+        quantity: Decimal | int,
+        old_quantity: Decimal | int,
+    ) -> None:
+        if not isinstance(asset_type, Security) or account_id == EXTERNAL_BANK_ID:
+            return
+
+        holders = self.holders.get(asset_type.symbol)
+
+        if holders is None:
+            holders = self.holders[asset_type.symbol] = set()
+
+        if old_quantity + quantity:
+            holders.add((account_id, subaccount.subaccount_id, asset_type))
+        else:
+            holders.discard((account_id, subaccount.subaccount_id, asset_type))
+
+    def close(self) -> None:
+        self.ledger.remove_post_listener(self.on_post)
+
+    def get_holders(self, symbol: str) -> List[Holding]:
+        return sorted(self.holders.get(symbol, ()), key=lambda h: (h[0], h[1], h[2].lot or ''))
+
+
+class CorporateAction(ABC):
+    def __init__(self, symbol: str, entry_date: date) -> None:
+        self.symbol = symbol
+        self.entry_date = entry_date
+
+    # The adjustment for one account's holdings of the symbol, as legs
+    # against the external bank.
+    @abstractmethod
+    def get_legs(
+        self,
+        account_id: str,
+        holdings: List[Tuple[str, Security, Decimal]],
+    ) -> List[TransactionLeg]:
+        raise NotImplementedError
+
+
+# Pays amount per share, in cash, on settled and pending shares.
+class CashDividend(CorporateAction):
+    def __init__(
+        self,
+        symbol: str,
+        amount: Decimal | int,
+        entry_date: date,
+        currency: str = 'USD',
+    ) -> None:
+        super().__init__(symbol, entry_date)
+        self.amount = Decimal(amount)
+        self.currency = Currency(currency)
+
+    def get_legs(
+        self,
+        account_id: str,
+        holdings: List[Tuple[str, Security, Decimal]],
+    ) -> List[TransactionLeg]:
+        shares = sum(
+            (quantity for subaccount_id, _, quantity in holdings
+             if subaccount_id in (SETTLED_SUBACCOUNT_ID, PENDING_SUBACCOUNT_ID)),
+            Decimal(0),
+        )
+        cash = shares * self.amount
+
+        if not cash:
+            return []
+
+        return [
+            TransactionLeg(EXTERNAL_BANK_ID, SETTLED_SUBACCOUNT_ID, self.currency, -cash),
+            TransactionLeg(account_id, SETTLED_SUBACCOUNT_ID, self.currency, cash),
+        ]
+
+
+# Multiplies every holding, lots included, by ratio (new shares per old share).
+class Split(CorporateAction):
+    def __init__(self, symbol: str, ratio: Decimal | int, entry_date: date) -> None:
+        assert ratio > 0, f"Split ratio must be positive (symbol={symbol}, ratio={ratio})"
+        super().__init__(symbol, entry_date)
+        self.ratio = Decimal(ratio)
+
+    def get_legs(
+        self,
+        account_id: str,
+        holdings: List[Tuple[str, Security, Decimal]],
+    ) -> List[TransactionLeg]:
+        legs = []
+
+        for subaccount_id, security, quantity in holdings:
+            change = quantity * self.ratio - quantity
+
+            if change:
+                legs.append(TransactionLeg(EXTERNAL_BANK_ID, SETTLED_SUBACCOUNT_ID, security, -change))
+                legs.append(TransactionLeg(account_id, subaccount_id, security, change))
+
+        return legs
+
+
+# Moves every holding, lots included, to a new ticker.
+class SymbolChange(CorporateAction):
+    def __init__(self, symbol: str, new_symbol: str, entry_date: date) -> None:
+        super().__init__(symbol, entry_date)
+        self.new_symbol = new_symbol
+
+    def get_legs(
+        self,
+        account_id: str,
+        holdings: List[Tuple[str, Security, Decimal]],
+    ) -> List[TransactionLeg]:
+        legs = []
+
+        for subaccount_id, security, quantity in holdings:
+            new_security = Security(self.new_symbol, security.lot)
+            legs.extend([
+                TransactionLeg(account_id, subaccount_id, security, -quantity),
+                TransactionLeg(EXTERNAL_BANK_ID, SETTLED_SUBACCOUNT_ID, security, quantity),
+                TransactionLeg(EXTERNAL_BANK_ID, SETTLED_SUBACCOUNT_ID, new_security, -quantity),
+                TransactionLeg(account_id, subaccount_id, new_security, quantity),
+            ])
+
+        return legs
+
+
+# Applies corporate actions across the book. Affected accounts come straight
+# from the holders index instead of a scan of every account, and each action
+# is written as one transaction per account, recorded in a single batch once
+# every one of them has been validated.
+class CorporateActionProcessor:
+    def __init__(self, ledger: Ledger) -> None:
+        self.ledger = ledger
+        self.index = HoldersIndex(ledger)
+
+    def close(self) -> None:
+        self.index.close()
+
+    def get_transactions(self, action: CorporateAction) -> List[Transaction]:
+        accounts = self.ledger.accounts
+        by_account: dict[str, List[Tuple[str, Security, Decimal]]] = {}
+
+        for account_id, subaccount_id, security in self.index.get_holders(action.symbol):
+            quantity = accounts[account_id].subaccounts[subaccount_id].assets[security]
+            by_account.setdefault(account_id, []).append((subaccount_id, security, quantity))
+
+        transactions = []
+
+        for account_id, holdings in by_account.items():
+            legs = action.get_legs(account_id, holdings)
+
+            if legs:
+                transactions.append(Transaction(*legs, entry_date=action.entry_date, balanced=True))
+
+        return transactions
+
+    def apply(self, action: CorporateAction) -> List[Transaction]:
+        transactions = self.get_transactions(action)
+        accounts = self.ledger.accounts
+
+        # Everything record() could reject is checked before anything is
+        # recorded, so the ledger is untouched if any transaction is invalid.
+        for transaction in transactions:
+            transaction.validate(accounts)
+
+        self.ledger.record(*transactions)
+        return transactions
@@ -0,0 +1,90 @@
+from collections import deque
+from decimal import Decimal
+from openroboadvisor.ledger.asset import AssetType, Currency, Price, Security
+from typing import Tuple
+
+
+Quote = Decimal | int | Price
+
+
+# A graph of currency pairs. Cross rates into a currency are found with a
+# breadth-first search (fewest conversions) from that currency and cached
+# until any rate in the graph changes.
+class FxRates:
+    def __init__(self) -> None:
+        self.rates: dict[Currency, dict[Currency, Decimal]] = {}
+        self.cross_rates: dict[Currency, dict[Currency, Decimal]] = {}
+
+    def set_rate(
+        self,
+        base: Currency | str,
+        quote: Currency | str,
+        rate: Decimal | int,
+    ) -> None:
+        base = Currency(base) if isinstance(base, str) else base
+        quote = Currency(quote) if isinstance(quote, str) else quote
+        rate = Decimal(rate)
+        assert rate > 0, f"FX rates must be positive (base={base}, quote={quote}, rate={rate})"
+
+        # One unit of base buys `rate` units of quote.
+        self.rates.setdefault(base, {})[quote] = rate
+        self.rates.setdefault(quote, {})[base] = 1 / rate
+        self.cross_rates.clear()
+
+    def get_rates(self, to_currency: Currency) -> dict[Currency, Decimal]:
+        rates = self.cross_rates.get(to_currency)
+
+        if rates is None:
+            rates = {to_currency: Decimal(1)}
+            queue = deque([to_currency])
+
+            while queue:
+                currency = queue.popleft()
+
+                for neighbor, rate in self.rates.get(currency, {}).items():
+                    if neighbor not in rates:
+                        # 1 neighbor = (1 / rate) currency = rates[currency] / rate to_currency
+                        rates[neighbor] = rates[currency] / rate
+                        queue.append(neighbor)
+
+            self.cross_rates[to_currency] = rates
+
+        return rates
+
+    def get_rate(self, from_currency: Currency, to_currency: Currency) -> Decimal:
+        rate = self.get_rates(to_currency).get(from_currency)
+        assert rate, f"No FX conversion path (from_currency={from_currency}, to_currency={to_currency})"
+        return rate
+
+    def convert(
+        self,
+        amount: Decimal | int,
+        from_currency: Currency,
+        to_currency: Currency,
+    ) -> Decimal:
+        return amount * self.get_rate(from_currency, to_currency)
+
+
+# Returns an asset's price and the currency it is quoted in. Quotes are either
+# a plain number in the reporting currency or a (price, currency) Price;
+# only the latter, and currencies with no quote (priced at one unit of
+# themselves), are left to FxRates to convert.
+def get_price(
+    asset: AssetType,
+    quotes: dict[AssetType, Quote],
+    reporting_currency: Currency,
+) -> Tuple[Decimal | int, Currency]:
+    quote = quotes.get(asset.without_lot() if isinstance(asset, Security) else asset)
+
+    if quote is None and isinstance(asset, Currency):
+        return 1, asset
+
+    assert quote is not None, f"Unable to find quote (asset={asset})"
+
+    if isinstance(quote, tuple):
+        price, quote_currency = quote
+        assert isinstance(quote_currency, Currency), \
+            f"Quotes must be in a currency (asset={asset}, quote_currency={quote_currency})"
+        return price, quote_currency
+
+    return quote, reporting_currency
@@ -0,0 +1,108 @@
+from .fx import FxRates, Quote, get_price
+from .templates import PENDING_SUBACCOUNT_ID, SETTLED_SUBACCOUNT_ID
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import AccountType, Subaccount
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import CloseAccount, Entry
+
+
+# Book-wide holdings, kept up to date from every leg the ledger posts. Lots
+# are folded into their security, and only settled and pending subaccounts
+# of public accounts are counted (the same holdings Balances reports).
+# Account types are cached per account until the account is closed, since
+# its id can be reopened as another type.
+class BookHoldings:
+    def __init__(self, ledger: Ledger) -> None:
+        self.ledger = ledger
+        self.subaccount_ids = {SETTLED_SUBACCOUNT_ID, PENDING_SUBACCOUNT_ID}
+        self.by_asset: dict[AssetType, Decimal] = {}
+        self.by_account_type: dict[AccountType, dict[AssetType, Decimal]] = {}
+        self.account_types: dict[str, AccountType] = {}
+
+        for account_id, account in ledger.accounts.items():
+            for subaccount in account.subaccounts.values():
+                for asset_type, quantity in subaccount.assets.items():
+                    self.on_post(account_id, subaccount, asset_type, quantity, 0)
+
+        ledger.add_post_listener(self.on_post)
+        ledger.add_entry_listener(self.on_entry)
+
+    def on_post(
+        self,
+        account_id: str,
+        subaccount: Subaccount,
+        asset_type: AssetType,
+        quantity: Decimal | int,
+        old_quantity: Decimal | int,
+    ) -> None:
+        if account_id.startswith('__') or subaccount.subaccount_id not in self.subaccount_ids:
+            return
+
+        account_type = self.account_types.get(account_id)
+
+        if account_type is None:
+            account_type = self.account_types[account_id] = self.ledger.accounts[account_id].account_type
+
+        if isinstance(asset_type, Security) and asset_type.lot is not None:
+            asset_type = asset_type.without_lot()
+
+        account_type_holdings = self.by_account_type.get(account_type)
+
+        if account_type_holdings is None:
+            account_type_holdings = self.by_account_type[account_type] = {}
+
+        self.by_asset[asset_type] = self.by_asset.get(asset_type, Decimal(0)) + quantity
+        account_type_holdings[asset_type] = account_type_holdings.get(asset_type, Decimal(0)) + quantity
+
+    def on_entry(self, position: int, entry: Entry) -> None:
+        if isinstance(entry, CloseAccount):
+            self.account_types.pop(entry.account_id, None)
+
+    def close(self) -> None:
+        self.ledger.remove_post_listener(self.on_post)
+        self.ledger.remove_entry_listener(self.on_entry)
+
+    def get_asset_quantities(
+        self,
+        account_type: AccountType | None = None,
+    ) -> dict[AssetType, Decimal]:
+        holdings = self.by_asset if account_type is None else self.by_account_type.get(account_type, {})
+        return {k: v for k, v in holdings.items() if v}
+
+    def get_asset_amounts(
+        self,
+        quotes: dict[AssetType, Quote],
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+        account_type: AccountType | None = None,
+    ) -> dict[AssetType, Decimal]:
+        reporting_currency = Currency(currency)
+        rates = fx.get_rates(reporting_currency) if fx else {reporting_currency: 1}
+        asset_amounts: dict[AssetType, Decimal] = {}
+
+        for asset_type, quantity in self.get_asset_quantities(account_type).items():
+            price, quote_currency = get_price(asset_type, quotes, reporting_currency)
+            rate = rates.get(quote_currency)
+            assert rate, f"No FX conversion path (from_currency={quote_currency}, to_currency={reporting_currency})"
+            asset_amounts[asset_type] = price * quantity * rate
+
+        return asset_amounts
+
+    # Value held in each asset class; assets without a class are reported
+    # under None.
+    def get_exposure(
+        self,
+        quotes: dict[AssetType, Quote],
+        asset_classes: dict[AssetType, str],
+        fx: FxRates | None = None,
+        currency: str = 'USD',
+        account_type: AccountType | None = None,
+    ) -> dict[str | None, Decimal]:
+        exposure: dict[str | None, Decimal] = {}
+
+        for asset_type, amount in self.get_asset_amounts(quotes, fx, currency, account_type).items():
+            asset_class = asset_classes.get(asset_type)
+            exposure[asset_class] = exposure.get(asset_class, 0) + amount
+
+        return exposure
@@ -1,20 +1,62 @@
-from .account import Account, EXTERNAL_BANK_ID
+from .account import Account, EXTERNAL_BANK_ID, FEES_SUBACCOUNT_ID
+from collections.abc import Mapping
 from datetime import date
 from openroboadvisor.ledger import Ledger
 from openroboadvisor.ledger.account import AccountType
-from openroboadvisor.ledger.entry import OpenAccount
+from openroboadvisor.ledger.entry import CloseAccount, OpenAccount
+from typing import Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .holdings import BookHoldings
+    from openroboadvisor.serialization.archive import AccountArchive
+
+
+# The public accounts open in a portfolio's ledger. Accounts are read through
+# the ledger, and the Account for each is only built the first time it's used,
+# so wrapping a ledger (a fork in particular) costs nothing up front.
+class PortfolioAccounts(Mapping[str, Account]):
+    def __init__(self, ledger: Ledger) -> None:
+        self.ledger = ledger
+        self.wrappers: dict[str, Account] = {}
+
+    def __getitem__(self, account_id: str) -> Account:
+        if account_id.startswith('__') or account_id not in self.ledger.accounts:
+            raise KeyError(account_id)
+
+        account = self.wrappers.get(account_id)
+
+        if account is None:
+            account = self.wrappers[account_id] = Account(account_id, self.ledger)
+
+        return account
+
+    def __contains__(self, account_id: object) -> bool:
+        return isinstance(account_id, str) and not account_id.startswith('__') and \
+            account_id in self.ledger.accounts
+
+    def __iter__(self) -> Iterator[str]:
+        return (account_id for account_id in self.ledger.accounts if not account_id.startswith('__'))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
 
 
 class Portfolio:
-    def __init__(self) -> None:
-        self.ledger = Ledger()
-        self.accounts: dict[str, Account] = {}
-
-        self.open_account(
-            account_id=EXTERNAL_BANK_ID,
-            account_type=AccountType.CHECKING,
-            create_date=date(1, 1, 1),
-        )
+    def __init__(
+        self,
+        ledger: Ledger | None = None,
+        archive: 'AccountArchive | None' = None,
+    ) -> None:
+        self.ledger = ledger if ledger is not None else Ledger(archive=archive)
+        self.accounts = PortfolioAccounts(self.ledger)
+        self.book_holdings: 'BookHoldings | None' = None
+
+        if ledger is None:
+            self.open_account(
+                account_id=EXTERNAL_BANK_ID,
+                account_type=AccountType.CHECKING,
+                create_date=date(1, 1, 1),
+            )
 
     def open_account(
         self,
@@ -30,13 +72,47 @@ class Portfolio:
             ),
         )
 
-        account = Account(account_id, self.ledger)
+        # Public accounts are kept, so later lookups find the same Account
+        if account_id.startswith('__'):
+            return Account(account_id, self.ledger)
 
-        # Add all public accounts to the accounts dict.
-        if not account_id.startswith('__'):
-            self.accounts[account_id] = account
+        return self.accounts[account_id]
 
-        return account
+    # Accounts can only be closed once they have no balance; the fees paid
+    # over the account's life are kept with it. A closed account is removed
+    # from the portfolio and the ledger, and archived if the ledger has an
+    # archive.
+    def close_account(
+        self,
+        account_id: str,
+        close_date: date | None = None,
+    ) -> None:
+        self.ledger.record(
+            CloseAccount(
+                account_id=account_id,
+                entry_date=close_date or date.today(),
+                exempt_subaccount_ids=(FEES_SUBACCOUNT_ID,),
+            ),
+        )
+        self.accounts.wrappers.pop(account_id, None)
+
+    # Drops closed accounts' entries from the ledger, keeping any that
+    # involve accounts that are still open.
+    def compact(self) -> int:
+        return self.ledger.compact(shared_account_ids=[EXTERNAL_BANK_ID])
 
     def get_account(self, account_id: str) -> Account | None:
-        return self.get(account_id)
+        return self.accounts.get(account_id)
+
+    # Built on first use, so portfolios that never ask for book-wide holdings
+    # (forks in particular) don't pay to maintain them.
+    @property
+    def holdings(self) -> 'BookHoldings':
+        if self.book_holdings is None:
+            from .holdings import BookHoldings
+            self.book_holdings = BookHoldings(self.ledger)
+
+        return self.book_holdings
+
+    def fork(self) -> 'Portfolio':
+        return Portfolio(self.ledger.fork())
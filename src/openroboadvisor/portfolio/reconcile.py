@@ -0,0 +1,250 @@
+import csv
+from .templates import PENDING_SUBACCOUNT_ID, SETTLED_SUBACCOUNT_ID
+from decimal import Decimal
+from itertools import groupby
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import Subaccount
+from openroboadvisor.ledger.asset import AssetType
+from operator import itemgetter
+from typing import Iterable, List, TextIO
+
+
+DIGEST_MASK = (1 << 64) - 1
+
+
+# A position's contribution to its account's digest. Digests are sums of
+# these mod 2^64, so a position can be swapped out without rehashing the rest
+# of the account, and the order positions are seen in doesn't matter. Equal
+# quantities hash equally however they're written (1.50 and 1.5).
+def position_hash(symbol: str, quantity: Decimal) -> int:
+    return hash((symbol, quantity)) & DIGEST_MASK
+
+
+def get_digest(positions: dict[str, Decimal]) -> int:
+    digest = 0
+
+    for symbol, quantity in positions.items():
+        if quantity:
+            digest += position_hash(symbol, quantity)
+
+    return digest & DIGEST_MASK
+
+
+# Per-account positions by symbol, and a digest over each account's positions,
+# kept up to date from every leg the ledger posts. Lots are folded into their
+# security, and only settled and pending subaccounts of public accounts are
+# counted (what a custodian reports as the account's holdings).
+class PositionDigests:
+    def __init__(
+        self,
+        ledger: Ledger,
+        subaccount_ids: Iterable[str] = (SETTLED_SUBACCOUNT_ID, PENDING_SUBACCOUNT_ID),
+    ) -> None:
+        self.ledger = ledger
+        self.subaccount_ids = set(subaccount_ids)
+        self.positions: dict[str, dict[str, Decimal]] = {}
+        self.digests: dict[str, int] = {}
+
+        for account_id, account in ledger.accounts.items():
+            for subaccount in account.subaccounts.values():
+                for asset_type, quantity in subaccount.assets.items():
+                    self.on_post(account_id, subaccount, asset_type, quantity, 0)
+
+        ledger.add_post_listener(self.on_post)
+
+    def on_post(
+        self,
+        account_id: str,
+        subaccount: Subaccount,
+        asset_type: AssetType,
+        quantity: Decimal | int,
+        old_quantity: Decimal | int,
+    ) -> None:
+        if account_id.startswith('__') or subaccount.subaccount_id not in self.subaccount_ids or not quantity:
+            return
+
+        positions = self.positions.get(account_id)
+
+        if positions is None:
+            positions = self.positions[account_id] = {}
+
+        symbol = asset_type.symbol
+        old_position = positions.get(symbol, Decimal(0))
+        position = old_position + quantity
+        digest = self.digests.get(account_id, 0)
+
+        if old_position:
+            digest -= position_hash(symbol, old_position)
+
+        if position:
+            digest += position_hash(symbol, position)
+            positions[symbol] = position
+        else:
+            del positions[symbol]
+
+        self.digests[account_id] = digest & DIGEST_MASK
+
+    def close(self) -> None:
+        self.ledger.remove_post_listener(self.on_post)
+
+    def get_digest(self, account_id: str) -> int:
+        return self.digests.get(account_id, 0)
+
+    def get_positions(self, account_id: str) -> dict[str, Decimal]:
+        return dict(self.positions.get(account_id, {}))
+
+
+# A position the ledger and the custodian disagree on. A position missing
+# from either side is reported with a quantity of zero.
+class Break:
+    __slots__ = ('account_id', 'symbol', 'ledger_quantity', 'custodian_quantity')
+
+    def __init__(
+        self,
+        account_id: str,
+        symbol: str,
+        ledger_quantity: Decimal,
+        custodian_quantity: Decimal,
+    ) -> None:
+        self.account_id = account_id
+        self.symbol = symbol
+        self.ledger_quantity = ledger_quantity
+        self.custodian_quantity = custodian_quantity
+
+    @property
+    def difference(self) -> Decimal:
+        return self.custodian_quantity - self.ledger_quantity
+
+    def __eq__(self, another: object) -> bool:
+        return \
+            isinstance(another, type(self)) and \
+            self.account_id == another.account_id and \
+            self.symbol == another.symbol and \
+            self.ledger_quantity == another.ledger_quantity and \
+            self.custodian_quantity == another.custodian_quantity
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(account_id={repr(self.account_id)}, symbol={repr(self.symbol)}, '
+            f'ledger_quantity={self.ledger_quantity}, custodian_quantity={self.custodian_quantity})'
+        )
+
+
+class ReconciliationReport:
+    def __init__(self) -> None:
+        self.breaks: List[Break] = []
+        # Accounts on either side
+        self.account_count = 0
+        # Accounts whose digests differed and were compared position by position
+        self.mismatched_account_ids: List[str] = []
+
+    def write(self, stream: TextIO) -> None:
+        writer = csv.writer(stream)
+        writer.writerow(['account_id', 'symbol', 'ledger_quantity', 'custodian_quantity', 'difference'])
+
+        for position_break in self.breaks:
+            writer.writerow([
+                position_break.account_id,
+                position_break.symbol,
+                position_break.ledger_quantity,
+                position_break.custodian_quantity,
+                position_break.difference,
+            ])
+
+
+# Reconciles the ledger's positions against a custodian position file: a CSV
+# with a header and a row per account and symbol. The file is streamed once,
+# a run of rows for the same account at a time: each run's digest is checked
+# against the ledger's as soon as it ends, and its rows are only kept if they
+# differ. Only those accounts are compared position by position. Accounts
+# whose rows are scattered through the file can't be checked until the end,
+# so they're read again in a second pass if they don't match. (A custodian
+# that splits a position over several rows fails the digest check but isn't
+# reported as a break, since the comparison adds the rows up.)
+def reconcile(
+    digests: PositionDigests,
+    path: str,
+    account_column: str = 'account_id',
+    symbol_column: str = 'symbol',
+    quantity_column: str = 'quantity',
+) -> ReconciliationReport:
+    columns = (account_column, symbol_column, quantity_column)
+    ledger_digests = digests.digests
+    custodian_digests: dict[str, int] = {}
+    mismatched: dict[str, dict[str, Decimal]] = {}
+    scattered: set[str] = set()
+
+    for account_id, rows in groupby(read_positions(path, columns), key=itemgetter(0)):
+        account_rows = list(rows)
+        digest = sum(position_hash(symbol, quantity) for _, symbol, quantity in account_rows)
+
+        if account_id in custodian_digests:
+            custodian_digests[account_id] += digest
+            scattered.add(account_id)
+            continue
+
+        custodian_digests[account_id] = digest
+
+        if digest & DIGEST_MASK != ledger_digests.get(account_id, 0):
+            positions = mismatched[account_id] = {}
+
+            for _, symbol, quantity in account_rows:
+                positions[symbol] = positions.get(symbol, 0) + quantity
+
+    rescan: dict[str, dict[str, Decimal]] = {}
+
+    for account_id in scattered:
+        if custodian_digests[account_id] & DIGEST_MASK != ledger_digests.get(account_id, 0):
+            rescan[account_id] = mismatched[account_id] = {}
+        else:
+            mismatched.pop(account_id, None)
+
+    if rescan:
+        for account_id, symbol, quantity in read_positions(path, columns):
+            rescanned = rescan.get(account_id)
+
+            if rescanned is not None:
+                rescanned[symbol] = rescanned.get(symbol, 0) + quantity
+
+    for account_id, positions in digests.positions.items():
+        if positions and account_id not in custodian_digests:
+            mismatched[account_id] = {}
+
+    report = ReconciliationReport()
+    report.account_count = len(
+        custodian_digests.keys() | {account_id for account_id, positions in digests.positions.items() if positions}
+    )
+
+    for account_id, custodian_positions in mismatched.items():
+        report.mismatched_account_ids.append(account_id)
+        ledger_positions = digests.get_positions(account_id)
+
+        for symbol in dict.fromkeys([*ledger_positions, *custodian_positions]):
+            ledger_quantity = ledger_positions.get(symbol, Decimal(0))
+            custodian_quantity = custodian_positions.get(symbol, Decimal(0))
+
+            if ledger_quantity != custodian_quantity:
+                report.breaks.append(Break(account_id, symbol, ledger_quantity, custodian_quantity))
+
+    return report
+
+
+def read_positions(path: str, columns: tuple[str, str, str]) -> Iterable[tuple[str, str, Decimal]]:
+    with open(path, newline='', encoding='utf-8') as stream:
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        assert header is not None, f"Custodian file is empty (path='{path}')"
+
+        for column in columns:
+            assert column in header, f"Custodian file is missing a column (path='{path}', column='{column}')"
+
+        account_index, symbol_index, quantity_index = (header.index(column) for column in columns)
+
+        for row in reader:
+            if not row:
+                continue
+
+            quantity = Decimal(row[quantity_index])
+
+            if quantity:
+                yield row[account_index], row[symbol_index], quantity
@@ -0,0 +1,142 @@
+import os
+import pickle
+from .portfolio import Portfolio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.entry import Entry
+from typing import List
+from urllib.parse import quote
+
+
+class PortfolioStore(ABC):
+    # Returns every entry saved for the portfolio, or None if it's unknown.
+    @abstractmethod
+    def load(self, portfolio_id: str) -> List[Entry] | None:
+        raise NotImplementedError
+
+    # Appends entries recorded since the portfolio was last saved.
+    @abstractmethod
+    def append(self, portfolio_id: str, entries: List[Entry]) -> None:
+        raise NotImplementedError
+
+
+# Stores each portfolio's ledger entries in its own append-only file of
+# pickled entry batches.
+class DirectoryStore(PortfolioStore):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def load(self, portfolio_id: str) -> List[Entry] | None:
+        entries: List[Entry] = []
+
+        try:
+            with open(self._get_path(portfolio_id), 'rb') as portfolio_file:
+                while True:
+                    try:
+                        entries.extend(pickle.load(portfolio_file))
+                    except EOFError:
+                        return entries
+        except FileNotFoundError:
+            return None
+
+    def append(self, portfolio_id: str, entries: List[Entry]) -> None:
+        with open(self._get_path(portfolio_id), 'ab') as portfolio_file:
+            pickle.dump(entries, portfolio_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _get_path(self, portfolio_id: str) -> str:
+        return os.path.join(self.path, f'{quote(portfolio_id, safe="")}.entries')
+
+
+# Keeps the most recently used portfolios in memory and loads the rest from
+# a store on first access. Residency is bounded by a portfolio count and,
+# optionally, by the total number of ledger entries held (counted whenever a
+# portfolio is accessed). Least recently used portfolios are written back and
+# evicted once either bound is passed.
+class PortfolioRegistry:
+    def __init__(
+        self,
+        store: PortfolioStore,
+        max_portfolios: int = 1000,
+        max_entries: int | None = None,
+    ) -> None:
+        assert max_portfolios > 0, f"Registry must hold at least one portfolio (max_portfolios={max_portfolios})"
+        self.store = store
+        self.max_portfolios = max_portfolios
+        self.max_entries = max_entries
+        self.portfolios: OrderedDict[str, Portfolio] = OrderedDict()
+        # Number of each resident portfolio's entries already in the store
+        self.saved_entries: dict[str, int] = {}
+        # Entries per resident portfolio when it was last counted
+        self.entry_counts: dict[str, int] = {}
+        self.resident_entries = 0
+
+    def get(self, portfolio_id: str) -> Portfolio:
+        portfolio = self.portfolios.get(portfolio_id)
+
+        if portfolio is None:
+            portfolio = self._load(portfolio_id)
+            self.portfolios[portfolio_id] = portfolio
+            self.entry_counts[portfolio_id] = 0
+        else:
+            self.portfolios.move_to_end(portfolio_id)
+
+        self._count_entries(portfolio_id)
+        self._evict(keep=portfolio_id)
+        return portfolio
+
+    def flush(self) -> None:
+        for portfolio_id in self.portfolios:
+            self._save(portfolio_id)
+
+    def evict(self, portfolio_id: str) -> None:
+        if portfolio_id in self.portfolios:
+            self._save(portfolio_id)
+            self.resident_entries -= self.entry_counts.pop(portfolio_id)
+            del self.portfolios[portfolio_id]
+            del self.saved_entries[portfolio_id]
+
+    def __contains__(self, portfolio_id: str) -> bool:
+        return portfolio_id in self.portfolios
+
+    def __len__(self) -> int:
+        return len(self.portfolios)
+
+    def _load(self, portfolio_id: str) -> Portfolio:
+        entries = self.store.load(portfolio_id)
+
+        if entries is None:
+            self.saved_entries[portfolio_id] = 0
+            return Portfolio()
+
+        # Stored entries were validated when they were first recorded.
+        ledger = Ledger(trust_balanced=True)
+        ledger.record(*entries)
+        self.saved_entries[portfolio_id] = len(entries)
+        return Portfolio(ledger)
+
+    def _save(self, portfolio_id: str) -> None:
+        entries = self.portfolios[portfolio_id].ledger.entries
+        saved_entries = self.saved_entries[portfolio_id]
+
+        if len(entries) > saved_entries:
+            self.store.append(portfolio_id, entries[saved_entries:])
+            self.saved_entries[portfolio_id] = len(entries)
+
+    def _count_entries(self, portfolio_id: str) -> None:
+        entry_count = len(self.portfolios[portfolio_id].ledger.entries)
+        self.resident_entries += entry_count - self.entry_counts[portfolio_id]
+        self.entry_counts[portfolio_id] = entry_count
+
+    def _evict(self, keep: str) -> None:
+        while len(self.portfolios) > 1 and (
+            len(self.portfolios) > self.max_portfolios or
+            (self.max_entries is not None and self.resident_entries > self.max_entries)
+        ):
+            portfolio_id = next(iter(self.portfolios))
+
+            if portfolio_id == keep:
+                break
+
+            self.evict(portfolio_id)
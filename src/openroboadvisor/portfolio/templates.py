@@ -0,0 +1,308 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import Account, Subaccount
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import Transaction, TransactionLeg
+from typing import List, Tuple, cast
+
+
+EXTERNAL_BANK_ID = '__external_bank'
+PENDING_SUBACCOUNT_ID = 'pending'
+SETTLED_SUBACCOUNT_ID = 'settled'
+FEES_SUBACCOUNT_ID = 'fees'
+
+# Account slots
+ACCOUNT = 0
+BANK = 1
+
+# Asset slots
+CURRENCY = 0
+SECURITY = 1
+
+# Date slots
+TRADE_DATE = 0
+SETTLEMENT_DATE = 1
+
+# Quantities are written as coefficients over the (amount, shares, fees)
+# parameters, so (-1, 0, -1) means -(amount + fees). Every combination used
+# by a template is computed once per fill and legs index into the results.
+Coefficients = Tuple[int, int, int]
+VALUE_SLOTS: dict[Coefficients, int] = {
+    (1, 0, 0): 0,
+    (-1, 0, 0): 1,
+    (0, 1, 0): 2,
+    (0, -1, 0): 3,
+    (0, 0, 1): 4,
+    (1, 0, 1): 5,
+    (-1, 0, -1): 6,
+    (1, 0, -1): 7,
+    (-1, 0, 1): 8,
+}
+
+
+def fill_values(amount: Decimal, shares: Decimal, fees: Decimal) -> Tuple[Decimal, ...]:
+    amount_with_fees = amount + fees
+    amount_without_fees = amount - fees
+    return (
+        amount,
+        -amount,
+        shares,
+        -shares,
+        fees,
+        amount_with_fees,
+        -amount_with_fees,
+        amount_without_fees,
+        -amount_without_fees,
+    )
+
+
+class LegTemplate:
+    def __init__(
+        self,
+        account_slot: int,
+        subaccount_id: str,
+        asset_slot: int,
+        quantity: Coefficients,
+        cost: Coefficients | None = None,
+    ) -> None:
+        self.account_slot = account_slot
+        self.subaccount_id = subaccount_id
+        self.asset_slot = asset_slot
+        self.quantity_slot = VALUE_SLOTS[quantity]
+        self.cost_slot = VALUE_SLOTS[cost] if cost else None
+
+
+class TransactionTemplate:
+    def __init__(self, date_slot: int, *legs: LegTemplate) -> None:
+        self.date_slot = date_slot
+        self.legs = legs
+
+    # The transaction for the given slot values (see fill_values), built
+    # without being posted to a ledger
+    def materialize(
+        self,
+        account_ids: Tuple[str, str],
+        currency: Currency,
+        security: Security | None,
+        values: Tuple[Decimal, ...],
+        dates: Tuple[date, date],
+    ) -> Transaction:
+        assets = (currency, security)
+        legs = []
+
+        for leg_template in self.legs:
+            asset_type: AssetType | None = assets[leg_template.asset_slot]
+            assert asset_type is not None, "Transaction template requires a security"
+            cost_slot = leg_template.cost_slot
+
+            legs.append(TransactionLeg(
+                account_ids[leg_template.account_slot],
+                leg_template.subaccount_id,
+                asset_type,
+                values[leg_template.quantity_slot],
+                (values[cost_slot], currency) if cost_slot is not None else None,
+            ))
+
+        return Transaction(*legs, entry_date=dates[self.date_slot], balanced=True)
+
+
+DEPOSIT = (
+    TransactionTemplate(
+        TRADE_DATE,
+        LegTemplate(BANK, PENDING_SUBACCOUNT_ID, CURRENCY, (-1, 0, 0)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (1, 0, 0)),
+    ),
+    TransactionTemplate(
+        SETTLEMENT_DATE,
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (-1, 0, 0)),
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, CURRENCY, (1, 0, 0)),
+    ),
+)
+
+WITHDRAW = (
+    TransactionTemplate(
+        TRADE_DATE,
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (-1, 0, 0)),
+        LegTemplate(BANK, PENDING_SUBACCOUNT_ID, CURRENCY, (1, 0, 0)),
+    ),
+    TransactionTemplate(
+        SETTLEMENT_DATE,
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, CURRENCY, (-1, 0, 0)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (1, 0, 0)),
+    ),
+)
+
+BUY = (
+    TransactionTemplate(
+        TRADE_DATE,
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (-1, 0, -1)),
+        LegTemplate(ACCOUNT, FEES_SUBACCOUNT_ID, CURRENCY, (0, 0, 1)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, SECURITY, (0, 1, 0), cost=(1, 0, 0)),
+    ),
+    TransactionTemplate(
+        SETTLEMENT_DATE,
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, CURRENCY, (-1, 0, -1)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (1, 0, 1)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, SECURITY, (0, -1, 0)),
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, SECURITY, (0, 1, 0)),
+    ),
+)
+
+SELL = (
+    TransactionTemplate(
+        TRADE_DATE,
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (1, 0, -1)),
+        LegTemplate(ACCOUNT, FEES_SUBACCOUNT_ID, CURRENCY, (0, 0, 1)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, SECURITY, (0, -1, 0), cost=(-1, 0, 0)),
+    ),
+    TransactionTemplate(
+        SETTLEMENT_DATE,
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, CURRENCY, (-1, 0, 1)),
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, CURRENCY, (1, 0, -1)),
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, SECURITY, (0, -1, 0)),
+        LegTemplate(ACCOUNT, PENDING_SUBACCOUNT_ID, SECURITY, (0, 1, 0)),
+    ),
+)
+
+Template = Tuple[TransactionTemplate, ...]
+
+
+# Writes templated transactions for a single account straight into a ledger.
+# Subaccount handles are resolved the first time each template is used and
+# reused until the ledger's generation changes. The transactions are
+# balanced by construction, so they are only validated when the ledger
+# doesn't trust balanced transactions. Ledgers that handle transactions
+# their own way are sent them through record() instead.
+class AccountTemplates:
+    def __init__(self, ledger: Ledger, account_id: str) -> None:
+        self.ledger = ledger
+        self.account_ids = (account_id, EXTERNAL_BANK_ID)
+        self.generation = ledger.generation
+        self.handles: dict[int, List[List[Subaccount]]] = {}
+        self.currencies: dict[str, Currency] = {}
+        self.securities: dict[Tuple[str, str | None], Security] = {}
+
+    def currency(self, symbol: str) -> Currency:
+        currency = self.currencies.get(symbol)
+
+        if currency is None:
+            currency = self.currencies[symbol] = Currency(symbol)
+
+        return currency
+
+    def security(self, symbol: str, lot: str | None = None) -> Security:
+        security = self.securities.get((symbol, lot))
+
+        if security is None:
+            security = self.securities[(symbol, lot)] = Security(symbol, lot)
+
+        return security
+
+    # The template's transactions, without posting them (to record later,
+    # say)
+    def materialize(
+        self,
+        template: Template,
+        currency: str,
+        amount: Decimal,
+        shares: Decimal = Decimal(0),
+        fees: Decimal = Decimal(0),
+        security: Security | None = None,
+        trade_date: date | None = None,
+        settlement_date: date | None = None,
+    ) -> Tuple[Transaction, ...]:
+        resolved_currency, values, dates = self._resolve(currency, amount, shares, fees, trade_date, settlement_date)
+
+        return tuple(
+            transaction_template.materialize(self.account_ids, resolved_currency, security, values, dates)
+            for transaction_template in template
+        )
+
+    def fill(
+        self,
+        template: Template,
+        currency: str,
+        amount: Decimal,
+        shares: Decimal = Decimal(0),
+        fees: Decimal = Decimal(0),
+        security: Security | None = None,
+        trade_date: date | None = None,
+        settlement_date: date | None = None,
+    ) -> None:
+        ledger = self.ledger
+        handler = ledger.entry_handlers.get(Transaction)
+
+        if getattr(handler, '__func__', None) is not Ledger.handle_transaction:
+            ledger.record(*self.materialize(
+                template, currency, amount, shares, fees, security, trade_date, settlement_date,
+            ))
+            return
+
+        post = ledger.post
+        validate = not ledger.trust_balanced
+        account_ids = self.account_ids
+        handles = self._get_handles(template)
+        resolved_currency, values, dates = self._resolve(currency, amount, shares, fees, trade_date, settlement_date)
+
+        for transaction_template, subaccounts in zip(template, handles):
+            transaction = transaction_template.materialize(account_ids, resolved_currency, security, values, dates)
+
+            if validate:
+                transaction.validate_quantities()
+
+            # Snapshots wait for the whole transaction (see Ledger.append)
+            with ledger.write_lock:
+                for leg, subaccount in zip(transaction.legs, subaccounts):
+                    post(leg.account_id, subaccount, leg.quantity, leg.asset_type)
+
+                ledger.append(transaction)
+
+    def _resolve(
+        self,
+        currency: str,
+        amount: Decimal,
+        shares: Decimal,
+        fees: Decimal,
+        trade_date: date | None,
+        settlement_date: date | None,
+    ) -> Tuple[Currency, Tuple[Decimal, ...], Tuple[date, date]]:
+        resolved_trade_date = trade_date or date.today()
+
+        return (
+            self.currency(currency),
+            fill_values(amount, shares, fees),
+            (resolved_trade_date, settlement_date or resolved_trade_date),
+        )
+
+    def _get_handles(self, template: Template) -> List[List[Subaccount]]:
+        if self.generation != self.ledger.generation:
+            self.handles = {}
+            self.generation = self.ledger.generation
+
+        handles = self.handles.get(id(template))
+
+        if handles is None:
+            accounts = [self.ledger.get_account(account_id) for account_id in self.account_ids]
+
+            # Check every account before resolving, which may create subaccounts
+            for transaction_template in template:
+                for leg_template in transaction_template.legs:
+                    assert accounts[leg_template.account_slot], (
+                        "Transaction references missing account "
+                        f"(account_id='{self.account_ids[leg_template.account_slot]}')"
+                    )
+
+            handles = [
+                [
+                    self.ledger.get_subaccount_for_write(
+                        cast(Account, accounts[leg_template.account_slot]),
+                        leg_template.subaccount_id,
+                    )
+                    for leg_template in transaction_template.legs
+                ]
+                for transaction_template in template
+            ]
+            self.handles[id(template)] = handles
+
+        return handles
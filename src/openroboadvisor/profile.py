@@ -0,0 +1,314 @@
+# Profiles a workload against a large synthetic (or saved) portfolio.
+#
+#   python -m openroboadvisor.profile simple --accounts 10000
+#   python -m openroboadvisor.profile ingest --portfolio book.ora \
+#       --output profiles/ingest
+#
+# The workload is run three times: under cProfile for per-function times,
+# under tracemalloc for allocations by line, and under a sampling profiler
+# that writes collapsed stacks ("frame;frame;frame count" per line), which
+# flamegraph.pl, speedscope and most flamegraph viewers accept.
+
+import argparse
+import cProfile
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import Entry
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
+from types import FrameType
+from typing import Callable, List, TextIO
+
+
+TRADE_DATE = date(2022, 1, 3)
+# (symbol, quote, asset class)
+SECURITIES = [
+    ('VTI', Decimal('221.17'), 'US Stocks'),
+    ('ITOT', Decimal('96.51'), 'US Stocks'),
+    ('VEA', Decimal('47.79'), 'Foreign Stocks'),
+    ('VWO', Decimal('47.82'), 'Emerging Markets'),
+    ('VIG', Decimal('158.08'), 'Dividend Stocks'),
+    ('VTEB', Decimal('53.24'), 'Municipal Bonds'),
+]
+QUOTES: dict[AssetType, Quote] = {
+    Security(symbol): quote for symbol, quote, _ in SECURITIES
+}
+
+Workload = Callable[[], None]
+
+
+def make_portfolio(accounts: int, trades: int) -> Portfolio:
+    portfolio = Portfolio()
+
+    for i in range(accounts):
+        account = portfolio.open_account(
+            f'account-{i}',
+            create_date=TRADE_DATE,
+        )
+        account.deposit(1000 * trades, transfer_date=TRADE_DATE)
+
+        for j in range(trades):
+            symbol, quote, _ = SECURITIES[(i + j) % len(SECURITIES)]
+            account.buy(
+                symbol,
+                shares=Decimal(j % 3 + 1),
+                amount=quote * (j % 3 + 1),
+                fees=Decimal('0.95'),
+                trade_date=TRADE_DATE,
+            )
+
+    return portfolio
+
+
+def load_portfolio(path: str) -> Portfolio:
+    from openroboadvisor import serialization
+
+    with open(path, 'rb') as stream:
+        return serialization.load_portfolio(stream)
+
+
+def ingest(portfolio: Portfolio) -> Workload:
+    entries: List[Entry] = list(portfolio.ledger.entries)
+
+    def run() -> None:
+        Ledger().record(*entries)
+
+    return run
+
+
+def balances(portfolio: Portfolio) -> Workload:
+    def run() -> None:
+        for account in portfolio.accounts.values():
+            account.get_balances().total(QUOTES)
+
+    return run
+
+
+def simple(portfolio: Portfolio) -> Workload:
+    from openroboadvisor.advisor.model_portfolio import ModelPortfolio
+    from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+
+    weight = Decimal(1) / len(SECURITIES)
+    model: ModelPortfolio[AssetType] = ModelPortfolio(
+        'equal',
+        {Security(symbol): weight for symbol, _, _ in SECURITIES},
+    )
+    advisor = SimpleAdvisor(
+        portfolio=portfolio,
+        quotes=QUOTES,
+        models=[model],
+        account_models=dict.fromkeys(portfolio.accounts, model.model_id),
+    )
+
+    def run() -> None:
+        advisor.get_suggestions()
+
+    return run
+
+
+def asset_class(portfolio: Portfolio) -> Workload:
+    from openroboadvisor.advisor.asset_class_advisor import AssetClassAdvisor
+    from openroboadvisor.advisor.model_portfolio import ModelPortfolio
+
+    asset_classes: dict[AssetType, str] = {
+        Security(symbol): asset_class
+        for symbol, _, asset_class in SECURITIES
+    }
+    class_names = list(dict.fromkeys(asset_classes.values()))
+    weight = Decimal(1) / len(class_names)
+    model = ModelPortfolio(
+        'equal',
+        {class_name: weight for class_name in class_names},
+    )
+    advisor = AssetClassAdvisor(
+        portfolio=portfolio,
+        preferred_assets=list(dict.fromkeys(asset_classes)),
+        asset_classes=asset_classes,
+        quotes=QUOTES | {Currency('USD'): Decimal(1)},
+        models=[model],
+        account_models=dict.fromkeys(portfolio.accounts, model.model_id),
+    )
+
+    def run() -> None:
+        advisor.get_suggestions()
+
+    return run
+
+
+WORKLOADS: dict[str, Callable[[Portfolio], Workload]] = {
+    'ingest': ingest,
+    'balances': balances,
+    'simple': simple,
+    'asset_class': asset_class,
+}
+
+
+def profile_time(
+    workload: Workload,
+    out: TextIO,
+    sort: str,
+    limit: int,
+    path: str | None,
+) -> None:
+    profiler = cProfile.Profile()
+    profiler.runcall(workload)
+
+    if path:
+        profiler.dump_stats(path)
+
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+
+
+def profile_memory(workload: Workload, out: TextIO, limit: int) -> None:
+    tracemalloc.start()
+
+    try:
+        workload()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    statistics = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ]).statistics('lineno')
+
+    print(f'Peak traced memory: {peak / 1024:,.1f} KiB', file=out)
+
+    for statistic in statistics[:limit]:
+        print(statistic, file=out)
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+
+
+# Samples the calling thread's stack from a background thread and counts
+# identical stacks, root first. Frames above this function are left out.
+def sample_stacks(workload: Workload, interval: float) -> dict[str, int]:
+    thread_id = threading.get_ident()
+    root = sys._getframe()
+    stacks: dict[str, int] = {}
+    running = threading.Event()
+    done = threading.Event()
+
+    def sample() -> None:
+        running.wait()
+
+        while not done.wait(interval):
+            frame = sys._current_frames().get(thread_id)
+            names = []
+
+            while frame is not None and frame is not root:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+
+            if names and not done.is_set():
+                stack = ';'.join(reversed(names))
+                stacks[stack] = stacks.get(stack, 0) + 1
+
+    # Hand the GIL to the sampler about as often as it wants to sample
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(switch_interval, interval))
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    try:
+        running.set()
+        workload()
+    finally:
+        done.set()
+        sampler.join()
+        sys.setswitchinterval(switch_interval)
+
+    return stacks
+
+
+def write_collapsed(stacks: dict[str, int], out: TextIO) -> None:
+    for stack, count in sorted(stacks.items()):
+        out.write(f'{stack} {count}\n')
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m openroboadvisor.profile',
+        description='Profile a workload against a large portfolio.',
+    )
+    parser.add_argument('workload', choices=sorted(WORKLOADS))
+    parser.add_argument(
+        '--accounts', type=int, default=1000,
+        help='accounts in the synthetic portfolio',
+    )
+    parser.add_argument(
+        '--trades', type=int, default=10,
+        help='trades per synthetic account',
+    )
+    parser.add_argument(
+        '--portfolio',
+        help='load a portfolio saved with openroboadvisor.serialization '
+        'instead',
+    )
+    parser.add_argument('--sort', default='cumulative', help='pstats sort key')
+    parser.add_argument(
+        '--limit', type=int, default=25,
+        help='functions and lines to report',
+    )
+    parser.add_argument(
+        '--interval', type=float, default=0.001,
+        help='seconds between stack samples',
+    )
+    parser.add_argument(
+        '--output',
+        help='write <output>.prof and <output>.folded',
+    )
+    args = parser.parse_args(argv)
+
+    if args.portfolio:
+        portfolio = load_portfolio(args.portfolio)
+    else:
+        portfolio = make_portfolio(args.accounts, args.trades)
+
+    out = sys.stdout
+    make_workload = WORKLOADS[args.workload]
+    print(
+        f'{args.workload}: {len(portfolio.accounts)} accounts, '
+        f'{len(portfolio.ledger.entries)} entries',
+        file=out,
+    )
+
+    start = time.perf_counter()
+    make_workload(portfolio)()
+    print(f'Wall time: {time.perf_counter() - start:.3f}s\n', file=out)
+
+    profile_time(
+        make_workload(portfolio),
+        out,
+        args.sort,
+        args.limit,
+        f'{args.output}.prof' if args.output else None,
+    )
+    profile_memory(make_workload(portfolio), out, args.limit)
+
+    stacks = sample_stacks(make_workload(portfolio), args.interval)
+
+    if args.output:
+        with open(f'{args.output}.folded', 'w', encoding='utf-8') as folded:
+            write_collapsed(stacks, folded)
+
+        print(f'\nWrote {args.output}.prof and {args.output}.folded', file=out)
+    else:
+        samples = sum(stacks.values())
+        print(f'\nCollapsed stacks ({samples} samples):', file=out)
+        write_collapsed(stacks, out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+from openroboadvisor.lazy import lazy_exports
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .archive import AccountArchive
+    from .binary import (
+        Decoder,
+        Encoder,
+        dump_ledger,
+        dump_portfolio,
+        dump_suggestions,
+        load_ledger,
+        load_portfolio,
+        load_suggestions,
+    )
+
+__all__ = [
+    'AccountArchive',
+    'Decoder',
+    'Encoder',
+    'dump_ledger',
+    'dump_portfolio',
+    'dump_suggestions',
+    'load_ledger',
+    'load_portfolio',
+    'load_suggestions',
+]
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'AccountArchive': '.archive',
+    'Decoder': '.binary',
+    'Encoder': '.binary',
+    'dump_ledger': '.binary',
+    'dump_portfolio': '.binary',
+    'dump_suggestions': '.binary',
+    'load_ledger': '.binary',
+    'load_portfolio': '.binary',
+    'load_suggestions': '.binary',
+})
@@ -0,0 +1,56 @@
+from .binary import Decoder, Encoder
+from openroboadvisor.ledger.account import Account
+from openroboadvisor.ledger.entry import Entry
+from os.path import getsize, exists
+from typing import Iterator, List, Tuple
+
+
+# Closed accounts, appended to a local file in the binary format. Each account
+# is written as a stream of its own (its final state, then its entries), so
+# the file can be appended to across runs and still read with one Decoder.
+class AccountArchive:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def add(self, account: Account, entries: List[Entry]) -> None:
+        with open(self.path, 'ab') as stream:
+            encoder = Encoder(stream)
+            encoder.write_account(account)
+
+            for entry in entries:
+                encoder.write_entry(entry)
+
+            encoder.flush()
+
+    def get(self, account_id: str) -> Tuple[Account, List[Entry]] | None:
+        found = None
+
+        # An account that was reopened and closed again is archived twice;
+        # the latest copy has its full history.
+        for account, entries in self:
+            if account.account_id == account_id:
+                found = (account, entries)
+
+        return found
+
+    def __iter__(self) -> Iterator[Tuple[Account, List[Entry]]]:
+        if not exists(self.path) or not getsize(self.path):
+            return
+
+        with open(self.path, 'rb') as stream:
+            account = None
+            entries: List[Entry] = []
+
+            for record in Decoder(stream):
+                if isinstance(record, Account):
+                    if account is not None:
+                        yield account, entries
+
+                    account = record
+                    entries = []
+                else:
+                    assert isinstance(record, Entry), f"Expected a ledger entry (record={record})"
+                    entries.append(record)
+
+            if account is not None:
+                yield account, entries
@@ -0,0 +1,445 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.suggestion import Buy, Sell, Suggestion
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import Account, AccountType, Subaccount
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.entry import CloseAccount, Entry, OpenAccount, Transaction, TransactionLeg
+from openroboadvisor.portfolio import Portfolio
+from typing import BinaryIO, Iterator, List, Tuple, cast
+
+
+# A stream is the magic header followed by tagged records. Strings (symbols,
+# lots, account and subaccount ids) are written once, the first time they
+# are used, and referred to by their position in the string table after
+# that. Integers are zigzag varints, decimals are a scaled integer and an
+# exponent, and dates are ordinals. Streams can be concatenated: a magic
+# header in place of a tag starts a new string table.
+MAGIC = b'ORA\x01'
+
+STRING = 0x01
+OPEN_ACCOUNT = 0x10
+CLOSE_ACCOUNT = 0x11
+TRANSACTION = 0x12
+ACCOUNT = 0x13
+BUY = 0x20
+SELL = 0x21
+
+CURRENCY = 0
+SECURITY = 1
+SECURITY_WITH_LOT = 2
+
+BALANCED = 0x01
+HAS_COST = 0x01
+
+# Buffered bytes are written to the stream once they pass this size
+FLUSH_SIZE = 1 << 16
+
+Record = Entry | Tuple[str, Suggestion] | Account
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    value = value << 1 if value >= 0 else ((-value) << 1) - 1
+
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+
+class Encoder:
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.buffer = bytearray(MAGIC)
+        self.strings: dict[str, int] = {}
+
+    def write_entry(self, entry: Entry) -> None:
+        buffer = self.buffer
+        entry_type = type(entry)
+
+        if entry_type is Transaction:
+            transaction = cast(Transaction, entry)
+            legs = transaction.legs
+
+            for leg in legs:
+                self._define(leg.account_id)
+                self._define(leg.subaccount_id)
+                self._define_asset(leg.asset_type)
+
+                if leg.cost:
+                    self._define_asset(leg.cost[1])
+
+            buffer.append(TRANSACTION)
+            write_varint(buffer, entry.entry_date.toordinal())
+            buffer.append(BALANCED if transaction.balanced else 0)
+            write_varint(buffer, len(legs))
+
+            for leg in legs:
+                write_varint(buffer, self.strings[leg.account_id])
+                write_varint(buffer, self.strings[leg.subaccount_id])
+                self._write_asset(leg.asset_type)
+                self._write_decimal(leg.quantity)
+
+                if leg.cost:
+                    buffer.append(HAS_COST)
+                    self._write_decimal(leg.cost[0])
+                    self._write_asset(leg.cost[1])
+                else:
+                    buffer.append(0)
+        elif entry_type is OpenAccount:
+            open_account = cast(OpenAccount, entry)
+            self._define(open_account.account_id)
+            buffer.append(OPEN_ACCOUNT)
+            write_varint(buffer, entry.entry_date.toordinal())
+            write_varint(buffer, self.strings[open_account.account_id])
+            write_varint(buffer, open_account.account_type.value)
+        elif entry_type is CloseAccount:
+            close_account = cast(CloseAccount, entry)
+            exempt_subaccount_ids = close_account.exempt_subaccount_ids
+            self._define(close_account.account_id)
+
+            for subaccount_id in exempt_subaccount_ids:
+                self._define(subaccount_id)
+
+            buffer.append(CLOSE_ACCOUNT)
+            write_varint(buffer, entry.entry_date.toordinal())
+            write_varint(buffer, self.strings[close_account.account_id])
+            write_varint(buffer, len(exempt_subaccount_ids))
+
+            for subaccount_id in exempt_subaccount_ids:
+                write_varint(buffer, self.strings[subaccount_id])
+        else:
+            raise Exception(
+                "Unable to encode entry for unknown "
+                f"entry type (type='{entry_type.__name__}')"
+            )
+
+        self._maybe_flush()
+
+    # An account's current state: its type and every subaccount's assets
+    def write_account(self, account: Account) -> None:
+        buffer = self.buffer
+        self._define(account.account_id)
+
+        for subaccount_id, subaccount in account.subaccounts.items():
+            self._define(subaccount_id)
+
+            for asset_type in subaccount.assets:
+                self._define_asset(asset_type)
+
+        buffer.append(ACCOUNT)
+        write_varint(buffer, self.strings[account.account_id])
+        write_varint(buffer, account.account_type.value)
+        write_varint(buffer, len(account.subaccounts))
+
+        for subaccount_id, subaccount in account.subaccounts.items():
+            write_varint(buffer, self.strings[subaccount_id])
+            write_varint(buffer, len(subaccount.assets))
+
+            for asset_type, quantity in subaccount.assets.items():
+                self._write_asset(asset_type)
+                self._write_decimal(quantity)
+
+        self._maybe_flush()
+
+    def write_suggestion(self, account_id: str, suggestion: Suggestion) -> None:
+        self._define(account_id)
+        self._define_asset(suggestion.asset_type)
+        self.buffer.append(BUY if isinstance(suggestion, Buy) else SELL)
+        write_varint(self.buffer, self.strings[account_id])
+        self._write_asset(suggestion.asset_type)
+        self._write_decimal(suggestion.amount)
+        self._maybe_flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.buffer = bytearray()
+
+    def _maybe_flush(self) -> None:
+        if len(self.buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def _define(self, value: str) -> None:
+        if value not in self.strings:
+            self.strings[value] = len(self.strings)
+            encoded = value.encode('utf-8')
+            self.buffer.append(STRING)
+            write_varint(self.buffer, len(encoded))
+            self.buffer += encoded
+
+    def _define_asset(self, asset_type: AssetType) -> None:
+        self._define(asset_type.symbol)
+
+        if isinstance(asset_type, Security) and asset_type.lot is not None:
+            self._define(asset_type.lot)
+
+    def _write_asset(self, asset_type: AssetType) -> None:
+        if isinstance(asset_type, Security):
+            if asset_type.lot is not None:
+                self.buffer.append(SECURITY_WITH_LOT)
+                write_varint(self.buffer, self.strings[asset_type.symbol])
+                write_varint(self.buffer, self.strings[asset_type.lot])
+            else:
+                self.buffer.append(SECURITY)
+                write_varint(self.buffer, self.strings[asset_type.symbol])
+        elif isinstance(asset_type, Currency):
+            self.buffer.append(CURRENCY)
+            write_varint(self.buffer, self.strings[asset_type.symbol])
+        else:
+            raise Exception(
+                "Unable to encode asset for unknown "
+                f"asset type (type='{type(asset_type).__name__}')"
+            )
+
+    def _write_decimal(self, value: Decimal | int) -> None:
+        if isinstance(value, int):
+            write_varint(self.buffer, value)
+            write_varint(self.buffer, 0)
+        else:
+            sign, digits, exponent = value.as_tuple()
+            assert isinstance(exponent, int), f"Unable to encode non-finite decimal (value={value})"
+            coefficient = int(''.join(map(str, digits))) if digits else 0
+            write_varint(self.buffer, -coefficient if sign else coefficient)
+            write_varint(self.buffer, exponent)
+
+
+class Decoder:
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.strings: List[str] = []
+        self.currencies: List[Currency | None] = []
+        self.securities: List[Security | None] = []
+        self.data = b''
+        self.position = 0
+        assert self._read_bytes(len(MAGIC)) == MAGIC, "Not an Open Robo-Advisor binary stream"
+
+    def __iter__(self) -> Iterator[Record]:
+        while True:
+            if self.position >= len(self.data) and not self._fill(1):
+                return
+
+            tag = self._read_byte()
+
+            if tag == STRING:
+                value = self._read_bytes(self._read_varint()).decode('utf-8')
+                self.strings.append(value)
+                self.currencies.append(None)
+                self.securities.append(None)
+            elif tag == TRANSACTION:
+                entry_date = date.fromordinal(self._read_varint())
+                balanced = bool(self._read_byte() & BALANCED)
+                legs = []
+
+                for _ in range(self._read_varint()):
+                    account_id = self.strings[self._read_varint()]
+                    subaccount_id = self.strings[self._read_varint()]
+                    asset_type = self._read_asset()
+                    quantity = self._read_decimal()
+                    cost = None
+
+                    if self._read_byte() & HAS_COST:
+                        cost = (self._read_decimal(), self._read_asset())
+
+                    legs.append(TransactionLeg(account_id, subaccount_id, asset_type, quantity, cost))
+
+                yield Transaction(*legs, entry_date=entry_date, balanced=balanced)
+            elif tag == OPEN_ACCOUNT:
+                entry_date = date.fromordinal(self._read_varint())
+                yield OpenAccount(
+                    account_id=self.strings[self._read_varint()],
+                    account_type=AccountType(self._read_varint()),
+                    entry_date=entry_date,
+                )
+            elif tag == CLOSE_ACCOUNT:
+                entry_date = date.fromordinal(self._read_varint())
+                account_id = self.strings[self._read_varint()]
+                yield CloseAccount(
+                    account_id=account_id,
+                    entry_date=entry_date,
+                    exempt_subaccount_ids=tuple(
+                        self.strings[self._read_varint()] for _ in range(self._read_varint())
+                    ),
+                )
+            elif tag == ACCOUNT:
+                account = Account(
+                    account_id=self.strings[self._read_varint()],
+                    account_type=AccountType(self._read_varint()),
+                )
+
+                for _ in range(self._read_varint()):
+                    subaccount_id = self.strings[self._read_varint()]
+                    assets = {}
+
+                    for _ in range(self._read_varint()):
+                        asset_type = self._read_asset()
+                        assets[asset_type] = self._read_decimal()
+
+                    account.subaccounts[subaccount_id] = Subaccount(subaccount_id, assets)
+
+                yield account
+            elif tag == MAGIC[0]:
+                assert self._read_bytes(len(MAGIC) - 1) == MAGIC[1:], "Not an Open Robo-Advisor binary stream"
+                self.strings = []
+                self.currencies = []
+                self.securities = []
+            elif tag == BUY or tag == SELL:
+                account_id = self.strings[self._read_varint()]
+                asset_type = self._read_asset()
+                amount = self._read_decimal()
+                yield account_id, (Buy if tag == BUY else Sell)(asset_type, amount)
+            else:
+                raise Exception(f"Unknown record tag in binary stream (tag={tag})")
+
+    def _fill(self, size: int) -> bool:
+        # Keep unread bytes and top the buffer up from the stream.
+        data = self.data[self.position:]
+
+        while len(data) < size:
+            chunk = self.stream.read(max(FLUSH_SIZE, size - len(data)))
+
+            if not chunk:
+                self.data = data
+                self.position = 0
+                return False
+
+            data += chunk
+
+        self.data = data
+        self.position = 0
+        return True
+
+    def _read_byte(self) -> int:
+        if self.position >= len(self.data):
+            assert self._fill(1), "Unexpected end of binary stream"
+
+        value = self.data[self.position]
+        self.position += 1
+        return value
+
+    def _read_bytes(self, size: int) -> bytes:
+        if self.position + size > len(self.data):
+            assert self._fill(size), "Unexpected end of binary stream"
+
+        value = self.data[self.position:self.position + size]
+        self.position += size
+        return value
+
+    def _read_varint(self) -> int:
+        data = self.data
+        position = self.position
+        byte = data[position] if position < len(data) else self._read_byte_at_refill()
+
+        # Most varints fit in a single byte.
+        if byte < 0x80:
+            self.position += 1
+            return (byte >> 1) ^ -(byte & 1)
+
+        shift = 0
+        value = 0
+
+        while True:
+            byte = self._read_byte()
+            value |= (byte & 0x7f) << shift
+
+            if byte < 0x80:
+                break
+
+            shift += 7
+
+        return (value >> 1) ^ -(value & 1)
+
+    def _read_byte_at_refill(self) -> int:
+        assert self._fill(1), "Unexpected end of binary stream"
+        return self.data[self.position]
+
+    def _read_decimal(self) -> Decimal:
+        coefficient = self._read_varint()
+        exponent = self._read_varint()
+
+        if not exponent:
+            return Decimal(coefficient)
+
+        sign, digits, _ = Decimal(coefficient).as_tuple()
+        return Decimal((sign, digits, exponent))
+
+    def _read_asset(self) -> AssetType:
+        kind = self._read_byte()
+        symbol_id = self._read_varint()
+
+        if kind == CURRENCY:
+            currency = self.currencies[symbol_id]
+
+            if currency is None:
+                currency = self.currencies[symbol_id] = Currency(self.strings[symbol_id])
+
+            return currency
+        elif kind == SECURITY:
+            security = self.securities[symbol_id]
+
+            if security is None:
+                security = self.securities[symbol_id] = Security(self.strings[symbol_id])
+
+            return security
+        elif kind == SECURITY_WITH_LOT:
+            return Security(self.strings[symbol_id], self.strings[self._read_varint()])
+
+        raise Exception(f"Unknown asset kind in binary stream (kind={kind})")
+
+
+def dump_entries(entries: List[Entry], stream: BinaryIO) -> None:
+    encoder = Encoder(stream)
+
+    for entry in entries:
+        encoder.write_entry(entry)
+
+    encoder.flush()
+
+
+def load_entries(stream: BinaryIO) -> Iterator[Entry]:
+    for record in Decoder(stream):
+        assert isinstance(record, Entry), f"Expected a ledger entry (record={record})"
+        yield record
+
+
+def dump_ledger(ledger: Ledger, stream: BinaryIO) -> None:
+    dump_entries(ledger.entries, stream)
+
+
+def load_ledger(stream: BinaryIO, trust_balanced: bool = True) -> Ledger:
+    ledger = Ledger(trust_balanced=trust_balanced)
+
+    for entry in load_entries(stream):
+        ledger.record(entry)
+
+    return ledger
+
+
+def dump_portfolio(portfolio: Portfolio, stream: BinaryIO) -> None:
+    dump_ledger(portfolio.ledger, stream)
+
+
+def load_portfolio(stream: BinaryIO) -> Portfolio:
+    return Portfolio(load_ledger(stream))
+
+
+def dump_suggestions(suggestions: dict[str, List[Suggestion]], stream: BinaryIO) -> None:
+    encoder = Encoder(stream)
+
+    for account_id, account_suggestions in suggestions.items():
+        for suggestion in account_suggestions:
+            encoder.write_suggestion(account_id, suggestion)
+
+    encoder.flush()
+
+
+def load_suggestions(stream: BinaryIO) -> dict[str, List[Suggestion]]:
+    suggestions: dict[str, List[Suggestion]] = {}
+
+    for record in Decoder(stream):
+        assert isinstance(record, tuple), f"Expected a suggestion (record={record})"
+        account_id, suggestion = record
+        suggestions.setdefault(account_id, []).append(suggestion)
+
+    return suggestions
@@ -0,0 +1,80 @@
+import pickle
+from decimal import Decimal
+from openroboadvisor.advisor.asset_class_advisor import AssetClassAdvisor
+from openroboadvisor.advisor.asset_class_model import AssetClassModel, UNCLASSIFIED
+from openroboadvisor.advisor.suggestion import Buy, Sell
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.portfolio import Portfolio
+
+
+ACCOUNT_ID = 'My Fidelity Account'
+PREFERRED_ASSETS = [Currency('USD'), Security('VTI')]
+ASSET_CLASSES = {
+    Currency('USD'): 'Cash',
+    Security('VTI'): 'US Stocks',
+    Security('ITOT'): 'US Stocks',
+}
+ACCOUNT_TARGETS = {
+    ACCOUNT_ID: {
+        'Cash': Decimal('0.1'),
+        'US Stocks': Decimal('0.9'),
+    }
+}
+
+
+def test_compiled_tables() -> None:
+    model = AssetClassModel(PREFERRED_ASSETS, ASSET_CLASSES, ACCOUNT_TARGETS)
+
+    assert model.class_names == ['Cash', 'US Stocks']
+    assert model.preferred_assets == [Currency('USD'), Security('VTI')]
+    assert model.class_id(Security('ITOT')) == 1
+    assert model.class_id(Security('VTI', 'lot-1')) == 1, "Expected lots to share their security's class"
+    assert model.asset_id(Security('VTI', 'lot-1')) == model.asset_id(Security('VTI'))
+    assert model.class_id(Security('SPY')) == UNCLASSIFIED
+    assert model.account_targets == {
+        ACCOUNT_ID: [(0, Decimal('0.1')), (1, Decimal('0.9'))],
+    }
+
+
+def test_lookups_dont_change_the_model() -> None:
+    model = AssetClassModel(PREFERRED_ASSETS, ASSET_CLASSES, ACCOUNT_TARGETS)
+    holding_ids = dict(model.holding_ids)
+
+    assert model.asset_id(Security('SPY')) is None
+    assert model.class_id(Security('SPY', 'lot-1')) == UNCLASSIFIED
+    assert model.class_id(Security('ITOT', 'lot-1')) == 1
+    assert model.holding_ids == holding_ids
+    assert len(model.assets) == len(ASSET_CLASSES)
+
+    model.add_holdings([Security('ITOT', 'lot-1'), Security('SPY', 'lot-1'), Currency('USD')])
+    assert model.holding_ids == holding_ids | {Security('ITOT', 'lot-1'): model.asset_ids[Security('ITOT')]}
+
+
+def test_model_is_reusable_after_pickling() -> None:
+    model = pickle.loads(pickle.dumps(
+        AssetClassModel(PREFERRED_ASSETS, ASSET_CLASSES, ACCOUNT_TARGETS)
+    ))
+    portfolio = Portfolio()
+    account = portfolio.open_account(ACCOUNT_ID)
+    account.deposit(1000)
+    account.buy(symbol='ITOT', shares=2, amount=200, lot='lot-1')
+    account.buy(symbol='SPY', shares=1, amount=100)
+
+    advisor = AssetClassAdvisor(
+        portfolio=portfolio,
+        quotes={
+            Currency('USD'): 1,
+            Security('VTI'): Decimal(200),
+            Security('ITOT'): Decimal(100),
+            Security('SPY'): Decimal(100),
+        },
+        model=model,
+    )
+
+    suggestions = advisor.get_suggestions()[ACCOUNT_ID]
+
+    assert sorted(suggestions, key=lambda s: s.asset_type.symbol) == [
+        Sell(asset_type=Security('SPY'), amount=Decimal(100)),
+        Sell(asset_type=Currency('USD'), amount=Decimal(600)),
+        Buy(asset_type=Security('VTI'), amount=Decimal(700)),
+    ]
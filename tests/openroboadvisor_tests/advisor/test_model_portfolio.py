@@ -0,0 +1,126 @@
+from decimal import Decimal
+from openroboadvisor.advisor.asset_class_advisor import AssetClassAdvisor
+from openroboadvisor.advisor.asset_class_model import AssetClassModel
+from openroboadvisor.advisor.model_portfolio import ModelPortfolio, get_account_models
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
+from pytest import raises
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+BND = Security('BND')
+QUOTES: dict[AssetType, Quote] = {USD: Decimal(1), VTI: Decimal(200), BND: Decimal(50)}
+
+
+def test_model_validation() -> None:
+    model = ModelPortfolio('thirds', {USD: Decimal('0.333333'), VTI: Decimal('0.333333'), BND: Decimal('0.333334')})
+    assert model.keys == [USD, VTI, BND]
+    assert model.weights == [Decimal('0.333333'), Decimal('0.333333'), Decimal('0.333334')]
+
+    # Close enough to 100% for weights written out to a few places
+    ModelPortfolio('rounded', {VTI: Decimal('0.6666667'), BND: Decimal('0.3333333')})
+
+    with raises(AssertionError, match=r"Model targets must add up to 100%.*total=0\.9"):
+        ModelPortfolio('short', {VTI: Decimal('0.6'), BND: Decimal('0.3')})
+
+    with raises(AssertionError, match=r"Model targets can't be negative.*"):
+        ModelPortfolio('short', {VTI: Decimal('1.5'), BND: Decimal('-0.5')})
+
+
+def test_account_models() -> None:
+    targets = {VTI: Decimal('0.6'), BND: Decimal('0.4')}
+    growth = ModelPortfolio('growth', {VTI: Decimal(1)})
+    account_models = get_account_models(
+        account_targets={'a': targets, 'b': targets, 'c': {VTI: Decimal(1)}},
+        models=[growth],
+        account_models={'d': 'growth', 'e': 'growth'},
+    )
+
+    # Accounts given the same targets share one model, named after the first
+    assert account_models['a'] is account_models['b']
+    assert account_models['a'].model_id == '__account:a'
+    assert account_models['c'] is not account_models['a']
+    assert account_models['d'] is account_models['e'] is growth
+
+    with raises(AssertionError, match=r"Unable to find model.*model_id=income"):
+        get_account_models(models=[growth], account_models={'a': 'income'})
+
+    with raises(AssertionError, match=r"Model targets must add up to 100%.*"):
+        get_account_models(account_targets={'a': {VTI: Decimal('0.5')}})
+
+    with raises(AssertionError, match=r"Duplicate model id.*model_id=growth"):
+        get_account_models(models=[growth, ModelPortfolio('growth', {BND: Decimal(1)})])
+
+
+def test_account_named_like_model() -> None:
+    stocks = {'Stocks': Decimal(1)}
+    model = AssetClassModel(
+        preferred_assets=[VTI, BND],
+        asset_classes={VTI: 'Stocks', BND: 'Bonds'},
+        account_targets={'growth': stocks},
+        models=[ModelPortfolio('growth', {'Bonds': Decimal(1)})],
+        account_models={'b': 'growth'},
+    )
+
+    stocks_id = model.class_ids['Stocks']
+    bonds_id = model.class_ids['Bonds']
+    assert model.account_targets['growth'] == [(stocks_id, Decimal(1))]
+    assert model.account_targets['b'] == [(bonds_id, Decimal(1))]
+
+
+def test_advisors_follow_models() -> None:
+    portfolio = Portfolio()
+
+    for account_id in ['a', 'b', 'c']:
+        account = portfolio.open_account(account_id)
+        account.deposit(1000)
+        account.buy(symbol='VTI', shares=1, amount=200)
+
+    balanced: ModelPortfolio[AssetType] = ModelPortfolio('balanced', {VTI: Decimal('0.6'), BND: Decimal('0.4')})
+    models = SimpleAdvisor(
+        portfolio=portfolio,
+        quotes=QUOTES,
+        models=[balanced],
+        account_models={'a': 'balanced', 'b': 'balanced', 'c': 'balanced'},
+    ).get_suggestions()
+    targets = SimpleAdvisor(
+        portfolio=portfolio,
+        account_targets={account_id: balanced.targets for account_id in ['a', 'b', 'c']},
+        quotes=QUOTES,
+    ).get_suggestions()
+
+    assert models == targets
+
+    asset_classes = {USD: 'Cash', VTI: 'Stocks', BND: 'Bonds'}
+    balanced_classes = ModelPortfolio('balanced', {'Stocks': Decimal('0.6'), 'Bonds': Decimal('0.4')})
+    model = AssetClassModel(
+        preferred_assets=[USD, VTI, BND],
+        asset_classes=asset_classes,
+        models=[balanced_classes],
+        account_models={'a': 'balanced', 'b': 'balanced', 'c': 'balanced'},
+    )
+
+    # Compiled once and shared by every account on the model
+    assert model.model_targets == {'balanced': [(1, Decimal('0.6')), (2, Decimal('0.4'))]}
+    assert model.account_targets['a'] is model.account_targets['c']
+
+    assert AssetClassAdvisor(portfolio=portfolio, quotes=QUOTES, model=model).get_suggestions() == \
+        AssetClassAdvisor(
+            portfolio=portfolio,
+            quotes=QUOTES,
+            preferred_assets=[USD, VTI, BND],
+            asset_classes=asset_classes,
+            account_targets={account_id: balanced_classes.targets for account_id in ['a', 'b', 'c']},
+        ).get_suggestions()
+
+    # Classes the model buys into need a preferred asset
+    with raises(AssertionError, match=r"Unable to find preferred asset.*asset_class=Bonds"):
+        AssetClassModel(
+            preferred_assets=[USD, VTI],
+            asset_classes=asset_classes,
+            models=[balanced_classes],
+            account_models={'a': 'balanced'},
+        )
@@ -0,0 +1,98 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.netting import OrderBatcher, apply_fills
+from openroboadvisor.advisor.suggestion import Buy, Sell
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+VEA = Security('VEA')
+TRADE_DATE = date(2022, 1, 3)
+QUOTES: dict[AssetType, Decimal] = {VTI: Decimal(200), VEA: Decimal(50)}
+
+
+def test_nets_buys_against_sells() -> None:
+    batcher = OrderBatcher(QUOTES, fees=10)
+    orders, fills = batcher.batch({
+        'a': [Buy(VTI, Decimal(700)), Buy(USD, Decimal(5))],
+        'b': [Buy(VTI, Decimal(350))],
+        'c': [Sell(Security('VTI', 'lot-1'), Decimal(300))],
+    })
+
+    order, = orders
+    assert order.asset_type == VTI
+    # 1.5 shares to sell crosses 1 share
+    assert (order.crossed_shares, order.crossed_amount) == (Decimal(1), Decimal(200))
+    # 750 net rounds down to 3 shares
+    assert (order.shares, order.amount) == (Decimal(3), Decimal(600))
+
+    # 4 shares bought between 3.5 and 1.75 requested; a has the larger
+    # request, so it gets the share left over after rounding
+    by_account = {fill.account_id: fill for fill in fills}
+    assert by_account['a'].suggestion == Buy(VTI, Decimal(600))
+    assert (by_account['a'].shares, by_account['a'].fees) == (Decimal(3), Decimal('7.5'))
+    assert by_account['b'].suggestion == Buy(VTI, Decimal(200))
+    assert (by_account['b'].shares, by_account['b'].fees) == (Decimal(1), Decimal('2.5'))
+    assert by_account['c'].suggestion == Sell(Security('VTI', 'lot-1'), Decimal(200))
+    assert (by_account['c'].shares, by_account['c'].fees) == (Decimal(1), Decimal(0))
+
+
+def test_fills_are_whole_increments() -> None:
+    batcher = OrderBatcher(QUOTES, share_increment=5, fees=9)
+    orders, fills = batcher.batch({
+        account_id: [Buy(VEA, Decimal(amount))]
+        for account_id, amount in [('a', 600), ('b', 500), ('c', 400), ('d', 100)]
+    })
+
+    # 1600 buys 30 of the 32 shares requested, in increments of 5
+    assert orders[0].shares == 30
+    # Pro rata that's 2.25, 1.875, 1.5 and 0.375 increments; the 2 left over
+    # after rounding down go to the largest requests, a and b
+    assert [(fill.account_id, fill.shares) for fill in fills] == [('a', Decimal(15)), ('b', Decimal(10)), ('c', Decimal(5))]
+    assert [fill.suggestion.amount for fill in fills] == [750, 500, 250]
+    assert sum(fill.fees for fill in fills) == 9
+
+
+def test_fully_crossed_orders_skip_the_market() -> None:
+    batcher = OrderBatcher(QUOTES, fees=10)
+    orders, fills = batcher.batch({
+        'a': [Buy(VEA, Decimal(100))],
+        'b': [Sell(VEA, Decimal(100))],
+    })
+
+    assert orders[0].amount == 0
+    assert [fill.suggestion for fill in fills] == [Buy(VEA, Decimal(100)), Sell(VEA, Decimal(100))]
+    assert all(fill.fees == 0 for fill in fills)
+
+
+def test_min_trade_amount() -> None:
+    batcher = OrderBatcher(QUOTES, min_trade_amount=500)
+    orders, fills = batcher.batch({
+        'a': [Sell(VTI, Decimal(400))],
+        'b': [Buy(VEA, Decimal(120))],
+    })
+
+    assert [order.amount for order in orders] == [0, 0]
+    assert fills == []
+
+
+def test_apply_fills() -> None:
+    portfolio = Portfolio()
+
+    for account_id in ('a', 'b'):
+        portfolio.open_account(account_id).deposit(1000, transfer_date=TRADE_DATE)
+
+    portfolio.accounts['b'].buy('VTI', shares=2, amount=400, trade_date=TRADE_DATE)
+
+    _, fills = OrderBatcher(QUOTES).batch({
+        'a': [Buy(VTI, Decimal(600))],
+        'b': [Sell(VTI, Decimal(200))],
+    })
+    apply_fills(portfolio, fills, trade_date=TRADE_DATE)
+
+    a = portfolio.accounts['a'].get_balances()
+    b = portfolio.accounts['b'].get_balances()
+    assert (a.cash[USD], a.securities[VTI]) == (Decimal(400), Decimal(3))
+    assert (b.cash[USD], b.securities[VTI]) == (Decimal(800), Decimal(1))
@@ -0,0 +1,126 @@
+from decimal import Decimal
+from openroboadvisor.advisor.rounding import round_suggestions
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.advisor.suggestion import Buy, Sell
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+VEA = Security('VEA')
+VWO = Security('VWO')
+QUOTES: dict[AssetType, Quote] = {VTI: Decimal(100), VEA: Decimal(40), VWO: Decimal(30)}
+
+
+def test_spends_leftover_cash_on_largest_shortfall() -> None:
+    rounded, leftover_cash = round_suggestions(
+        [Buy(VTI, Decimal(250)), Buy(VEA, Decimal(130)), Buy(VWO, Decimal(50)), Buy(USD, Decimal(5))],
+        QUOTES,
+    )
+
+    # Flooring to 2 VTI, 3 VEA and 1 VWO leaves 80. VTI is furthest below
+    # target but no longer affordable, so VWO and then VEA get one more.
+    assert rounded == [
+        Buy(VTI, Decimal(200), Decimal(2)),
+        Buy(VEA, Decimal(160), Decimal(4)),
+        Buy(VWO, Decimal(60), Decimal(2)),
+    ]
+    assert leftover_cash == 10
+
+
+def test_sells_round_to_nearest_and_fund_buys() -> None:
+    rounded, leftover_cash = round_suggestions(
+        [Sell(VTI, Decimal(260)), Buy(VEA, Decimal(180))],
+        QUOTES,
+        positions={VTI: Decimal(5)},
+    )
+
+    assert rounded == [
+        Sell(VTI, Decimal(300), Decimal(3)),
+        Buy(VEA, Decimal(200), Decimal(5)),
+    ]
+    assert leftover_cash == 20
+
+
+def test_sells_are_capped_at_whole_increments_held() -> None:
+    rounded, leftover_cash = round_suggestions(
+        [Sell(VTI, Decimal(260)), Buy(VEA, Decimal(260))],
+        QUOTES,
+        positions={VTI: Decimal('2.5')},
+    )
+
+    # Only 2 of the 2.5 shares held can be sold in whole shares
+    assert rounded == [
+        Sell(VTI, Decimal(200), Decimal(2)),
+        Buy(VEA, Decimal(200), Decimal(5)),
+    ]
+    assert leftover_cash == 0
+
+
+def test_sells_count_lots_as_held() -> None:
+    lot_1 = Security('VTI', 'lot-1')
+    positions: dict[Security, Decimal] = {lot_1: Decimal(2), Security('VTI', 'lot-2'): Decimal(2)}
+
+    rounded, _ = round_suggestions([Sell(VTI, Decimal(350))], QUOTES, positions=positions)
+    assert rounded == [Sell(VTI, Decimal(400), Decimal(4))]
+
+    rounded, _ = round_suggestions([Sell(lot_1, Decimal(350))], QUOTES, positions=positions)
+    assert rounded == [Sell(lot_1, Decimal(200), Decimal(2))]
+
+
+def test_sells_of_unheld_securities_are_dropped() -> None:
+    rounded, leftover_cash = round_suggestions(
+        [Sell(VEA, Decimal(120)), Buy(VWO, Decimal(60))],
+        QUOTES,
+        positions={VTI: Decimal(5)},
+    )
+
+    # Nothing is held to sell, so there's no cash for the buy either
+    assert rounded == []
+    assert leftover_cash == -60
+
+
+def test_gives_back_buys_when_sells_round_down() -> None:
+    rounded, leftover_cash = round_suggestions(
+        [Sell(VTI, Decimal(140)), Buy(VEA, Decimal(140))],
+        QUOTES,
+    )
+
+    # The sell rounds to 100, which only pays for 2 VEA
+    assert rounded == [
+        Sell(VTI, Decimal(100), Decimal(1)),
+        Buy(VEA, Decimal(80), Decimal(2)),
+    ]
+    assert leftover_cash == 20
+
+
+def test_fractional_increment() -> None:
+    rounded, leftover_cash = round_suggestions(
+        [Buy(VTI, Decimal('123.456'))],
+        QUOTES,
+        share_increment=Decimal('0.01'),
+    )
+
+    assert rounded == [Buy(VTI, Decimal('123.00'), Decimal('1.23'))]
+    assert leftover_cash == Decimal('0.456')
+
+
+def test_advisor_share_increment() -> None:
+    portfolio = Portfolio()
+    account = portfolio.open_account('a')
+    account.deposit(1000)
+
+    advisor = SimpleAdvisor(
+        portfolio=portfolio,
+        account_targets={'a': {VTI: Decimal('0.5'), VEA: Decimal('0.5')}},
+        quotes=QUOTES,
+        share_increment=1,
+    )
+
+    assert advisor.get_account_suggestions('a') == [
+        Buy(VTI, Decimal(500), Decimal(5)),
+        Buy(VEA, Decimal(480), Decimal(12)),
+    ]
+    assert advisor.leftover_cash['a'] == 20
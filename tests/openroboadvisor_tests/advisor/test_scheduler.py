@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import count
+from openroboadvisor.advisor.asset_class_advisor import AssetClassAdvisor
+from openroboadvisor.advisor.base_advisor import BaseAdvisor
+from openroboadvisor.advisor.scheduler import RebalanceScheduler
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.advisor.suggestion import Buy, Suggestion
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import FxRates, Quote
+from typing import Callable, List
+
+
+USD = Currency('USD')
+CAD = Currency('CAD')
+VTI = Security('VTI')
+ITOT = Security('ITOT')
+SPY = Security('SPY')
+START = date(2022, 1, 3)
+QUOTES: dict[AssetType, Quote] = {USD: Decimal(1), VTI: Decimal(100), ITOT: Decimal(50), SPY: Decimal(200)}
+
+
+def make_advisor() -> SimpleAdvisor:
+    portfolio = Portfolio()
+    targets: dict[AssetType, Decimal] = {VTI: Decimal(1)}
+
+    for account_id in ['invested', 'cash', 'partial', 'drifted']:
+        portfolio.open_account(account_id, create_date=START).deposit(10000, transfer_date=START)
+
+    portfolio.accounts['invested'].buy('VTI', shares=100, amount=10000, trade_date=START)
+    portfolio.accounts['partial'].buy('VTI', shares=60, amount=6000, trade_date=START)
+    # Fully invested, but in the wrong security
+    portfolio.accounts['drifted'].buy('ITOT', shares=200, amount=10000, trade_date=START)
+
+    return SimpleAdvisor(
+        portfolio,
+        account_targets={account_id: targets for account_id in portfolio.accounts},
+        quotes=QUOTES,
+    )
+
+
+# A clock that moves one second every time it's read
+def ticking_clock() -> Callable[[], float]:
+    return count().__next__
+
+
+def test_account_drift() -> None:
+    advisor = make_advisor()
+
+    assert advisor.get_account_drift('invested') == 0
+    assert advisor.get_account_drift('cash') == 1
+    assert advisor.get_account_drift('partial') == Decimal('0.4')
+    assert advisor.get_account_drift('drifted') == 1
+
+    portfolio = Portfolio()
+    account = portfolio.open_account('a')
+    account.deposit(1000)
+    account.buy('VTI', shares=4, amount=400)
+    account.buy('SPY', shares=1, amount=200)
+    asset_class_advisor = AssetClassAdvisor(
+        portfolio,
+        preferred_assets=[USD, VTI],
+        asset_classes={USD: 'Cash', VTI: 'US Stocks'},
+        account_targets={'a': {'Cash': Decimal('0.2'), 'US Stocks': Decimal('0.8')}},
+        quotes=QUOTES,
+    )
+
+    # 200 more cash than targeted, 400 short of US stocks and 200 of
+    # unclassified SPY to sell
+    assert asset_class_advisor.get_account_drift('a') == Decimal('0.4')
+
+
+def test_priority_order() -> None:
+    advisor = make_advisor()
+    scheduler = RebalanceScheduler(advisor, as_of=START)
+
+    suggestions = scheduler.run(as_of=START)
+
+    # Cash is more urgent than the same drift in securities, and accounts on
+    # target aren't rebalanced at all
+    assert list(suggestions) == ['cash', 'drifted', 'partial']
+    assert Buy(VTI, Decimal(10000)) in suggestions['cash']
+    assert scheduler.pending == 0
+
+    # Nothing has changed since
+    assert scheduler.run(as_of=START) == {}
+
+    # Accounts come back when the ledger posts to them
+    advisor.portfolio.accounts['invested'].deposit(10000, transfer_date=START)
+    assert list(scheduler.run(as_of=START)) == ['invested']
+
+
+def test_budget() -> None:
+    advisor = make_advisor()
+    scheduler = RebalanceScheduler(advisor, budget=1, clock=ticking_clock(), as_of=START)
+
+    # One account per run; the rest are carried over
+    assert list(scheduler.run(as_of=START)) == ['cash']
+    assert scheduler.pending == 2
+    assert list(scheduler.run(as_of=START)) == ['drifted']
+    assert list(scheduler.run(as_of=START)) == ['partial']
+    assert scheduler.pending == 0
+
+
+def test_budget_limits_scoring() -> None:
+    advisor = make_advisor()
+    scheduler = RebalanceScheduler(advisor, budget=2, clock=ticking_clock(), as_of=START, chunk_size=1)
+
+    # The budget runs out after scoring invested and cash; partial and
+    # drifted are left for the next run
+    assert list(scheduler.run(as_of=START)) == ['cash']
+    assert list(scheduler.dirty) == ['partial', 'drifted']
+
+    assert list(scheduler.run(as_of=START)) == ['drifted']
+    assert list(scheduler.dirty) == []
+    assert list(scheduler.run(as_of=START)) == ['partial']
+    assert scheduler.pending == 0
+
+
+def test_age() -> None:
+    advisor = make_advisor()
+    scheduler = RebalanceScheduler(advisor, budget=1, clock=ticking_clock(), age_weight=0.01, as_of=START)
+
+    later = START + timedelta(days=200)
+    assert list(scheduler.run(as_of=later)) == ['cash']
+
+    # cash gets more cash, but drifted has been waiting 200 days longer
+    advisor.portfolio.accounts['cash'].deposit(10000, transfer_date=later)
+    assert list(scheduler.run(as_of=later)) == ['drifted']
+
+    # Without the wait, cash goes first
+    scheduler = RebalanceScheduler(advisor, budget=1, clock=ticking_clock(), age_weight=0, as_of=START)
+    assert list(scheduler.run(as_of=later)) == ['cash']
+
+
+def test_drift_threshold() -> None:
+    advisor = make_advisor()
+    scheduler = RebalanceScheduler(advisor, drift_threshold=Decimal('0.5'), as_of=START)
+
+    assert list(scheduler.run(as_of=START)) == ['cash', 'drifted']
+
+
+def test_advisor_currency() -> None:
+    fx = FxRates()
+    fx.set_rate(USD, CAD, Decimal('1.25'))
+    portfolio = Portfolio()
+    portfolio.open_account('cad', create_date=START).deposit(1000, currency='CAD', transfer_date=START)
+    usd = portfolio.open_account('usd', create_date=START)
+    usd.deposit(1000, transfer_date=START)
+    usd.buy('VTI', shares=8, amount=800, trade_date=START)
+
+    advisor = SimpleAdvisor(
+        portfolio,
+        account_targets={'cad': {VTI: Decimal(1)}, 'usd': {VTI: Decimal(1)}},
+        # VTI is quoted in USD, so valuing it in CAD needs the advisor's rates
+        quotes={VTI: (Decimal(100), USD)},
+        fx=fx,
+        currency='CAD',
+    )
+    scheduler = RebalanceScheduler(advisor, age_weight=0, as_of=START)
+
+    assert advisor.get_account_score('cad') == (Decimal(1), Decimal(1))
+    assert advisor.get_account_score('usd') == (Decimal('0.2'), Decimal('0.2'))
+    assert scheduler.get_priority('cad', Decimal(1), Decimal(1)) == 2.0
+    assert scheduler.get_priority('usd', Decimal('0.2'), Decimal('0.2')) == 0.4
+    assert list(scheduler.run(as_of=START)) == ['cad', 'usd']
+
+
+# An advisor written before drift was part of BaseAdvisor
+class BuyEverythingAdvisor(BaseAdvisor):
+    quotes = QUOTES
+
+    def get_account_suggestions(self, account_id: str) -> List[Suggestion]:
+        cash = self.portfolio.accounts[account_id].get_balances().cash.get(USD, Decimal(0))
+        return [Buy(VTI, cash)] if cash > 0 else []
+
+
+def test_default_drift() -> None:
+    advisor = BuyEverythingAdvisor(make_advisor().portfolio)
+
+    assert advisor.get_account_drift('invested') == 0
+    assert advisor.get_account_drift('partial') == Decimal('0.2')
+    assert advisor.get_account_drift('cash') == Decimal('0.5')
+    assert list(RebalanceScheduler(advisor, as_of=START).run(as_of=START)) == ['cash', 'partial']
@@ -1,8 +1,9 @@
 from decimal import Decimal
 from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
 from openroboadvisor.advisor.suggestion import Buy, Sell
-from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
 from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
 
 
 ACCOUNT_ID = 'My Fidelity Account'
@@ -48,7 +49,7 @@ def test_simple_advisor():
         }
     }
 
-    quotes = {
+    quotes: dict[AssetType, Quote] = {
         Currency('USD'): 1,
         Security('VTI'): Decimal('221.17'),
         Security('VEA'): Decimal('47.79'),
@@ -64,7 +65,7 @@ def test_simple_advisor():
         quotes=quotes,
     )
 
-    suggestions = advisor.get_suggestions().get(ACCOUNT_ID)
+    suggestions = advisor.get_suggestions()[ACCOUNT_ID]
     sorted_suggestions = sorted(suggestions, key=lambda s: s.asset_type.symbol)
 
     assert sorted_suggestions == [
@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from openroboadvisor.advisor.asset_class_advisor import AssetClassAdvisor
+from openroboadvisor.advisor.suggestion import Buy, Sell, Suggestion
+from openroboadvisor.advisor.wash_sale import TradeWindow, WashSaleGuard
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
+from typing import List
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+ITOT = Security('ITOT')
+VEA = Security('VEA')
+TODAY = date(2022, 3, 1)
+QUOTES: dict[AssetType, Quote] = {USD: Decimal(1), VTI: Decimal(180), ITOT: Decimal(90), VEA: Decimal(50)}
+
+
+def days_ago(days: int) -> date:
+    return TODAY - timedelta(days=days)
+
+
+def make_portfolio() -> Portfolio:
+    portfolio = Portfolio()
+
+    for account_id in ['a', 'b', 'c']:
+        account = portfolio.open_account(account_id, create_date=days_ago(100))
+        account.deposit(10000, transfer_date=days_ago(100))
+
+    # b has held VTI for a while and is now at a loss; a bought more recently
+    portfolio.accounts['b'].buy('VTI', shares=4, amount=1000, trade_date=days_ago(60))
+    portfolio.accounts['a'].buy('VTI', shares=1, amount=200, trade_date=days_ago(10))
+    return portfolio
+
+
+def test_trade_window() -> None:
+    window = TradeWindow()
+
+    for ordinal in [10, 20, 15, 30]:
+        window.add(ordinal)
+
+    assert window.dates == [10, 15, 20, 30]
+    assert window.any_between(16, 20)
+    assert not window.any_between(21, 29)
+
+    window.evict(16)
+    assert window.dates == [20, 30]
+
+
+def test_household_trades() -> None:
+    portfolio = make_portfolio()
+    guard = WashSaleGuard(portfolio.ledger, as_of=TODAY, households={'a': 'smith', 'b': 'smith'})
+    sell = Sell(VTI, Decimal(720))
+
+    # a's buy is in the window, and b would sell at a loss (180 < 250)
+    assert guard.is_wash_sale('b', sell, QUOTES)
+    # c isn't in the household; a's VTI isn't at a loss
+    assert not guard.is_wash_sale('c', sell, QUOTES)
+    assert not guard.is_wash_sale('a', Sell(VTI, Decimal(180)), {VTI: Decimal(210)})
+
+    # The buy falls out of the window and is evicted
+    guard.advance(TODAY + timedelta(days=21))
+    assert not guard.is_wash_sale('b', sell, QUOTES)
+    assert guard.windows == {}
+
+    # A loss sale blocks the household's buys of the same security
+    portfolio.accounts['b'].sell('VTI', shares=4, amount=720, trade_date=TODAY + timedelta(days=21))
+    assert guard.is_wash_sale('a', Buy(VTI, Decimal(100)), QUOTES)
+    assert not guard.is_wash_sale('a', Buy(VEA, Decimal(100)), QUOTES)
+    assert not guard.is_wash_sale('c', Buy(VTI, Decimal(100)), QUOTES)
+    guard.close()
+
+
+def test_filter_replaces_and_drops() -> None:
+    portfolio = make_portfolio()
+    portfolio.accounts['b'].sell('VTI', shares=4, amount=720, trade_date=days_ago(5))
+    suggestions = [Buy(VTI, Decimal(500)), Buy(VEA, Decimal(500)), Sell(USD, Decimal(1000))]
+
+    guard = WashSaleGuard(
+        portfolio.ledger,
+        as_of=TODAY,
+        households={'a': 'smith', 'b': 'smith'},
+        replacements={VTI: ITOT},
+    )
+    assert guard.filter('a', suggestions, QUOTES) == [
+        Buy(ITOT, Decimal(500)),
+        Buy(VEA, Decimal(500)),
+        Sell(USD, Decimal(1000)),
+    ]
+    assert guard.blocked == [('a', Buy(VTI, Decimal(500)))]
+
+    # Substantially identical replacements are blocked too
+    guard = WashSaleGuard(
+        portfolio.ledger,
+        as_of=TODAY,
+        households={'a': 'smith', 'b': 'smith'},
+        identical={'ITOT': 'VTI'},
+        replacements={VTI: ITOT},
+    )
+    assert guard.filter('a', suggestions, QUOTES) == suggestions[1:]
+
+
+def test_same_day_suggestions() -> None:
+    portfolio = make_portfolio()
+    guard = WashSaleGuard(portfolio.ledger, as_of=TODAY + timedelta(days=21), households={'b': 'smith', 'c': 'smith'})
+
+    # Once b is allowed to sell at a loss, c can't buy the same day
+    assert guard.filter('b', [Sell(VTI, Decimal(720))], QUOTES) == [Sell(VTI, Decimal(720))]
+    assert guard.filter('c', [Buy(VTI, Decimal(720))], QUOTES) == []
+
+    guard.start_batch()
+    assert guard.filter('c', [Buy(VTI, Decimal(720))], QUOTES) == [Buy(VTI, Decimal(720))]
+
+
+def test_asset_class_advisor_sells_other_holdings() -> None:
+    portfolio = make_portfolio()
+    b = portfolio.accounts['b']
+    b.buy('ITOT', shares=20, amount=1800, trade_date=days_ago(60))
+    portfolio.accounts['a'].buy('ITOT', shares=1, amount=90, trade_date=days_ago(3))
+    portfolio.accounts['a'].buy('VTI', shares=1, amount=180, trade_date=days_ago(3))
+
+    def advise(guard: WashSaleGuard | None) -> List[Suggestion]:
+        advisor = AssetClassAdvisor(
+            portfolio=portfolio,
+            preferred_assets=[USD, ITOT],
+            asset_classes={USD: 'Cash', VTI: 'US Stocks', ITOT: 'US Stocks'},
+            account_targets={'b': {'Cash': Decimal('0.95'), 'US Stocks': Decimal('0.05')}},
+            quotes=QUOTES | {ITOT: Decimal(100)},
+            wash_sale_guard=guard,
+        )
+        return advisor.get_account_suggestions('b')
+
+    # VTI is the smaller holding, so it's sold first...
+    assert Sell(VTI, Decimal(720)) in advise(None)
+
+    # ...unless selling it at a loss would be a wash sale; ITOT is at a gain
+    guard = WashSaleGuard(portfolio.ledger, as_of=TODAY, households={'a': 'smith', 'b': 'smith'})
+    suggestions = advise(guard)
+    assert all(suggestion.asset_type != VTI for suggestion in suggestions)
+    assert [s for s in suggestions if s.asset_type == ITOT][0].amount > 0
+    assert guard.blocked == [('b', Sell(VTI, Decimal(720)))]
@@ -0,0 +1,95 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.backtest import Backtest, PriceHistory
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from pathlib import Path
+from pytest import approx, raises
+
+
+USD = Currency('USD')
+CAD = Currency('CAD')
+VTI = Security('VTI')
+BND = Security('BND')
+PRICES = '''date,VTI,BND
+2022-01-03,100,50
+2022-01-04,110,50
+2022-01-05,120,
+2022-01-06,100,40
+'''
+
+
+def test_backtest(tmp_path: Path) -> None:
+    price_path = tmp_path / 'prices.csv'
+    price_path.write_text(PRICES)
+    prices = PriceHistory(str(price_path))
+
+    assert prices.symbols == ['VTI', 'BND']
+    assert list(prices)[2] == (date(2022, 1, 5), [Decimal(120), None])
+
+    portfolio = Portfolio()
+    for account_id in ['a', 'b']:
+        portfolio.open_account(account_id).deposit(1000, transfer_date=date(2022, 1, 1))
+
+    targets: dict[AssetType, Decimal] = {VTI: Decimal('0.5'), BND: Decimal('0.5')}
+    advisor = SimpleAdvisor(
+        portfolio=portfolio,
+        account_targets={'a': targets, 'b': targets},
+        quotes={},
+    )
+    result = Backtest(
+        portfolio=portfolio,
+        advisor=advisor,
+        prices=prices,
+        rebalance_every=2,
+        fees=1,
+    ).run()
+
+    assert result.dates == [date(2022, 1, d) for d in range(3, 7)]
+    assert result.years == approx(3 / 365.25)
+
+    a = result.get_account('a')
+    assert a is not None
+    # Day 1: 1000 cash -> 5 VTI + 10 BND, paying 2 in fees
+    # Day 3: 600 VTI + 500 BND - 2 = 1098, sell 51 VTI and buy 49 BND, paying 2 in fees
+    # Day 4: 4.575 VTI * 100 + 10.98 BND * 40 - 2 = 894.7
+    assert a.start_value == approx(1000)
+    assert a.end_value == approx(894.7)
+    assert a.total_return == approx(894.7 / 1000 - 1)
+    assert a.trades == 4
+    assert a.fees == approx(4)
+    assert a.max_drift == approx(1.0)
+    assert result.values[-1] == approx(2 * 894.7)
+    assert result.turnover(a) == approx(1100 / ((998 + 1048 + 1096 + 894.7) / 4))
+
+    balances = portfolio.accounts['a'].get_balances()
+    assert balances.cash[USD] == Decimal(-2)
+    assert float(balances.securities[VTI]) == approx(4.575)
+    assert float(balances.securities[BND]) == approx(10.98)
+
+
+def test_advisor_currency(tmp_path: Path) -> None:
+    price_path = tmp_path / 'prices.csv'
+    price_path.write_text(PRICES)
+
+    portfolio = Portfolio()
+    portfolio.open_account('a').deposit(1000, currency='CAD', transfer_date=date(2022, 1, 1))
+    advisor = SimpleAdvisor(
+        portfolio=portfolio,
+        account_targets={'a': {VTI: Decimal(1)}},
+        quotes={},
+        currency='CAD',
+    )
+
+    with raises(AssertionError, match="Backtest currency must match the advisor's"):
+        Backtest(portfolio=portfolio, advisor=advisor, prices=PriceHistory(str(price_path)), currency='USD')
+
+    # Cash is held and valued in the advisor's currency
+    result = Backtest(portfolio=portfolio, advisor=advisor, prices=PriceHistory(str(price_path))).run()
+
+    assert result.values[-1] == approx(1000)
+    assert advisor.quotes[CAD] == 1
+    balances = portfolio.accounts['a'].get_balances()
+    assert balances.cash == {CAD: Decimal(0)}
+    assert balances.securities[VTI] == 10
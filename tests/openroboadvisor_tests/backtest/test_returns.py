@@ -0,0 +1,69 @@
+from datetime import date
+from openroboadvisor.backtest import PriceHistory, Returns
+from openroboadvisor.backtest.returns import xirr
+from openroboadvisor.ledger import SqliteLedger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.portfolio import Portfolio
+from pathlib import Path
+from pytest import approx, mark
+
+
+PRICES = '''date,VTI
+2022-01-03,100
+2022-01-04,110
+2022-01-05,
+2022-01-06,121
+'''
+
+
+@mark.parametrize('backend', ['memory', 'sqlite'])
+def test_returns(tmp_path: Path, backend: str) -> None:
+    price_path = tmp_path / 'prices.csv'
+    price_path.write_text(PRICES)
+
+    if backend == 'sqlite':
+        portfolio = Portfolio(SqliteLedger(str(tmp_path / 'ledger.db')))
+        portfolio.open_account('__external_bank', AccountType.CHECKING, create_date=date(1, 1, 1))
+    else:
+        portfolio = Portfolio()
+
+    a = portfolio.open_account('a')
+    a.deposit(1000, transfer_date=date(2022, 1, 1))
+    a.buy('VTI', shares=10, amount=1000, trade_date=date(2022, 1, 2))
+    a.deposit(1100, transfer_date=date(2022, 1, 4), settlement_date=date(2022, 1, 5))
+    portfolio.open_account('b').deposit(500, transfer_date=date(2022, 1, 4))
+
+    result = Returns(portfolio.ledger, PriceHistory(str(price_path))).run()
+
+    assert (result.start_date, result.end_date) == (date(2022, 1, 3), date(2022, 1, 6))
+
+    returns = result.get_account('a')
+    assert returns is not None
+    assert returns.start_value == approx(1000)
+    assert returns.end_value == approx(2310)
+    assert returns.net_flows == approx(1100)
+    # Flows happen at the end of the day: 1000 -> 1100 on 2022-01-04 before
+    # the deposit, then 2200 -> 2310
+    assert returns.twr == approx(1.1 * 1.05 - 1)
+    assert returns.cash_flows == [
+        (date(2022, 1, 3), -1000),
+        (date(2022, 1, 4), -1100),
+        (date(2022, 1, 6), 2310),
+    ]
+    mwr = returns.mwr
+    assert mwr is not None and mwr > returns.twr
+
+    # Cash only, so no growth
+    b = result.get_account('b')
+    assert b is not None
+    assert b.twr == approx(0)
+    assert b.mwr == approx(0, abs=1e-9)
+
+
+def test_xirr() -> None:
+    # 100 grows to 110 in a year
+    assert xirr([(date(2021, 1, 1), -100), (date(2022, 1, 1), 110)]) == approx(0.1)
+    assert xirr([(date(2021, 1, 1), -100), (date(2021, 7, 2), -100), (date(2022, 1, 1), 200)]) == approx(0)
+    # A large loss over a short time, which Newton's method overshoots
+    assert xirr([(date(2021, 1, 1), -100), (date(2021, 4, 1), 20)]) == approx(0.2 ** (365 / 90) - 1)
+    assert xirr([(date(2021, 1, 1), -100)]) is None
@@ -0,0 +1,129 @@
+import os
+from datetime import date
+from decimal import Decimal
+from math import sqrt
+from openroboadvisor.advisor.model_portfolio import ModelPortfolio
+from openroboadvisor.backtest import PriceHistory, RiskModel
+from openroboadvisor.backtest.risk import TRADING_DAYS_PER_YEAR
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
+from pathlib import Path
+from pytest import approx, raises
+from statistics import NormalDist, covariance, variance
+
+
+PRICES = '''date,VTI,BND
+2022-01-03,100,50
+2022-01-04,110,50.5
+2022-01-05,99,
+2022-01-06,108.9,51
+'''
+
+VTI_RETURNS = [0.1, -0.1, 0.1]
+BND_RETURNS = [0.01, 0.0, 51 / 50.5 - 1]
+
+
+def make_portfolio() -> Portfolio:
+    portfolio = Portfolio()
+
+    a = portfolio.open_account('a')
+    a.deposit(2000, transfer_date=date(2022, 1, 1))
+    a.buy('VTI', shares=10, amount=1000, trade_date=date(2022, 1, 2))
+
+    b = portfolio.open_account('b')
+    b.deposit(2000, transfer_date=date(2022, 1, 1))
+    b.buy('VTI', shares=10, amount=1000, trade_date=date(2022, 1, 2))
+    b.buy('BND', shares=20, amount=1000, trade_date=date(2022, 1, 2))
+
+    portfolio.open_account('c').deposit(500, transfer_date=date(2022, 1, 1))
+    return portfolio
+
+
+def test_covariance(tmp_path: Path) -> None:
+    price_path = tmp_path / 'prices.csv'
+    price_path.write_text(PRICES)
+    model = RiskModel(PriceHistory(str(price_path)))
+
+    matrix = model.covariance
+    assert matrix[0][0] == approx(variance(VTI_RETURNS))
+    assert matrix[1][1] == approx(variance(BND_RETURNS))
+    assert matrix[0][1] == matrix[1][0] == approx(covariance(VTI_RETURNS, BND_RETURNS))
+
+    # Cached until the history changes
+    assert model.covariance is matrix
+    assert model.computations == 1
+
+    with open(price_path, 'a') as price_file:
+        price_file.write('2022-01-07,98.01,51\n')
+
+    # Make sure the change is seen even on coarse file system clocks
+    stat = os.stat(price_path)
+    os.utime(price_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert model.covariance[0][0] == approx(variance(VTI_RETURNS + [-0.1]))
+    assert model.computations == 2
+
+    # Only the most recent window of days is used
+    window_model = RiskModel(PriceHistory(str(price_path)), window=2)
+    assert window_model.covariance[0][0] == approx(variance([0.1, -0.1]))
+
+
+def test_risk(tmp_path: Path) -> None:
+    price_path = tmp_path / 'prices.csv'
+    price_path.write_text(PRICES)
+
+    portfolio = make_portfolio()
+    quotes: dict[AssetType, Quote] = {
+        Security('VTI'): (Decimal(100), Currency('USD')),
+        Security('BND'): (Decimal(50), Currency('USD')),
+    }
+    model: ModelPortfolio[AssetType] = ModelPortfolio(
+        'balanced',
+        {Security('VTI'): Decimal('0.5'), Security('BND'): Decimal('0.5')},
+    )
+    risk_model = RiskModel(PriceHistory(str(price_path)))
+    risks = risk_model.run(portfolio, quotes, account_models={'a': model, 'b': model})
+
+    annualize = sqrt(TRADING_DAYS_PER_YEAR)
+    z = NormalDist().inv_cdf(0.95)
+    vti_variance = variance(VTI_RETURNS)
+    bnd_variance = variance(BND_RETURNS)
+    both = covariance(VTI_RETURNS, BND_RETURNS)
+
+    # Half in VTI, half in cash
+    a = risks['a']
+    assert a.value == approx(2000)
+    assert a.volatility == approx(0.5 * sqrt(vti_variance) * annualize)
+    assert a.value_at_risk == approx(z * 0.5 * sqrt(vti_variance) * 2000)
+    # Underweight BND by half
+    assert a.tracking_error == approx(0.5 * sqrt(bnd_variance) * annualize)
+
+    # On the model exactly
+    b = risks['b']
+    b_variance = 0.25 * vti_variance + 0.25 * bnd_variance + 0.5 * both
+    assert b.volatility == approx(sqrt(b_variance) * annualize)
+    assert b.tracking_error == approx(0, abs=1e-12)
+
+    # Cash only, and no model
+    c = risks['c']
+    assert (c.volatility, c.value_at_risk, c.tracking_error) == (0, 0, None)
+
+    # One computation for the whole book
+    assert risk_model.computations == 1
+
+
+def test_risk_without_history(tmp_path: Path) -> None:
+    price_path = tmp_path / 'prices.csv'
+    price_path.write_text(PRICES)
+
+    portfolio = make_portfolio()
+    portfolio.accounts['c'].buy('VWO', shares=1, amount=50, trade_date=date(2022, 1, 2))
+    quotes: dict[AssetType, Quote] = {
+        Security('VTI'): (Decimal(100), Currency('USD')),
+        Security('BND'): (Decimal(50), Currency('USD')),
+        Security('VWO'): (Decimal(50), Currency('USD')),
+    }
+
+    with raises(AssertionError, match='No price history'):
+        RiskModel(PriceHistory(str(price_path))).run(portfolio, quotes)
@@ -0,0 +1,176 @@
+import json
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.asset import Currency
+from openroboadvisor.ledger.changes import (
+    BackpressureError,
+    BalanceChanged,
+    ChangeEvent,
+    ChangeFeed,
+    EntryRecorded,
+    FileSink,
+    Overflow,
+)
+from openroboadvisor.ledger.entry import OpenAccount, Transaction, TransactionLeg
+from openroboadvisor.portfolio import Portfolio
+from pathlib import Path
+from pytest import raises
+from threading import Thread
+from typing import List
+
+
+USD = Currency('USD')
+ENTRY_DATE = date(2022, 1, 3)
+
+
+def transfer(amount: int) -> Transaction:
+    return Transaction(
+        TransactionLeg(account_id='bank', subaccount_id='settled', asset_type=USD, quantity=-amount),
+        TransactionLeg(account_id='a', subaccount_id='settled', asset_type=USD, quantity=amount),
+        entry_date=ENTRY_DATE,
+    )
+
+
+def make_ledger() -> Ledger:
+    ledger = Ledger()
+    ledger.record(
+        OpenAccount(account_id='bank', account_type=AccountType.CHECKING, entry_date=ENTRY_DATE),
+        OpenAccount(account_id='a', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+    )
+    return ledger
+
+
+def test_entry_and_balance_events() -> None:
+    ledger = make_ledger()
+    subscription = ChangeFeed(ledger).subscribe()
+
+    ledger.record(transfer(100), transfer(50))
+    events = subscription.poll()
+
+    assert [type(event) for event in events] == [
+        EntryRecorded, BalanceChanged, BalanceChanged,
+        EntryRecorded, BalanceChanged, BalanceChanged,
+    ]
+    assert [event.position for event in events] == [2, 2, 2, 3, 3, 3]
+
+    deposit = events[5]
+    assert isinstance(deposit, BalanceChanged)
+    assert deposit.account_id == 'a'
+    assert deposit.subaccount_id == 'settled'
+    assert deposit.asset_type == USD
+    assert (deposit.old_quantity, deposit.new_quantity) == (100, 150)
+    assert subscription.poll() == []
+
+
+def test_poll_limit() -> None:
+    ledger = make_ledger()
+    subscription = ChangeFeed(ledger).subscribe()
+
+    ledger.record(transfer(100))
+
+    assert len(subscription.poll(max_events=2)) == 2
+    assert len(subscription.poll()) == 1
+
+
+def test_drop_oldest() -> None:
+    ledger = make_ledger()
+    subscription = ChangeFeed(ledger).subscribe(max_buffer=4, overflow=Overflow.DROP_OLDEST)
+
+    ledger.record(transfer(100), transfer(50))
+    events = subscription.poll()
+
+    assert subscription.dropped == 2
+    assert [event.position for event in events] == [2, 3, 3, 3]
+
+
+def test_overflow_spills() -> None:
+    ledger = make_ledger()
+    spilled: List[ChangeEvent] = []
+    subscription = ChangeFeed(ledger).subscribe(max_buffer=4, spill=spilled.append)
+
+    ledger.record(transfer(100))
+    ledger.record(transfer(50), transfer(25))
+
+    # Every entry was applied, and the buffer never went past its bound
+    assert ledger.accounts['a'].subaccounts['settled'].assets[USD] == 175
+    assert len(subscription) == 3
+    assert [event.position for event in spilled] == [3, 3, 3, 4, 4, 4]
+
+    with raises(BackpressureError):
+        subscription.poll()
+
+    assert [event.position for event in subscription.poll()] == [2, 2, 2]
+    assert subscription.dropped == 0
+
+    # Once the subscriber knows, new events are buffered again
+    ledger.record(transfer(10))
+    assert [event.position for event in subscription.poll()] == [5, 5, 5]
+
+
+def test_full_subscriber_keeps_ledger_balanced() -> None:
+    portfolio = Portfolio()
+    account = portfolio.open_account('a', create_date=ENTRY_DATE)
+    # No spill sink, with a writer on the same thread as the consumer
+    subscription = ChangeFeed(portfolio.ledger).subscribe(max_buffer=1)
+
+    account.deposit(100, transfer_date=ENTRY_DATE)
+    account.deposit(50, transfer_date=ENTRY_DATE, settlement_date=date(2022, 1, 5))
+
+    # Both transactions of every deposit were recorded
+    balances = account.get_balances(include_pending=False)
+    assert balances.cash == {USD: Decimal(150)}
+    assert portfolio.ledger.accounts['a'].subaccounts['pending'].assets[USD] == 0
+
+    with raises(BackpressureError):
+        subscription.poll()
+
+    assert subscription.poll() == []
+    assert subscription.dropped == 12
+
+
+def test_wait_for_room() -> None:
+    ledger = make_ledger()
+    subscription = ChangeFeed(ledger).subscribe(max_buffer=3)
+
+    assert subscription.wait_for_room(0)
+    ledger.record(transfer(100))
+    assert not subscription.wait_for_room(0.01)
+
+    consumer = Thread(target=subscription.poll, kwargs={'timeout': 1})
+    consumer.start()
+    assert subscription.wait_for_room(1)
+    consumer.join()
+
+
+def test_close() -> None:
+    ledger = make_ledger()
+    feed = ChangeFeed(ledger)
+    subscription = feed.subscribe()
+
+    subscription.close()
+    ledger.record(transfer(100))
+    feed.close()
+
+    assert subscription.poll() == []
+    assert not ledger.post_listeners
+    assert not ledger.entry_listeners
+
+
+def test_file_sink(tmp_path: Path) -> None:
+    ledger = make_ledger()
+    sink = FileSink(str(tmp_path / 'changes.jsonl'))
+    ChangeFeed(ledger).add_sink(sink)
+
+    ledger.record(transfer(100))
+    sink.close()
+
+    with open(tmp_path / 'changes.jsonl') as file:
+        records = [json.loads(line) for line in file]
+
+    assert records == [
+        ['entry', 2, 'Transaction', '2022-01-03'],
+        ['balance', 2, 'bank', 'settled', 'Currency', 'USD', None, '0', '-100'],
+        ['balance', 2, 'a', 'settled', 'Currency', 'USD', None, '0', '100'],
+    ]
@@ -0,0 +1,159 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.asset import Currency
+from openroboadvisor.ledger.entry import CloseAccount, OpenAccount, Transaction, TransactionLeg
+from openroboadvisor.ledger.fork import LedgerFork
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.serialization.archive import AccountArchive
+from pathlib import Path
+from pytest import raises
+
+
+USD = Currency('USD')
+ENTRY_DATE = date(2022, 1, 3)
+
+
+def transfer(from_account_id: str, to_account_id: str, amount: int) -> Transaction:
+    return Transaction(
+        TransactionLeg(
+            account_id=from_account_id,
+            subaccount_id='settled',
+            asset_type=USD,
+            quantity=-amount,
+        ),
+        TransactionLeg(
+            account_id=to_account_id,
+            subaccount_id='settled',
+            asset_type=USD,
+            quantity=amount,
+        ),
+        entry_date=ENTRY_DATE,
+    )
+
+
+def make_ledger() -> Ledger:
+    ledger = Ledger()
+    ledger.record(
+        OpenAccount(account_id='bank', account_type=AccountType.CHECKING, entry_date=ENTRY_DATE),
+        OpenAccount(account_id='a', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+        OpenAccount(account_id='b', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+        transfer('bank', 'a', 100),
+        transfer('bank', 'b', 100),
+    )
+    return ledger
+
+
+def test_fork_copies_accounts_on_first_read() -> None:
+    ledger = make_ledger()
+    fork = ledger.fork()
+
+    fork.record(transfer('a', 'bank', 40))
+
+    assert fork.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(60)}
+    assert ledger.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert set(fork.accounts.overlay) == {'a', 'bank'}
+    assert len(fork.entries) == 1
+    assert len(ledger.entries) == 5
+
+    account = fork.accounts['b']
+    assert account is fork.accounts['b'] and account is not ledger.accounts['b']
+    assert account.subaccounts['settled'].assets == {USD: Decimal(100)}
+
+
+def test_fork_is_isolated_from_parent_writes() -> None:
+    ledger = make_ledger()
+    fork = ledger.fork()
+    assert fork.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+
+    # Written after the fork, to an account the fork has read and to one it
+    # hasn't yet
+    ledger.record(
+        transfer('bank', 'a', 5),
+        transfer('bank', 'b', 5),
+        OpenAccount(account_id='c', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+    )
+
+    assert fork.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert fork.accounts['b'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert 'c' not in fork.accounts
+    assert list(fork.accounts) == ['bank', 'a', 'b']
+
+    # Discarding starts over from the parent as it is now
+    fork.discard()
+
+    assert fork.accounts['b'].subaccounts['settled'].assets == {USD: Decimal(105)}
+    assert 'c' in fork.accounts
+
+    fork.close()
+    assert ledger.snapshots == {}
+
+
+def test_fork_of_fork() -> None:
+    ledger = make_ledger()
+    fork = ledger.fork()
+    fork.record(transfer('a', 'bank', 40))
+    nested = fork.fork()
+    nested.record(transfer('a', 'bank', 10))
+
+    assert nested.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(50)}
+    assert fork.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(60)}
+    assert ledger.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+
+
+def test_fork_close_account(tmp_path: Path) -> None:
+    archive = AccountArchive(str(tmp_path / 'closed.ora'))
+    portfolio = Portfolio(archive=archive)
+    portfolio.open_account('a', create_date=ENTRY_DATE).deposit(100, transfer_date=ENTRY_DATE)
+    portfolio.open_account('b', create_date=ENTRY_DATE)
+    fork = portfolio.fork()
+
+    fork.accounts['a'].withdraw(100, transfer_date=ENTRY_DATE)
+    fork.close_account('a', close_date=ENTRY_DATE)
+
+    # Closed in the fork only, and not archived yet
+    assert 'a' not in fork.accounts
+    assert list(fork.accounts) == ['b']
+    assert portfolio.accounts['a'].get_balances().cash == {USD: Decimal(100)}
+    assert archive.get('a') is None
+
+    # Reopened in the fork, the account starts fresh
+    fork.open_account('a', create_date=ENTRY_DATE)
+    assert fork.accounts['a'].get_balances().cash == {}
+    fork.close_account('a', close_date=ENTRY_DATE)
+
+    ledger = fork.ledger
+    assert isinstance(ledger, LedgerFork)
+    ledger.commit()
+
+    assert 'a' not in portfolio.accounts
+    assert portfolio.ledger.closed_account_ids == {'a'}
+    # Archived on commit, once for each time it was closed
+    archived = [account for account, _ in archive]
+    assert [account.account_id for account in archived] == ['a', 'a']
+    assert archived[0].subaccounts['settled'].assets == {USD: Decimal(0)}
+    assert list(fork.accounts) == ['b']
+
+
+def test_fork_commit_is_all_or_nothing() -> None:
+    ledger = make_ledger()
+    fork = ledger.fork()
+    fork.record(
+        transfer('a', 'bank', 40),
+        transfer('b', 'bank', 100),
+    )
+
+    # b is closed in the parent after the fork was taken
+    ledger.record(
+        transfer('b', 'bank', 100),
+        CloseAccount(account_id='b', entry_date=ENTRY_DATE),
+    )
+
+    with raises(AssertionError):
+        fork.commit()
+
+    # Nothing was written to the parent, and the fork still has its entries
+    assert ledger.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert len(ledger.entries) == 7
+    assert len(fork.entries) == 2
@@ -0,0 +1,75 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.entry import OpenAccount, Transaction
+from openroboadvisor.portfolio import Portfolio
+
+
+def make_portfolio() -> Portfolio:
+    portfolio = Portfolio()
+    a = portfolio.open_account('a', create_date=date(2022, 1, 1))
+    b = portfolio.open_account('b', create_date=date(2022, 1, 1))
+
+    a.deposit(1000, transfer_date=date(2022, 1, 3), settlement_date=date(2022, 1, 5))
+    b.deposit(1000, transfer_date=date(2022, 1, 3))
+    a.buy(symbol='VTI', shares=2, amount=400, trade_date=date(2022, 1, 4), settlement_date=date(2022, 1, 6))
+    b.buy(symbol='VEA', shares=5, amount=250, trade_date=date(2022, 1, 4))
+    a.sell(symbol='VTI', shares=1, amount=210, trade_date=date(2022, 1, 10))
+    return portfolio
+
+
+def test_query_by_account() -> None:
+    ledger = make_portfolio().ledger
+    entries = ledger.query(account_id='a')
+
+    assert entries[0] == ledger.entries[1], "Expected the account's OpenAccount entry first"
+    assert len(entries) == 7
+    assert [e.entry_date for e in entries] == sorted(e.entry_date for e in entries)
+    assert all(
+        'a' in [leg.account_id for leg in e.legs]
+        for e in entries
+        if isinstance(e, Transaction)
+    )
+
+
+def test_query_by_symbol_and_type() -> None:
+    ledger = make_portfolio().ledger
+
+    vti_entries = ledger.query(symbol='VTI')
+    assert len(vti_entries) == 4
+    assert all(
+        isinstance(e, Transaction) and 'VTI' in [leg.asset_type.symbol for leg in e.legs]
+        for e in vti_entries
+    )
+
+    assert len(ledger.query(entry_type=OpenAccount)) == 3
+    assert len(ledger.query(entry_type=OpenAccount, account_id='b')) == 1
+    assert ledger.query(symbol='VEA', account_id='a') == []
+    assert ledger.query(symbol='BND') == []
+    assert ledger.query(account_id='missing') == []
+
+
+def test_query_date_range_and_pagination() -> None:
+    ledger = make_portfolio().ledger
+
+    in_range = ledger.query(
+        account_id='a',
+        start_date=date(2022, 1, 4),
+        end_date=date(2022, 1, 6),
+    )
+    assert [e.entry_date for e in in_range] == [
+        date(2022, 1, 4),
+        date(2022, 1, 5),
+        date(2022, 1, 6),
+    ]
+
+    all_a = ledger.query(account_id='a')
+    pages = [
+        ledger.query(account_id='a', offset=offset, limit=3)
+        for offset in range(0, len(all_a), 3)
+    ]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == all_a
+
+    usd = ledger.query(symbol='USD', start_date=date(2022, 1, 10))
+    assert len(usd) == 2
+    assert isinstance(usd[0], Transaction) and usd[0].legs[0].quantity == Decimal(210)
@@ -3,7 +3,8 @@ from decimal import Decimal
 from openroboadvisor.ledger import Ledger
 from openroboadvisor.ledger.account import AccountType, Subaccount
 from openroboadvisor.ledger.asset import Currency, Security
-from openroboadvisor.ledger.entry import OpenAccount, Transaction, TransactionLeg
+from openroboadvisor.ledger.entry import CloseAccount, OpenAccount, Transaction, TransactionLeg
+from pytest import raises
 
 
 def test_basic_ledger() -> None:
@@ -198,3 +199,106 @@ def test_basic_ledger() -> None:
             },
         ),
     }
+
+
+def unbalanced_deposit(account_id: str, balanced: bool) -> Transaction:
+    return Transaction(
+        TransactionLeg(
+            account_id=account_id,
+            subaccount_id='settled',
+            asset_type=Currency('USD'),
+            quantity=100,
+        ),
+        entry_date=date(2022, 1, 3),
+        balanced=balanced,
+    )
+
+
+def test_transaction_validation() -> None:
+    ledger = Ledger()
+    ledger.record(OpenAccount(
+        account_id='test',
+        account_type=AccountType.BROKERAGE,
+        entry_date=date(2022, 1, 3),
+    ))
+
+    with raises(AssertionError, match=r"Transaction references missing account.*"):
+        ledger.record(unbalanced_deposit('missing', balanced=False))
+
+    with raises(AssertionError, match=r"Transaction has an imbalance.*"):
+        ledger.record(unbalanced_deposit('test', balanced=True))
+
+    assert len(ledger.entries) == 1, "Expected rejected transactions to be left out of the ledger"
+    assert ledger.accounts['test'].subaccounts == {}
+
+
+def test_trusted_balanced_transactions() -> None:
+    ledger = Ledger(trust_balanced=True)
+    ledger.record(OpenAccount(
+        account_id='test',
+        account_type=AccountType.BROKERAGE,
+        entry_date=date(2022, 1, 3),
+    ))
+
+    with raises(AssertionError, match=r"Transaction has an imbalance.*"):
+        ledger.record(unbalanced_deposit('test', balanced=False))
+
+    # Balanced transactions are trusted, so the imbalance goes unnoticed.
+    ledger.record(unbalanced_deposit('test', balanced=True))
+
+    assert ledger.accounts['test'].subaccounts['settled'].assets == {
+        Currency('USD'): 100,
+    }
+
+
+def test_close_account() -> None:
+    ledger = Ledger()
+    ledger.record(
+        OpenAccount(account_id='bank', account_type=AccountType.CHECKING, entry_date=date(2022, 1, 3)),
+        OpenAccount(account_id='test', account_type=AccountType.BROKERAGE, entry_date=date(2022, 1, 3)),
+        transfer('bank', 'test', 100),
+    )
+
+    with raises(AssertionError, match=r"Can't close an account with a balance.*"):
+        ledger.record(CloseAccount(account_id='test', entry_date=date(2022, 1, 4)))
+
+    with raises(AssertionError, match=r"Can't close an account that isn't open.*"):
+        ledger.record(CloseAccount(account_id='missing', entry_date=date(2022, 1, 4)))
+
+    generation = ledger.generation
+    ledger.record(
+        transfer('test', 'bank', 100),
+        CloseAccount(account_id='test', entry_date=date(2022, 1, 4)),
+    )
+
+    assert 'test' not in ledger.accounts
+    assert ledger.closed_account_ids == {'test'}
+    assert ledger.generation > generation
+
+    with raises(AssertionError, match=r"Transaction references missing account.*"):
+        ledger.record(transfer('bank', 'test', 100))
+
+    # Only the account's own entries go; transfers with the bank are kept
+    # unless the bank is shared.
+    assert ledger.compact() == 2
+    assert ledger.compact(shared_account_ids=['bank']) == 2
+    assert [type(entry) for entry in ledger.entries] == [OpenAccount]
+    assert ledger.query(account_id='bank') == ledger.entries
+
+
+def transfer(from_account_id: str, to_account_id: str, amount: int) -> Transaction:
+    return Transaction(
+        TransactionLeg(
+            account_id=from_account_id,
+            subaccount_id='settled',
+            asset_type=Currency('USD'),
+            quantity=-amount,
+        ),
+        TransactionLeg(
+            account_id=to_account_id,
+            subaccount_id='settled',
+            asset_type=Currency('USD'),
+            quantity=amount,
+        ),
+        entry_date=date(2022, 1, 3),
+    )
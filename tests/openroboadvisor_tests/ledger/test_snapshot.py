@@ -0,0 +1,242 @@
+import sys
+import threading
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.advisor.suggestion import Buy
+from openroboadvisor.ledger import Ledger, SqliteLedger
+from openroboadvisor.ledger.account import AccountType, Subaccount
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.ledger.entry import CloseAccount, OpenAccount, Transaction, TransactionLeg
+from openroboadvisor.portfolio import Portfolio
+from pathlib import Path
+from pytest import raises
+from typing import cast
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+ENTRY_DATE = date(2022, 1, 3)
+
+
+def transfer(from_account_id: str, to_account_id: str, amount: int, subaccount_id: str = 'settled') -> Transaction:
+    return Transaction(
+        TransactionLeg(account_id=from_account_id, subaccount_id='settled', asset_type=USD, quantity=-amount),
+        TransactionLeg(account_id=to_account_id, subaccount_id=subaccount_id, asset_type=USD, quantity=amount),
+        entry_date=ENTRY_DATE,
+    )
+
+
+def record_accounts(ledger: Ledger) -> Ledger:
+    ledger.record(
+        OpenAccount(account_id='bank', account_type=AccountType.CHECKING, entry_date=ENTRY_DATE),
+        OpenAccount(account_id='a', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+        OpenAccount(account_id='b', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+        transfer('bank', 'a', 100),
+        transfer('bank', 'b', 100),
+    )
+    return ledger
+
+
+def test_snapshot_reads_as_of_version() -> None:
+    ledger = record_accounts(Ledger())
+    snapshot = ledger.snapshot()
+    assert snapshot.version == ledger.version == 5
+
+    ledger.record(
+        transfer('a', 'bank', 40),
+        transfer('bank', 'a', 10),
+        transfer('bank', 'b', 5, subaccount_id='pending'),
+        OpenAccount(account_id='c', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+        transfer('bank', 'c', 20),
+    )
+
+    assert ledger.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(70)}
+    assert snapshot.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert snapshot.accounts['bank'].subaccounts['settled'].assets == {USD: Decimal(-200)}
+    # Subaccounts and accounts created since aren't there yet
+    assert snapshot.accounts['b'].subaccounts == {'settled': Subaccount('settled', {USD: Decimal(100)})}
+    assert snapshot.get_account('c') is None
+    assert list(snapshot.accounts) == ['bank', 'a', 'b']
+    assert 'c' not in snapshot.accounts
+
+    # Each snapshot sees its own version
+    later = ledger.snapshot()
+    ledger.record(transfer('a', 'bank', 70))
+
+    assert later.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(70)}
+    assert later.accounts['c'].subaccounts['settled'].assets == {USD: Decimal(20)}
+    assert snapshot.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+
+    snapshot.close()
+    later.close()
+
+    with raises(AssertionError, match='Snapshot is closed'):
+        snapshot.get_account('a')
+
+
+def test_snapshot_keeps_closed_accounts() -> None:
+    ledger = record_accounts(Ledger())
+    snapshot = ledger.snapshot()
+
+    ledger.record(
+        transfer('b', 'bank', 100),
+        CloseAccount(account_id='b', entry_date=ENTRY_DATE),
+    )
+
+    assert ledger.get_account('b') is None
+    assert snapshot.accounts['b'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert sorted(snapshot.accounts) == ['a', 'b', 'bank']
+
+    # Changes to an account reopened under the same id don't leak into the closed one
+    ledger.record(
+        OpenAccount(account_id='b', account_type=AccountType.IRA, entry_date=ENTRY_DATE),
+        transfer('bank', 'b', 30),
+    )
+
+    b = snapshot.accounts['b']
+    assert b.account_type == AccountType.BROKERAGE
+    assert b.subaccounts['settled'].assets == {USD: Decimal(100)}
+
+
+def test_history_is_collected() -> None:
+    ledger = record_accounts(Ledger())
+
+    # Nothing is kept without snapshots
+    ledger.record(transfer('a', 'bank', 1))
+    assert ledger.history == {}
+
+    first = ledger.snapshot()
+    ledger.record(transfer('a', 'bank', 1))
+    second = ledger.snapshot()
+    ledger.record(transfer('a', 'bank', 1))
+
+    assert ledger.history[('a', 'settled', USD)] == [(7, Decimal(99)), (8, Decimal(98))]
+
+    # Only what second still needs is kept
+    first.close()
+    assert ledger.history[('a', 'settled', USD)] == [(8, Decimal(98))]
+    assert second.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(98)}
+
+    second.close()
+    assert ledger.history == {}
+    assert len(ledger.undo_log) == 0
+    assert ledger.snapshots == {}
+
+
+def test_advisor_reads_snapshot() -> None:
+    portfolio = Portfolio()
+    portfolio.open_account('a', create_date=ENTRY_DATE).deposit(1000, transfer_date=ENTRY_DATE)
+    snapshot = portfolio.ledger.snapshot()
+
+    # Trades keep flowing while the advisor runs against the snapshot
+    portfolio.accounts['a'].buy('VTI', shares=5, amount=500, trade_date=ENTRY_DATE)
+
+    advisor = SimpleAdvisor(
+        # Snapshots stand in for ledgers that are only read
+        Portfolio(cast(Ledger, snapshot)),
+        account_targets={'a': {VTI: Decimal(1)}},
+        quotes={USD: Decimal(1), VTI: Decimal(100)},
+    )
+
+    assert Buy(VTI, Decimal(1000)) in advisor.get_suggestions()['a']
+    snapshot.close()
+
+
+def test_snapshot_closes_itself() -> None:
+    ledger = record_accounts(Ledger())
+
+    with ledger.snapshot() as snapshot:
+        ledger.record(transfer('a', 'bank', 40))
+        assert snapshot.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+
+    assert snapshot.closed
+    assert ledger.snapshots == {} and ledger.history == {}
+
+    # A forgotten snapshot is closed when it's collected
+    ledger.snapshot().get_account('a')
+    ledger.record(transfer('a', 'bank', 1))
+    assert ledger.snapshots == {} and ledger.history == {}
+
+
+def test_snapshot_while_recording() -> None:
+    ledger = Ledger()
+    account_ids = [f'account-{i}' for i in range(20)]
+    ledger.record(*[
+        OpenAccount(account_id=account_id, account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE)
+        for account_id in account_ids
+    ])
+    ledger.record(*[transfer(account_ids[0], account_id, 0) for account_id in account_ids])
+    done = threading.Event()
+
+    # Moves 1 USD around the accounts, so they always add up to 0
+    def write() -> None:
+        i = 0
+
+        while not done.is_set():
+            ledger.record(transfer(account_ids[i % 20], account_ids[(i + 7) % 20], 1))
+            i += 1
+
+    writer = threading.Thread(target=write)
+    # Switch threads as often as possible, so snapshots land mid-entry
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writer.start()
+
+    try:
+        totals = []
+
+        for _ in range(1000):
+            with ledger.snapshot() as snapshot:
+                totals.append(sum(
+                    account.subaccounts['settled'].assets[USD]
+                    for account in snapshot.accounts.values()
+                ))
+    finally:
+        done.set()
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+
+    assert totals == [0] * 1000
+    assert ledger.history == {}
+
+
+def test_sqlite_snapshot(tmp_path: Path) -> None:
+    ledger = record_accounts(SqliteLedger(str(tmp_path / 'ledger.db')))
+    assert isinstance(ledger, SqliteLedger)
+    snapshot = ledger.snapshot()
+    assert snapshot.version == 5
+
+    ledger.record(
+        transfer('a', 'bank', 40),
+        transfer('b', 'bank', 100),
+        CloseAccount(account_id='b', entry_date=ENTRY_DATE),
+        OpenAccount(account_id='c', account_type=AccountType.BROKERAGE, entry_date=ENTRY_DATE),
+    )
+
+    assert ledger.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(60)}
+    assert snapshot.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert snapshot.accounts['b'].subaccounts['settled'].assets == {USD: Decimal(100)}
+    assert list(snapshot.accounts) == ['bank', 'a', 'b']
+    assert 'c' not in snapshot.accounts
+
+    # Writes still buffered in a batch aren't committed yet
+    with ledger.batch():
+        ledger.record(transfer('bank', 'a', 5))
+
+        with ledger.snapshot() as buffered:
+            assert buffered.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(60)}
+
+    with ledger.snapshot() as later:
+        assert later.version == 10
+        assert later.accounts['a'].subaccounts['settled'].assets == {USD: Decimal(65)}
+        assert list(later.accounts) == ['bank', 'a', 'c']
+
+    snapshot.close()
+
+    with raises(AssertionError, match='Snapshot is closed'):
+        snapshot.get_account('a')
+
+    # The ledger kept no history for them
+    assert ledger.snapshots == {} and ledger.history == {}
+    ledger.close()
@@ -0,0 +1,200 @@
+import sqlite3
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger, SqliteLedger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.ledger.entry import CloseAccount, Entry, OpenAccount, Transaction
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.account import Account
+from pathlib import Path
+from typing import Any, Iterable, List
+
+
+def describe(entries: Iterable[Entry]) -> List[object]:
+    described: List[object] = []
+
+    for entry in entries:
+        if isinstance(entry, Transaction):
+            described.append((entry.entry_date, [
+                (leg.account_id, leg.subaccount_id, leg.asset_type, leg.quantity, leg.cost)
+                for leg in entry.legs
+            ]))
+        else:
+            assert isinstance(entry, (OpenAccount, CloseAccount))
+            described.append((type(entry), entry.entry_date, entry.account_id))
+
+    return described
+
+
+def trade(ledger: Ledger) -> None:
+    portfolio = Portfolio(ledger)
+    portfolio.open_account('__external_bank', AccountType.CHECKING, create_date=date(2022, 1, 3))
+    account = portfolio.open_account('test', create_date=date(2022, 1, 3))
+    account.deposit(1000, transfer_date=date(2022, 1, 3), settlement_date=date(2022, 1, 4))
+    account.buy('VTI', shares=Decimal('2.5'), amount=Decimal('552.50'), fees=Decimal('0.95'), trade_date=date(2022, 1, 5))
+    account.sell('VTI', shares=Decimal('1'), amount=Decimal('230.10'), trade_date=date(2022, 1, 7))
+    ledger.record(*account.buy_entries(
+        'VEA',
+        shares=Decimal('3'),
+        amount=Decimal('143.37'),
+        trade_date=date(2022, 1, 6),
+        lot='2022-01-06',
+    ))
+
+
+def test_matches_in_memory_ledger(tmp_path: Path) -> None:
+    memory = Ledger()
+    sqlite = SqliteLedger(str(tmp_path / 'ledger.db'))
+    trade(memory)
+    trade(sqlite)
+
+    assert len(sqlite.entries) == len(memory.entries)
+    assert describe(sqlite.entries) == describe(memory.entries)
+    assert describe([sqlite.entries[-1]]) == describe([memory.entries[-1]])
+    assert list(sqlite.accounts) == list(memory.accounts)
+
+    for account_id in memory.accounts:
+        assert sqlite.accounts[account_id].subaccounts == memory.accounts[account_id].subaccounts
+
+    queries: List[dict[str, Any]] = [
+        {'account_id': 'test'},
+        {'symbol': 'VTI'},
+        {'entry_type': OpenAccount},
+        {'start_date': date(2022, 1, 5), 'end_date': date(2022, 1, 6)},
+        {'account_id': 'test', 'offset': 2, 'limit': 3},
+    ]
+
+    for query in queries:
+        assert describe(sqlite.query(**query)) == describe(memory.query(**query)), query
+
+    sqlite.close()
+
+
+def test_point_in_time_balances(tmp_path: Path) -> None:
+    memory = Ledger()
+    sqlite = SqliteLedger(str(tmp_path / 'ledger.db'))
+    trade(memory)
+    trade(sqlite)
+
+    for ledger in (memory, sqlite):
+        account = Account('test', ledger)
+        balances = account.get_balances(as_of=date(2022, 1, 4))
+        assert balances.subaccounts['settled'].assets == {Currency('USD'): 1000}
+        assert not account.get_balances(as_of=date(2022, 1, 4), include_pending=False).get_asset_quantities(
+            Security('VTI'),
+        )
+
+    for as_of in [date(2022, 1, 3), date(2022, 1, 5), date(2022, 1, 6), date(2022, 1, 7)]:
+        sqlite_account = sqlite.get_account_at('test', as_of)
+        memory_account = memory.get_account_at('test', as_of)
+        assert sqlite_account is not None and memory_account is not None
+        assert sqlite_account.subaccounts == memory_account.subaccounts
+
+    assert sqlite.get_account_at('missing', date(2022, 1, 7)) is None
+    sqlite.close()
+
+
+def test_reopen(tmp_path: Path) -> None:
+    path = str(tmp_path / 'ledger.db')
+    ledger = SqliteLedger(path)
+    trade(ledger)
+    subaccounts = ledger.accounts['test'].subaccounts
+    entries = describe(ledger.entries)
+    ledger.record(
+        OpenAccount(account_id='closed', account_type=AccountType.IRA, entry_date=date(2022, 1, 7)),
+        CloseAccount(account_id='closed', entry_date=date(2022, 1, 8)),
+    )
+    ledger.close()
+
+    ledger = SqliteLedger(path)
+    assert ledger.accounts['test'].subaccounts == subaccounts
+    assert ledger.accounts['test'].account_type == AccountType.BROKERAGE
+    assert describe(ledger.entries[:len(entries)]) == entries
+    assert ledger.closed_account_ids == {'closed'}
+    assert 'closed' not in ledger.accounts
+
+    # Writes keep going where the ledger left off
+    Account('test', ledger).withdraw(100, transfer_date=date(2022, 1, 10))
+    assert len(ledger.entries) == len(entries) + 4
+    ledger.close()
+
+
+def test_evicted_accounts(tmp_path: Path) -> None:
+    ledger = SqliteLedger(str(tmp_path / 'ledger.db'), max_cached_accounts=16)
+    portfolio = Portfolio(ledger)
+    portfolio.open_account('__external_bank', AccountType.CHECKING, create_date=date(2022, 1, 3))
+    accounts = [portfolio.open_account(f'account-{i}', create_date=date(2022, 1, 3)) for i in range(40)]
+
+    for _ in range(2):
+        for account in accounts:
+            account.deposit(100, transfer_date=date(2022, 1, 3))
+
+    assert len(ledger.accounts.cache) == 16
+
+    for account in accounts:
+        assert account.get_balances().subaccounts['settled'].assets == {Currency('USD'): 200}
+
+    assert ledger.accounts['__external_bank'].subaccounts['pending'].assets == {Currency('USD'): -8000}
+
+    # Nothing to drop from disk
+    assert ledger.compact() == 0
+
+    ledger.close()
+
+
+def test_reopened_account_starts_fresh(tmp_path: Path) -> None:
+    memory = Portfolio()
+    sqlite = Portfolio(SqliteLedger(str(tmp_path / 'ledger.db')))
+    sqlite.open_account('__external_bank', AccountType.CHECKING, create_date=date(2022, 1, 3))
+
+    for portfolio in (memory, sqlite):
+        account = portfolio.open_account('a', create_date=date(2022, 1, 3))
+        account.deposit(1000, transfer_date=date(2022, 1, 3))
+        account.buy('VTI', shares=1, amount=990, fees=10, trade_date=date(2022, 1, 3))
+        account.sell('VTI', shares=1, amount=990, trade_date=date(2022, 1, 4))
+        account.withdraw(990, transfer_date=date(2022, 1, 4))
+        # Fees stay with the closed account
+        portfolio.close_account('a', close_date=date(2022, 1, 5))
+        portfolio.open_account('a', AccountType.IRA, create_date=date(2022, 1, 6)).deposit(
+            50, transfer_date=date(2022, 1, 6),
+        )
+
+    ledger = sqlite.ledger
+    assert isinstance(ledger, SqliteLedger)
+    ledger.accounts.cache.clear()
+
+    reopened = ledger.get_account('a')
+    assert reopened is not None
+    assert reopened.account_type == AccountType.IRA
+    assert reopened.subaccounts == memory.ledger.accounts['a'].subaccounts
+    assert reopened.subaccounts['settled'].assets == {Currency('USD'): Decimal(50)}
+    assert 'fees' not in reopened.subaccounts
+    ledger.close()
+
+
+def test_templated_writes_are_committed(tmp_path: Path) -> None:
+    path = str(tmp_path / 'ledger.db')
+    ledger = SqliteLedger(path)
+    portfolio = Portfolio(ledger)
+    portfolio.open_account('__external_bank', AccountType.CHECKING, create_date=date(2022, 1, 3))
+    account = portfolio.open_account('test', create_date=date(2022, 1, 3))
+    reader = sqlite3.connect(path)
+
+    def committed() -> int:
+        return int(reader.execute('SELECT COUNT(*) FROM entries').fetchone()[0])
+
+    # Deposits and buys append their transactions without going through record()
+    account.deposit(1000, transfer_date=date(2022, 1, 3))
+    account.buy('VTI', shares=2, amount=440, trade_date=date(2022, 1, 4))
+    assert committed() == len(ledger.entries) == 6
+
+    # Batched writes are committed together
+    with ledger.batch():
+        account.sell('VTI', shares=1, amount=220, trade_date=date(2022, 1, 5))
+        assert committed() == 6
+
+    assert committed() == len(ledger.entries) == 8
+
+    reader.close()
+    ledger.close()
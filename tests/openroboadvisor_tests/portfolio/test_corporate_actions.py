@@ -0,0 +1,105 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.ledger.entry import Transaction
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.corporate_actions import (
+    CashDividend,
+    CorporateAction,
+    CorporateActionProcessor,
+    Split,
+    SymbolChange,
+)
+from pytest import MonkeyPatch, raises
+
+
+USD = Currency('USD')
+TRADE_DATE = date(2022, 1, 3)
+ACTION_DATE = date(2022, 2, 1)
+
+
+def make_portfolio() -> Portfolio:
+    portfolio = Portfolio()
+    a = portfolio.open_account('a', create_date=TRADE_DATE)
+    a.deposit(1000, transfer_date=TRADE_DATE)
+    a.buy('VTI', shares=2, amount=400, trade_date=TRADE_DATE)
+    a.buy('VTI', shares=1, amount=190, lot='lot-1', trade_date=TRADE_DATE)
+    b = portfolio.open_account('b', create_date=TRADE_DATE)
+    b.deposit(1000, transfer_date=TRADE_DATE)
+    b.buy('VEA', shares=10, amount=500, trade_date=TRADE_DATE)
+    c = portfolio.open_account('c', create_date=TRADE_DATE)
+    c.deposit(1000, transfer_date=TRADE_DATE)
+    c.buy('VTI', shares=1, amount=200, trade_date=TRADE_DATE)
+    c.sell('VTI', shares=1, amount=210, trade_date=TRADE_DATE)
+    return portfolio
+
+
+def test_holders_index() -> None:
+    portfolio = make_portfolio()
+    processor = CorporateActionProcessor(portfolio.ledger)
+
+    # Lots are found under their symbol; c's sold position is gone
+    assert processor.index.get_holders('VTI') == [
+        ('a', 'settled', Security('VTI')),
+        ('a', 'settled', Security('VTI', 'lot-1')),
+    ]
+
+    portfolio.accounts['c'].buy('VTI', shares=1, amount=200, trade_date=TRADE_DATE)
+    assert [h[0] for h in processor.index.get_holders('VTI')] == ['a', 'a', 'c']
+
+
+def test_corporate_actions() -> None:
+    portfolio = make_portfolio()
+    processor = CorporateActionProcessor(portfolio.ledger)
+    a = portfolio.accounts['a']
+    entries = len(portfolio.ledger.entries)
+
+    transactions = processor.apply(CashDividend('VTI', Decimal('0.50'), ACTION_DATE))
+    assert len(transactions) == 1
+    assert len(portfolio.ledger.entries) == entries + 1
+    assert a.get_balances().cash == {USD: Decimal('411.50')}
+    assert portfolio.accounts['b'].get_balances().cash == {USD: Decimal(500)}
+
+    processor.apply(Split('VTI', 2, ACTION_DATE))
+    assert a.get_balances(include_lots=True).securities == {
+        Security('VTI'): Decimal(4),
+        Security('VTI', 'lot-1'): Decimal(2),
+    }
+
+    processor.apply(SymbolChange('VTI', 'VTI2', ACTION_DATE))
+    securities = a.get_balances(include_lots=True).securities
+    assert {security: quantity for security, quantity in securities.items() if quantity} == {
+        Security('VTI2'): Decimal(4),
+        Security('VTI2', 'lot-1'): Decimal(2),
+    }
+    assert processor.index.get_holders('VTI') == []
+    assert len(processor.index.get_holders('VTI2')) == 2
+
+    # Nobody holds VTI any more
+    assert processor.apply(CashDividend('VTI', 1, ACTION_DATE)) == []
+
+    with raises(AssertionError, match=r"Split ratio must be positive.*"):
+        Split('VTI2', 0, ACTION_DATE)
+
+
+def test_actions_apply_atomically(monkeypatch: MonkeyPatch) -> None:
+    portfolio = make_portfolio()
+    processor = CorporateActionProcessor(portfolio.ledger)
+    action = CashDividend('VTI', 1, ACTION_DATE)
+    transactions = processor.get_transactions(action)
+    entries = len(portfolio.ledger.entries)
+
+    # The second transaction can't be applied, so neither is
+    transactions.append(Transaction(*transactions[0].legs[:1], entry_date=ACTION_DATE))
+    monkeypatch.setattr(processor, 'get_transactions', lambda action: transactions)
+
+    with raises(AssertionError, match=r"Transaction has an imbalance.*"):
+        processor.apply(action)
+
+    assert len(portfolio.ledger.entries) == entries
+    assert portfolio.accounts['a'].get_balances().cash == {USD: Decimal(410)}
+
+
+def test_actions_must_provide_legs() -> None:
+    with raises(TypeError):
+        CorporateAction('VTI', date(2022, 1, 3))  # type: ignore[abstract]
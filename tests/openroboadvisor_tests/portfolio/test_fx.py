@@ -0,0 +1,113 @@
+from decimal import Decimal
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.advisor.suggestion import Buy, Sell
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import FxRates, Quote
+from pytest import raises
+
+
+USD = Currency('USD')
+CAD = Currency('CAD')
+EUR = Currency('EUR')
+BTC = Currency('BTC')
+
+
+def test_cross_rates() -> None:
+    fx = FxRates()
+    fx.set_rate(USD, CAD, Decimal('1.25'))
+    fx.set_rate(BTC, USD, 40000)
+    fx.set_rate('EUR', 'CAD', Decimal('1.5'))
+
+    assert fx.get_rate(USD, USD) == 1
+    assert fx.get_rate(CAD, USD) == Decimal('0.8')
+    assert fx.get_rate(BTC, CAD) == Decimal(50000)
+    assert fx.get_rate(EUR, USD) == Decimal('1.2')
+    assert round(fx.convert(2, BTC, EUR), 2) == Decimal('66666.67')
+
+    with raises(AssertionError, match=r"No FX conversion path.*"):
+        fx.get_rate(Currency('JPY'), USD)
+
+
+def test_cross_rates_are_invalidated() -> None:
+    fx = FxRates()
+    fx.set_rate(EUR, CAD, Decimal('1.5'))
+    fx.set_rate(USD, CAD, Decimal('1.25'))
+
+    assert fx.get_rate(EUR, USD) == Decimal('1.2')
+
+    fx.set_rate(USD, CAD, Decimal('1.5'))
+
+    assert fx.get_rate(EUR, USD) == 1
+
+
+def test_multi_currency_balances() -> None:
+    fx = FxRates()
+    fx.set_rate(USD, CAD, Decimal('1.25'))
+    fx.set_rate(BTC, USD, 40000)
+
+    portfolio = Portfolio()
+    account = portfolio.open_account('My Account')
+    account.deposit(1000)
+    account.deposit(1000, currency='CAD')
+    account.deposit(Decimal('0.01'), currency='BTC')
+    account.buy(symbol='SHOP', shares=1, amount=500, currency='CAD')
+
+    quotes: dict[AssetType, Quote] = {
+        Security('SHOP'): (Decimal(750), CAD),
+    }
+    balances = account.get_balances()
+
+    # 1000 USD + 500 CAD + 0.01 BTC + 750 CAD
+    assert balances.total(quotes, fx) == Decimal(2400)
+    assert balances.total(quotes, fx, 'CAD') == Decimal(3000)
+    assert balances.get_amounts(quotes, fx) == {
+        USD: Decimal(1000),
+        CAD: Decimal(400),
+        BTC: Decimal(400),
+        Security('SHOP'): Decimal(600),
+    }
+
+    with raises(AssertionError, match=r"Unable to convert balances.*"):
+        balances.total(quotes)
+
+    advisor = SimpleAdvisor(
+        portfolio=portfolio,
+        account_targets={
+            'My Account': {
+                USD: Decimal('0.5'),
+                Security('SHOP'): Decimal('0.5'),
+            },
+        },
+        quotes=quotes,
+        fx=fx,
+    )
+
+    assert sorted(advisor.get_suggestions()['My Account'], key=lambda s: s.asset_type.symbol) == [
+        Sell(BTC, Decimal(400)),
+        Sell(CAD, Decimal(400)),
+        Buy(Security('SHOP'), Decimal(600)),
+        Buy(USD, Decimal(200)),
+    ]
+
+
+def test_foreign_currencies_are_converted() -> None:
+    fx = FxRates()
+    fx.set_rate(USD, CAD, Decimal('1.25'))
+
+    portfolio = Portfolio()
+    account = portfolio.open_account('My Account')
+    account.deposit(100)
+    account.deposit(100, currency='CAD')
+    balances = account.get_balances()
+
+    # Plain quotes are prices in the reporting currency, whatever the asset
+    assert balances.total({USD: 1, CAD: Decimal('0.8')}) == Decimal(180)
+    assert balances.total({USD: Decimal('1.25'), CAD: 1}, currency='CAD') == Decimal(225)
+
+    # Unquoted currencies and (price, currency) quotes go through the rates
+    assert balances.get_amounts({}, fx, 'CAD') == {USD: Decimal(125), CAD: Decimal(100)}
+    assert balances.total({CAD: (Decimal(1), CAD)}, fx) == Decimal(180)
+
+    with raises(AssertionError, match=r"Unable to convert balances without FX rates.*"):
+        balances.total({}, currency='CAD')
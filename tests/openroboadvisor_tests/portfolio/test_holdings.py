@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.fork import LedgerFork
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.fx import Quote
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+BND = Security('BND')
+TRADE_DATE = date(2022, 1, 3)
+
+
+def test_book_holdings() -> None:
+    portfolio = Portfolio()
+    brokerage = portfolio.open_account('brokerage')
+    brokerage.deposit(1000, transfer_date=TRADE_DATE)
+    brokerage.buy(symbol='VTI', shares=2, amount=400, fees=10, trade_date=TRADE_DATE)
+
+    # Holdings start from the current ledger state...
+    holdings = portfolio.holdings
+    assert holdings.get_asset_quantities() == {USD: Decimal(590), VTI: Decimal(2)}
+
+    # ...and follow every leg recorded after that.
+    ira = portfolio.open_account('ira', AccountType.IRA)
+    ira.deposit(500, transfer_date=TRADE_DATE)
+    ira.buy(symbol='VTI', shares=1, amount=200, lot='lot-1', trade_date=TRADE_DATE)
+    ira.buy(symbol='BND', shares=3, amount=150, trade_date=TRADE_DATE)
+    brokerage.sell(symbol='VTI', shares=1, amount=210, trade_date=TRADE_DATE)
+
+    assert holdings.get_asset_quantities() == {
+        USD: Decimal(950),
+        VTI: Decimal(2),
+        BND: Decimal(3),
+    }
+    assert holdings.get_asset_quantities(AccountType.IRA) == {
+        USD: Decimal(150),
+        VTI: Decimal(1),
+        BND: Decimal(3),
+    }
+    assert holdings.get_asset_quantities(AccountType.CHECKING) == {}
+
+    quotes: dict[AssetType, Quote] = {VTI: Decimal(220), BND: Decimal(50)}
+    assert holdings.get_asset_amounts(quotes) == {
+        USD: Decimal(950),
+        VTI: Decimal(440),
+        BND: Decimal(150),
+    }
+    assert holdings.get_exposure(
+        quotes,
+        {VTI: 'US Stocks', BND: 'Bonds'},
+        account_type=AccountType.IRA,
+    ) == {
+        None: Decimal(150),
+        'US Stocks': Decimal(220),
+        'Bonds': Decimal(150),
+    }
+
+
+def test_book_holdings_ignore_forks() -> None:
+    portfolio = Portfolio()
+    portfolio.open_account('brokerage').deposit(1000, transfer_date=TRADE_DATE)
+    holdings = portfolio.holdings
+
+    fork = portfolio.fork()
+    fork.accounts['brokerage'].deposit(500, transfer_date=TRADE_DATE)
+
+    assert holdings.get_asset_quantities() == {USD: Decimal(1000)}
+
+    ledger = fork.ledger
+    assert isinstance(ledger, LedgerFork)
+    ledger.commit()
+
+    assert holdings.get_asset_quantities() == {USD: Decimal(1500)}
+
+
+def test_book_holdings_follow_reopened_accounts() -> None:
+    portfolio = Portfolio()
+    account = portfolio.open_account('a')
+    account.deposit(1000, transfer_date=TRADE_DATE)
+    holdings = portfolio.holdings
+
+    account.withdraw(1000, transfer_date=TRADE_DATE)
+    portfolio.close_account('a', close_date=TRADE_DATE)
+    portfolio.open_account('a', AccountType.IRA, create_date=TRADE_DATE).deposit(300, transfer_date=TRADE_DATE)
+
+    assert holdings.get_asset_quantities(AccountType.IRA) == {USD: Decimal(300)}
+    assert holdings.get_asset_quantities(AccountType.BROKERAGE) == {}
+    assert holdings.account_types == {'a': AccountType.IRA}
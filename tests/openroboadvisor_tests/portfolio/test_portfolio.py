@@ -1,6 +1,9 @@
 from decimal import Decimal
+from openroboadvisor.advisor.execution import apply_suggestions
+from openroboadvisor.advisor.suggestion import Buy, Sell
 from openroboadvisor.portfolio import Portfolio
-from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.ledger.asset import AssetType, Currency, Security
+from openroboadvisor.ledger.fork import LedgerFork
 
 
 USD = Currency('USD')
@@ -38,3 +41,59 @@ def test_basic_portfolio() -> None:
     balances = account.get_balances()
     assert balances.cash.get(USD) == Decimal('2980.10'), "Expected a $2980.10 after selling SPY for a gain."
     assert balances.securities.get(SPY) == 0, "All SPY shares were sold, but quantity isn't empty."
+
+
+def test_forked_portfolio_what_if() -> None:
+    portfolio = Portfolio()
+    account = portfolio.open_account('My Fidelity Account')
+    account.deposit(2000)
+
+    quotes: dict[AssetType, Decimal] = {USD: Decimal(1), SPY: Decimal(500)}
+    what_if = portfolio.fork()
+    apply_suggestions(
+        what_if.accounts['My Fidelity Account'],
+        [Buy(SPY, Decimal(1000)), Sell(USD, Decimal(1000))],
+        quotes,
+        fees=Decimal('9.95'),
+    )
+
+    forked_balances = what_if.accounts['My Fidelity Account'].get_balances()
+    assert forked_balances.cash.get(USD) == Decimal('990.05')
+    assert forked_balances.securities.get(SPY) == 2
+    assert account.get_balances().cash.get(USD) == 2000, "Expected the fork to leave the portfolio untouched."
+    assert account.get_balances().securities == {}
+
+    ledger = what_if.ledger
+    assert isinstance(ledger, LedgerFork)
+    ledger.commit()
+
+    assert account.get_balances().cash.get(USD) == Decimal('990.05')
+    assert account.get_balances().securities.get(SPY) == 2
+
+
+def test_fork_builds_accounts_on_use() -> None:
+    portfolio = Portfolio()
+
+    for i in range(100):
+        portfolio.open_account(f'account-{i}')
+
+    what_if = portfolio.fork()
+
+    assert what_if.accounts.wrappers == {}
+    assert len(what_if.accounts) == 100
+    assert 'account-5' in what_if.accounts and '__external_bank' not in what_if.accounts
+
+    account = what_if.accounts['account-5']
+    assert what_if.get_account('account-5') is account
+    assert list(what_if.accounts.wrappers) == ['account-5']
+
+    # Accounts opened or closed in the fork are seen, those closed in the
+    # portfolio since the fork aren't
+    what_if.open_account('new')
+    what_if.close_account('account-1')
+    portfolio.close_account('account-0')
+
+    assert list(what_if.accounts)[-1] == 'new'
+    assert 'account-1' not in what_if.accounts
+    assert what_if.get_account('account-1') is None
+    assert 'account-0' in what_if.accounts and 'account-0' not in portfolio.accounts
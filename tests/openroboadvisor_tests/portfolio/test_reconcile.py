@@ -0,0 +1,116 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.portfolio.reconcile import Break, PositionDigests, get_digest, reconcile
+from pathlib import Path
+from pytest import raises
+from typing import List
+
+
+TRADE_DATE = date(2022, 1, 3)
+
+
+def make_portfolio() -> Portfolio:
+    portfolio = Portfolio()
+    brokerage = portfolio.open_account('brokerage')
+    brokerage.deposit(1000, transfer_date=TRADE_DATE)
+    brokerage.buy(symbol='VTI', shares=2, amount=400, fees=10, trade_date=TRADE_DATE)
+    ira = portfolio.open_account('ira', AccountType.IRA)
+    ira.deposit(500, transfer_date=TRADE_DATE)
+    ira.buy(symbol='BND', shares=3, amount=150, lot='lot-1', trade_date=TRADE_DATE)
+    ira.buy(symbol='BND', shares=1, amount=50, lot='lot-2', trade_date=TRADE_DATE)
+    portfolio.open_account('empty')
+    return portfolio
+
+
+def write_custodian_file(path: Path, rows: List[str]) -> str:
+    path.write_text('account_id,symbol,quantity\n' + ''.join(f'{row}\n' for row in rows))
+    return str(path)
+
+
+def test_position_digests() -> None:
+    portfolio = make_portfolio()
+    digests = PositionDigests(portfolio.ledger)
+
+    # Lots are folded, fees and internal accounts are left out
+    assert digests.get_positions('brokerage') == {'USD': Decimal(590), 'VTI': Decimal(2)}
+    assert digests.get_positions('ira') == {'USD': Decimal(300), 'BND': Decimal(4)}
+    assert digests.get_positions('empty') == {}
+    assert digests.get_digest('empty') == 0
+
+    # Digests follow every leg, and match digests computed from scratch
+    portfolio.accounts['brokerage'].sell(symbol='VTI', shares=2, amount=420, trade_date=TRADE_DATE)
+    positions = digests.get_positions('brokerage')
+    assert positions == {'USD': Decimal(1010)}
+    assert digests.get_digest('brokerage') == get_digest(positions)
+    assert digests.get_digest('ira') == get_digest({'BND': Decimal('4.00'), 'USD': Decimal(300)})
+
+    digests.close()
+    portfolio.accounts['ira'].deposit(100, transfer_date=TRADE_DATE)
+    assert digests.get_positions('ira') == {'USD': Decimal(300), 'BND': Decimal(4)}
+
+
+def test_reconcile(tmp_path: Path) -> None:
+    digests = PositionDigests(make_portfolio().ledger)
+    path = write_custodian_file(tmp_path / 'positions.csv', [
+        'brokerage,VTI,2.000',
+        'brokerage,USD,590',
+        'ira,BND,4',
+        'ira,USD,300',
+        'empty,USD,0',
+    ])
+
+    report = reconcile(digests, path)
+    assert report.breaks == []
+    assert report.mismatched_account_ids == []
+    assert report.account_count == 2
+
+    path = write_custodian_file(tmp_path / 'positions.csv', [
+        'brokerage,VTI,2',
+        'brokerage,USD,590',
+        'ira,BND,3',
+        'ira,BND,1',
+        'ira,USD,290',
+        'ira,VEA,5',
+        'unknown,VTI,1',
+    ])
+
+    report = reconcile(digests, path)
+    assert report.mismatched_account_ids == ['ira', 'unknown']
+    assert report.breaks == [
+        Break('ira', 'USD', Decimal(300), Decimal(290)),
+        Break('ira', 'VEA', Decimal(0), Decimal(5)),
+        Break('unknown', 'VTI', Decimal(0), Decimal(1)),
+    ]
+
+    stream = StringIO()
+    report.write(stream)
+    assert stream.getvalue().splitlines()[0] == 'account_id,symbol,ledger_quantity,custodian_quantity,difference'
+    assert 'ira,USD,300,290,-10' in stream.getvalue().splitlines()
+
+    # Accounts whose rows are scattered through the file are checked as a whole
+    path = write_custodian_file(tmp_path / 'positions.csv', [
+        'brokerage,VTI,2',
+        'ira,BND,4',
+        'brokerage,USD,590',
+        'ira,USD,301',
+    ])
+    report = reconcile(digests, path)
+    assert report.mismatched_account_ids == ['ira']
+    assert report.breaks == [Break('ira', 'USD', Decimal(300), Decimal(301))]
+
+    # Accounts missing from the file are breaks too
+    path = write_custodian_file(tmp_path / 'positions.csv', ['brokerage,VTI,2', 'brokerage,USD,590'])
+    report = reconcile(digests, path)
+    assert report.mismatched_account_ids == ['ira']
+    assert [(b.symbol, b.custodian_quantity) for b in report.breaks] == [('USD', Decimal(0)), ('BND', Decimal(0))]
+
+    renamed = tmp_path / 'positions.csv'
+    renamed.write_text('account,ticker,shares\n')
+
+    with raises(AssertionError, match=r"Custodian file is missing a column.*"):
+        reconcile(digests, str(renamed))
+
+    assert reconcile(digests, str(renamed), 'account', 'ticker', 'shares').mismatched_account_ids == ['brokerage', 'ira']
@@ -0,0 +1,68 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.advisor.suggestion import Buy, Sell
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.portfolio.registry import DirectoryStore, PortfolioRegistry
+from pathlib import Path
+
+
+USD = Currency('USD')
+VTI = Security('VTI')
+TRADE_DATE = date(2022, 1, 3)
+
+
+def test_registry_round_trip(tmp_path: Path) -> None:
+    registry = PortfolioRegistry(DirectoryStore(str(tmp_path)), max_portfolios=2)
+
+    for customer_id in ['alice', 'bob', 'carol/1']:
+        account = registry.get(customer_id).open_account('brokerage', create_date=TRADE_DATE)
+        account.deposit(1000, transfer_date=TRADE_DATE)
+
+    assert len(registry) == 2
+    assert 'alice' not in registry, "Expected the least recently used portfolio to be evicted"
+
+    # Alice is loaded back from the store with the same state.
+    alice = registry.get('alice')
+    assert alice.accounts['brokerage'].get_balances().cash == {USD: Decimal(1000)}
+    assert 'bob' not in registry
+
+    alice.accounts['brokerage'].buy(symbol='VTI', shares=2, amount=400, trade_date=TRADE_DATE)
+    registry.flush()
+
+    reloaded = PortfolioRegistry(DirectoryStore(str(tmp_path))).get('alice')
+    assert reloaded.accounts['brokerage'].get_balances().securities == {VTI: Decimal(2)}
+    assert len(reloaded.ledger.entries) == len(alice.ledger.entries)
+
+    # Advisors work unchanged on loaded portfolios.
+    advisor = SimpleAdvisor(
+        portfolio=reloaded,
+        account_targets={'brokerage': {VTI: Decimal(1)}},
+        quotes={VTI: Decimal(200)},
+    )
+    assert advisor.get_suggestions() == {
+        'brokerage': [Sell(USD, Decimal(600)), Buy(VTI, Decimal(600))],
+    }
+
+
+def test_registry_entry_budget(tmp_path: Path) -> None:
+    registry = PortfolioRegistry(DirectoryStore(str(tmp_path)), max_entries=9)
+
+    for customer_id in ['alice', 'bob']:
+        registry.get(customer_id).open_account('brokerage', create_date=TRADE_DATE)
+
+    # Entries are counted when a portfolio is accessed.
+    assert registry.resident_entries == 2
+    registry.get('alice')
+    registry.get('bob')
+    assert registry.resident_entries == 4
+    assert len(registry) == 2
+
+    registry.get('alice').accounts['brokerage'].deposit(1000, transfer_date=TRADE_DATE)
+    registry.get('alice').accounts['brokerage'].deposit(1000, transfer_date=TRADE_DATE)
+    registry.get('alice').accounts['brokerage'].deposit(1000, transfer_date=TRADE_DATE)
+    registry.get('alice')
+
+    assert 'bob' not in registry
+    assert registry.resident_entries == 8
+    assert registry.get('bob').get_account('brokerage') is not None
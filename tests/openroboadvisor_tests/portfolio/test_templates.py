@@ -0,0 +1,141 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.ledger import Ledger
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.asset import Currency
+from openroboadvisor.ledger.entry import Entry, OpenAccount
+from openroboadvisor.portfolio.account import Account, EXTERNAL_BANK_ID
+from openroboadvisor.portfolio.templates import (
+    ACCOUNT,
+    CURRENCY,
+    LegTemplate,
+    SETTLED_SUBACCOUNT_ID,
+    TRADE_DATE as TRADE_DATE_SLOT,
+    TransactionTemplate,
+)
+from pytest import raises
+from typing import List
+
+
+TRADE_DATE = date(2022, 1, 3)
+SETTLEMENT_DATE = date(2022, 1, 5)
+
+
+def make_ledger() -> Ledger:
+    ledger = Ledger()
+    ledger.record(
+        OpenAccount(account_id=EXTERNAL_BANK_ID, account_type=AccountType.CHECKING, entry_date=TRADE_DATE),
+        OpenAccount(account_id='test', account_type=AccountType.BROKERAGE, entry_date=TRADE_DATE),
+    )
+    return ledger
+
+
+def leg_state(ledger: Ledger) -> List[object]:
+    return [
+        (
+            type(entry).__name__,
+            entry.entry_date,
+            getattr(entry, 'balanced', None),
+            [
+                (leg.account_id, leg.subaccount_id, leg.asset_type, leg.quantity, leg.cost)
+                for leg in getattr(entry, 'legs', [])
+            ],
+        )
+        for entry in ledger.entries
+    ]
+
+
+def test_templates_match_recorded_entries() -> None:
+    templated = make_ledger()
+    recorded = make_ledger()
+    templated_account = Account('test', templated)
+    recorded_account = Account('test', recorded)
+
+    operations = [
+        ('deposit', dict(amount=2000, transfer_date=TRADE_DATE, settlement_date=SETTLEMENT_DATE)),
+        ('buy', dict(symbol='VTI', shares=Decimal('4.5177'), amount=1000, fees=Decimal('9.95'), trade_date=TRADE_DATE)),
+        ('buy', dict(symbol='VTI', shares=2, amount=500, lot='lot-1', trade_date=TRADE_DATE, settlement_date=SETTLEMENT_DATE)),
+        ('sell', dict(symbol='VTI', shares=1, amount=Decimal(230), fees=10, trade_date=TRADE_DATE)),
+        ('withdraw', dict(amount=100, currency='USD', transfer_date=TRADE_DATE)),
+        ('deposit', dict(amount=Decimal('0.5'), currency='BTC', transfer_date=TRADE_DATE)),
+    ]
+
+    for name, kwargs in operations:
+        getattr(templated_account, name)(**kwargs)
+        recorded.record(*getattr(recorded_account, f'{name}_entries')(**kwargs))
+
+    assert leg_state(templated) == leg_state(recorded)
+
+    for account_id in [EXTERNAL_BANK_ID, 'test']:
+        assert templated.accounts[account_id].subaccounts == recorded.accounts[account_id].subaccounts
+
+
+def test_templates_require_open_accounts() -> None:
+    ledger = Ledger()
+    ledger.record(OpenAccount(account_id='test', account_type=AccountType.BROKERAGE, entry_date=TRADE_DATE))
+
+    with raises(AssertionError, match=r"Transaction references missing account.*"):
+        Account('test', ledger).deposit(100)
+
+    assert ledger.accounts['test'].subaccounts == {}
+    assert len(ledger.entries) == 1
+
+
+def test_templates_follow_fork_generations() -> None:
+    ledger = make_ledger()
+    fork = ledger.fork()
+    account = Account('test', fork)
+
+    account.deposit(100, transfer_date=TRADE_DATE)
+    fork.discard()
+    account.deposit(50, transfer_date=TRADE_DATE)
+
+    assert fork.accounts['test'].subaccounts['settled'].assets == {account.templates.currency('USD'): 50}
+    assert ledger.accounts['test'].subaccounts == {}
+
+
+# Takes more out of the bank than it puts in the account
+UNBALANCED = (
+    TransactionTemplate(
+        TRADE_DATE_SLOT,
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, CURRENCY, (1, 0, 0)),
+        LegTemplate(ACCOUNT, SETTLED_SUBACCOUNT_ID, CURRENCY, (0, 0, 1)),
+    ),
+)
+
+
+def test_templates_are_validated_unless_trusted() -> None:
+    ledger = make_ledger()
+    account = Account('test', ledger)
+
+    with raises(AssertionError, match="Transaction has an imbalance"):
+        account.templates.fill(UNBALANCED, 'USD', Decimal(100), fees=Decimal(1))
+
+    assert len(ledger.entries) == 2
+
+    ledger.trust_balanced = True
+    account.templates.fill(UNBALANCED, 'USD', Decimal(100), fees=Decimal(1))
+    assert len(ledger.entries) == 3
+
+
+class CountingLedger(Ledger):
+    def __init__(self) -> None:
+        super().__init__()
+        self.handled = 0
+
+    def handle_transaction(self, entry: Entry) -> None:
+        self.handled += 1
+        super().handle_transaction(entry)
+
+
+def test_templates_use_overridden_handlers() -> None:
+    ledger = CountingLedger()
+    ledger.record(
+        OpenAccount(account_id=EXTERNAL_BANK_ID, account_type=AccountType.CHECKING, entry_date=TRADE_DATE),
+        OpenAccount(account_id='test', account_type=AccountType.BROKERAGE, entry_date=TRADE_DATE),
+    )
+
+    Account('test', ledger).deposit(100, transfer_date=TRADE_DATE)
+
+    assert ledger.handled == 2
+    assert ledger.accounts['test'].subaccounts['settled'].assets == {Currency('USD'): 100}
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.simple_advisor import SimpleAdvisor
+from openroboadvisor.ledger.asset import Currency
+from openroboadvisor.ledger.entry import CloseAccount, OpenAccount
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.serialization import AccountArchive
+from pathlib import Path
+from pytest import raises
+
+
+USD = Currency('USD')
+TRADE_DATE = date(2022, 1, 3)
+
+
+def test_close_and_archive_accounts(tmp_path: Path) -> None:
+    archive = AccountArchive(str(tmp_path / 'closed.ora'))
+    portfolio = Portfolio(archive=archive)
+
+    for account_id in ['a', 'b']:
+        account = portfolio.open_account(account_id, create_date=TRADE_DATE)
+        account.deposit(1000, transfer_date=TRADE_DATE)
+
+    a = portfolio.accounts['a']
+    a.buy('VTI', shares=5, amount=500, fees=1, trade_date=TRADE_DATE)
+
+    with raises(AssertionError, match=r"Can't close an account with a balance.*"):
+        portfolio.close_account('a', close_date=TRADE_DATE)
+
+    a.sell('VTI', shares=5, amount=500, fees=1, trade_date=TRADE_DATE)
+    a.withdraw(998, transfer_date=TRADE_DATE)
+    portfolio.close_account('a', close_date=TRADE_DATE)
+
+    assert list(portfolio.accounts) == ['b']
+    assert 'a' not in portfolio.ledger.accounts
+
+    # Cached template handles don't outlive the account
+    with raises(AssertionError, match=r"Transaction references missing account.*"):
+        a.deposit(1, transfer_date=TRADE_DATE)
+
+    advisor = SimpleAdvisor(portfolio=portfolio, account_targets={'b': {USD: Decimal(1)}}, quotes={})
+    assert list(advisor.get_suggestions()) == ['b']
+
+    archived = archive.get('a')
+    assert archived is not None
+    archived_account, entries = archived
+    assert archived_account.subaccounts['fees'].assets == {USD: 2}
+    assert archived_account.subaccounts['settled'].assets[USD] == 0
+    assert isinstance(entries[0], OpenAccount)
+    assert isinstance(entries[-1], CloseAccount)
+    assert entries[-1].exempt_subaccount_ids == ('fees',)
+    assert len(entries) == 2 + 2 * 4
+
+    entry_count = len(portfolio.ledger.entries)
+    assert portfolio.compact() == len(entries)
+    assert len(portfolio.ledger.entries) == entry_count - len(entries)
+
+    # Appends across runs are read back as separate streams
+    portfolio.accounts['b'].withdraw(1000, transfer_date=TRADE_DATE)
+    portfolio.close_account('b', close_date=TRADE_DATE)
+    assert [account.account_id for account, _ in archive] == ['a', 'b']
+    assert archive.get('missing') is None
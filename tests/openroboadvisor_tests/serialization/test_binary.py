@@ -0,0 +1,103 @@
+import io
+from datetime import date
+from decimal import Decimal
+from openroboadvisor.advisor.suggestion import Buy, Sell, Suggestion
+from openroboadvisor.ledger.account import AccountType
+from openroboadvisor.ledger.asset import Currency, Security
+from openroboadvisor.ledger.entry import OpenAccount
+from openroboadvisor.portfolio import Portfolio
+from openroboadvisor.serialization import (
+    Decoder,
+    dump_portfolio,
+    dump_suggestions,
+    load_portfolio,
+    load_suggestions,
+)
+from openroboadvisor.serialization.binary import FLUSH_SIZE
+from typing import List
+
+
+TRADE_DATE = date(2022, 1, 3)
+
+
+def leg_state(portfolio: Portfolio) -> List[object]:
+    return [
+        (
+            type(entry).__name__,
+            entry.entry_date,
+            getattr(entry, 'account_id', None),
+            getattr(entry, 'account_type', None),
+            [
+                (leg.account_id, leg.subaccount_id, leg.asset_type, leg.quantity, leg.cost)
+                for leg in getattr(entry, 'legs', [])
+            ],
+        )
+        for entry in portfolio.ledger.entries
+    ]
+
+
+def make_portfolio() -> Portfolio:
+    portfolio = Portfolio()
+    account = portfolio.open_account('My Fidelity Account', create_date=TRADE_DATE)
+    ira = portfolio.open_account('IRA ✓', AccountType.ROTH_IRA, create_date=TRADE_DATE)
+
+    account.deposit(2000, transfer_date=TRADE_DATE)
+    account.buy(symbol='VTI', shares=Decimal('4.5177'), amount=1000, fees=Decimal('9.95'), trade_date=TRADE_DATE)
+    account.sell(symbol='VTI', shares=Decimal('1.25'), amount=Decimal('276.4625'), trade_date=TRADE_DATE, lot='2022-01')
+    ira.deposit(Decimal('0.00012345678901234567890123'), currency='BTC', transfer_date=TRADE_DATE)
+    ira.withdraw(Decimal('-1E+30'), transfer_date=TRADE_DATE)
+    return portfolio
+
+
+def test_portfolio_round_trip() -> None:
+    portfolio = make_portfolio()
+    stream = io.BytesIO()
+    dump_portfolio(portfolio, stream)
+    stream.seek(0)
+
+    loaded = load_portfolio(stream)
+
+    assert leg_state(loaded) == leg_state(portfolio)
+    assert list(loaded.accounts) == list(portfolio.accounts)
+
+    for account_id, account in portfolio.accounts.items():
+        assert loaded.ledger.accounts[account_id].subaccounts == \
+            portfolio.ledger.accounts[account_id].subaccounts
+
+
+def test_strings_are_written_once() -> None:
+    stream = io.BytesIO()
+    dump_portfolio(make_portfolio(), stream)
+
+    assert stream.getvalue().count(b'My Fidelity Account') == 1
+    assert stream.getvalue().count(b'pending') == 1
+
+
+def test_streaming_decode() -> None:
+    portfolio = Portfolio()
+    account = portfolio.open_account('a', create_date=TRADE_DATE)
+
+    for i in range(5000):
+        account.deposit(i, transfer_date=TRADE_DATE)
+
+    stream = io.BytesIO()
+    dump_portfolio(portfolio, stream)
+    assert len(stream.getvalue()) > FLUSH_SIZE, "Expected the stream to span multiple buffers"
+    stream.seek(0)
+
+    records = iter(Decoder(stream))
+    first = next(records)
+    assert isinstance(first, OpenAccount) and first.account_id == '__external_bank'
+    assert len(list(records)) == len(portfolio.ledger.entries) - 1
+
+
+def test_suggestions_round_trip() -> None:
+    suggestions: dict[str, List[Suggestion]] = {
+        'a': [Buy(Security('VTI'), Decimal('790.50622560')), Sell(Currency('USD'), Decimal('845.16705664'))],
+        'b': [Sell(Security('VTI', 'lot-1'), Decimal(12))],
+    }
+    stream = io.BytesIO()
+    dump_suggestions(suggestions, stream)
+    stream.seek(0)
+
+    assert load_suggestions(stream) == suggestions
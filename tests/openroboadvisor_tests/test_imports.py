@@ -0,0 +1,96 @@
+import re
+import subprocess
+import sys
+from openroboadvisor import __file__ as package_file
+from os.path import dirname
+from pytest import mark, raises
+
+
+SRC = dirname(dirname(package_file))
+# Cumulative import time budgets in microseconds. They are deliberately loose
+# so slow CI machines pass; a regression that eagerly imports whole engines
+# costs far more than the headroom.
+IMPORT_BUDGETS = {
+    'import openroboadvisor.portfolio': 100_000,
+    'from openroboadvisor.portfolio import Portfolio': 200_000,
+}
+# Modules a short job using a Portfolio should not have to load. threading
+# isn't listed: every ledger holds a lock from it.
+HEAVY_MODULES = [
+    'csv',
+    'json',
+    'pickle',
+    'sqlite3',
+    'openroboadvisor.advisor',
+    'openroboadvisor.backtest',
+    'openroboadvisor.ledger.changes',
+    'openroboadvisor.ledger.fork',
+    'openroboadvisor.portfolio.holdings',
+    'openroboadvisor.portfolio.registry',
+    'openroboadvisor.serialization',
+]
+IMPORT_TIME = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\S+)$')
+
+
+def run(statement: str, *options: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *options, '-c', statement],
+        capture_output=True,
+        check=True,
+        env={'PYTHONPATH': SRC},
+        text=True,
+    )
+
+
+def import_time(statement: str) -> int:
+    total = 0
+
+    # Only top-level imports from the package; nested ones are included in
+    # their parent's cumulative time, and interpreter startup is left out.
+    for line in run(statement, '-X', 'importtime').stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+
+        if match and match.group(2).startswith('openroboadvisor'):
+            total += int(match.group(1))
+
+    return total
+
+
+@mark.parametrize('statement', sorted(IMPORT_BUDGETS))
+def test_import_time_budget(statement: str) -> None:
+    # Best of a few runs, to ignore one-off disk and scheduler noise
+    elapsed = min(import_time(statement) for _ in range(3))
+
+    assert elapsed > 0
+    assert elapsed <= IMPORT_BUDGETS[statement], (
+        f"Import exceeded its budget (statement='{statement}', "
+        f"elapsed_us={elapsed}, budget_us={IMPORT_BUDGETS[statement]})"
+    )
+
+
+def test_package_import_is_lazy() -> None:
+    loaded = run(
+        'import sys, openroboadvisor.portfolio; print(" ".join(sys.modules))',
+    ).stdout.split()
+
+    assert 'openroboadvisor.portfolio.portfolio' not in loaded
+    assert 'openroboadvisor.ledger' not in loaded
+
+
+def test_portfolio_skips_heavy_modules() -> None:
+    loaded = run(
+        'import sys; from openroboadvisor.portfolio import Portfolio; Portfolio(); print(" ".join(sys.modules))',
+    ).stdout.split()
+
+    assert [module for module in HEAVY_MODULES if module in loaded] == []
+
+
+def test_lazy_exports() -> None:
+    import openroboadvisor.serialization as serialization
+    from openroboadvisor.serialization.binary import Decoder
+
+    assert serialization.Decoder is Decoder
+    assert 'load_portfolio' in dir(serialization)
+
+    with raises(AttributeError):
+        serialization.missing
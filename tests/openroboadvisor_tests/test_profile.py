@@ -0,0 +1,36 @@
+from openroboadvisor.profile import (
+    WORKLOADS,
+    main,
+    make_portfolio,
+    sample_stacks,
+)
+from pathlib import Path
+from pytest import CaptureFixture, mark
+
+
+@mark.parametrize('workload', sorted(WORKLOADS))
+def test_profile_workload(
+    workload: str,
+    tmp_path: Path,
+    capsys: CaptureFixture[str],
+) -> None:
+    output = tmp_path / workload
+    main([
+        workload,
+        '--accounts', '20',
+        '--trades', '3',
+        '--limit', '5',
+        '--output', str(output),
+    ])
+
+    assert f'{workload}: 20 accounts' in capsys.readouterr().out
+    assert (tmp_path / f'{workload}.prof').exists()
+    assert (tmp_path / f'{workload}.folded').exists()
+
+
+def test_sample_stacks() -> None:
+    portfolio = make_portfolio(200, 5)
+    stacks = sample_stacks(WORKLOADS['ingest'](portfolio), 0.0005)
+
+    assert stacks
+    assert all(stack.startswith('run (') for stack in stacks)